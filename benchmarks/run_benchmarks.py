@@ -0,0 +1,312 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""
+Benchmarks of the code construction, circuit generation, DEM extraction, sampling
+and decoding hot paths, and of the end-to-end count of logical errors.
+
+The script imports the qec package, install it first from the root of the
+repository::
+
+    pip install -e .
+
+Each case runs in a fresh process so that its peak resident memory, which also
+accounts for the Stim and PyMatching native allocations, is measured in isolation.
+
+Record a baseline then compare a later run against it::
+
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --output current.json --compare baseline.json
+"""
+
+from __future__ import annotations
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import json
+import platform
+import sys
+import time
+
+CODES = ["RepetitionCode", "RotatedSurfaceCode"]
+STAGES = ["construct", "circuit", "dem", "sample", "decode", "logical_errors"]
+SHOT_STAGES = ["sample", "decode", "logical_errors"]
+KEY_FIELDS = ["stage", "code", "distance", "rounds", "shots"]
+
+
+def _peak_rss() -> int:
+    r"""
+    Return the peak resident set size of the process in bytes.
+    """
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(
+    stage: str, code: str, distance: int, rounds: int, shots: int, repeat: int
+) -> dict:
+    r"""
+    Run a benchmark case and return its record with the best and mean wall times
+    in seconds and the peak memory of the process in bytes.
+
+    :param stage: The stage to time, one of STAGES.
+    :param code: The name of the code class.
+    :param distance: The distance of the code.
+    :param rounds: The number of rounds of the memory circuit.
+    :param shots: The number of shots sampled and decoded.
+    :param repeat: The number of timed repetitions.
+    """
+
+    import pymatching
+    import qec
+    from qec import ThresholdLAB
+
+    code_class = getattr(qec, code)
+    rss_before = _peak_rss()
+
+    def construct():
+        return code_class(
+            distance=distance, depolarize1_rate=1e-3, depolarize2_rate=1e-3
+        )
+
+    seconds = []
+    for _ in range(repeat):
+
+        if stage == "construct":
+            start = time.perf_counter()
+            construct()
+            seconds.append(time.perf_counter() - start)
+            continue
+
+        if stage == "logical_errors":
+            # From the construction of the code to the decoded shots
+            start = time.perf_counter()
+            instance = construct()
+            instance.build_memory_circuit(number_of_rounds=rounds)
+            ThresholdLAB.compute_logical_errors(code=instance, num_shots=shots)
+            seconds.append(time.perf_counter() - start)
+            continue
+
+        instance = construct()
+        if stage == "circuit":
+            start = time.perf_counter()
+            instance.build_memory_circuit(number_of_rounds=rounds)
+            seconds.append(time.perf_counter() - start)
+            continue
+
+        instance.build_memory_circuit(number_of_rounds=rounds)
+        circuit = instance.memory_circuit
+
+        if stage == "dem":
+            start = time.perf_counter()
+            circuit.detector_error_model(decompose_errors=False)
+            seconds.append(time.perf_counter() - start)
+
+        elif stage == "sample":
+            start = time.perf_counter()
+            circuit.compile_detector_sampler().sample(shots, separate_observables=True)
+            seconds.append(time.perf_counter() - start)
+
+        elif stage == "decode":
+            detection_events, _ = circuit.compile_detector_sampler().sample(
+                shots, separate_observables=True
+            )
+            matcher = pymatching.Matching.from_detector_error_model(
+                circuit.detector_error_model(decompose_errors=False)
+            )
+            start = time.perf_counter()
+            matcher.decode_batch(detection_events)
+            seconds.append(time.perf_counter() - start)
+
+        else:
+            raise ValueError(f"Unknown stage '{stage}'.")
+
+    return {
+        "stage": stage,
+        "code": code,
+        "distance": distance,
+        "rounds": rounds if stage != "construct" else None,
+        "shots": shots if stage in SHOT_STAGES else None,
+        "repeat": repeat,
+        "best_seconds": min(seconds),
+        "mean_seconds": sum(seconds) / len(seconds),
+        "peak_rss_bytes": _peak_rss(),
+        "peak_rss_increase_bytes": _peak_rss() - rss_before,
+    }
+
+
+def run_suite(
+    codes: list[str],
+    stages: list[str],
+    distances: list[int],
+    rounds_factors: list[int],
+    shots: list[int],
+    repeat: int,
+) -> list[dict]:
+    r"""
+    Run every case of the sweep, each in a fresh process, and return the records.
+    """
+
+    cases = []
+    for code in codes:
+        for stage in stages:
+            for distance in distances:
+                for factor in rounds_factors if stage != "construct" else [0]:
+                    for num_shots in shots if stage in SHOT_STAGES else [0]:
+                        cases.append(
+                            (stage, code, distance, factor * distance, num_shots)
+                        )
+
+    results = []
+    for case in cases:
+        # A fresh executor per case starts a fresh worker process on any Python
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            record = executor.submit(run_case, *case, repeat).result()
+        print(
+            f"{record['stage']:>14} {record['code']:>20} d={record['distance']:<3} "
+            f"rounds={record['rounds'] or '-':<4} shots={record['shots'] or '-':<8} "
+            f"{record['best_seconds']:.4f}s "
+            f"{record['peak_rss_increase_bytes'] / 2**20:.1f}MiB"
+        )
+        results.append(record)
+    return results
+
+
+def compare(
+    results: list[dict],
+    baseline: list[dict],
+    tolerance: float,
+    min_seconds: float = 1e-3,
+) -> list[dict]:
+    r"""
+    Return the cases whose best time or peak memory increase exceed the baseline
+    by more than the tolerance.
+
+    :param results: The records of the current run.
+    :param baseline: The records of the baseline run.
+    :param tolerance: The relative slowdown allowed, e.g. 0.2 for 20%.
+    :param min_seconds: The baseline time below which timings are too noisy to be
+        compared.
+    """
+
+    reference = {tuple(r[k] for k in KEY_FIELDS): r for r in baseline}
+    regressions = []
+
+    for record in results:
+        base = reference.get(tuple(record[k] for k in KEY_FIELDS))
+        if base is None:
+            continue
+
+        for metric in ["best_seconds", "peak_rss_increase_bytes"]:
+            if metric == "best_seconds" and base[metric] < min_seconds:
+                continue
+            if base[metric] > 0 and record[metric] > (1 + tolerance) * base[metric]:
+                regressions.append(
+                    {
+                        **{k: record[k] for k in KEY_FIELDS},
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": record[metric],
+                        "ratio": record[metric] / base[metric],
+                    }
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    r"""
+    Run the benchmark suite from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--codes", nargs="+", default=CODES, choices=CODES)
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--distances", nargs="+", type=int, default=[3, 5, 7, 9])
+    parser.add_argument(
+        "--rounds-factors",
+        nargs="+",
+        type=int,
+        default=[1, 3],
+        help="Number of rounds as multiples of the distance.",
+    )
+    parser.add_argument("--shots", nargs="+", type=int, default=[10**3, 10**4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Path of the JSON file with the results.")
+    parser.add_argument("--compare", help="Path of a baseline JSON file.")
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1e-3,
+        help="Baseline time below which timings are not compared.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Relative slowdown allowed before flagging a regression.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        codes=args.codes,
+        stages=args.stages,
+        distances=args.distances,
+        rounds_factors=args.rounds_factors,
+        shots=args.shots,
+        repeat=args.repeat,
+    )
+
+    import numpy
+    import pymatching
+    import stim
+
+    report = {
+        "metadata": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy.__version__,
+            "stim": stim.__version__,
+            "pymatching": pymatching.__version__,
+        },
+        "results": results,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare is None:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = compare(
+        results, baseline, tolerance=args.tolerance, min_seconds=args.min_seconds
+    )
+    for r in regressions:
+        print(
+            f"REGRESSION {r['stage']} {r['code']} d={r['distance']} "
+            f"rounds={r['rounds']} shots={r['shots']} {r['metric']}: "
+            f"{r['baseline']:.4g} -> {r['current']:.4g} (x{r['ratio']:.2f})"
+        )
+    if not regressions:
+        print(f"No regression above {args.tolerance:.0%} against {args.compare}.")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
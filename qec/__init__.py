@@ -1,4 +1,6 @@
 from .codes import *  # noqa
 from .measurement import *  # noqa
+from .noise_model import *  # noqa
 from .stab import *  # noqa
+from .artifact_cache import *  # noqa
 from .lab import *  # noqa
@@ -0,0 +1,225 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from collections import OrderedDict
+import os
+import tempfile
+
+from stim import Circuit, DetectorErrorModel
+
+__all__ = ["ArtifactCache"]
+
+
+class ArtifactCache:
+    r"""
+    A class for caching the compiled artifacts of a memory experiment.
+
+    Circuits, detector error models and matchers are kept in an in-memory LRU
+    bounded by their approximate size in bytes. Circuits and detector error models
+    can also be stored on disk as ``.stim`` and ``.dem`` files, so that other
+    processes and later runs load them instead of generating them again.
+    """
+
+    __slots__ = ("_max_bytes", "_directory", "_entries", "_size", "_hits", "_misses")
+
+    # Extension of the files stored on disk for each kind of artifact
+    _extensions = {"circuit": ".stim", "dem": ".dem"}
+
+    def __init__(self, max_bytes: int = 2**28, directory: str | None = None) -> None:
+        r"""
+        Initialization of the Artifact Cache class.
+
+        :param max_bytes: The maximum size of the in-memory artifacts.
+        :param directory: The directory of the on-disk store, if any.
+        """
+
+        self._max_bytes = max_bytes
+        self._directory = directory
+        self._entries = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        # Only the configuration is sent to other processes, they share the disk
+        return {"max_bytes": self._max_bytes, "directory": self._directory}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def max_bytes(self) -> int:
+        r"""
+        The maximum size of the in-memory artifacts.
+        """
+        return self._max_bytes
+
+    @property
+    def directory(self) -> str | None:
+        r"""
+        The directory of the on-disk store.
+        """
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        r"""
+        The approximate size in bytes of the in-memory artifacts.
+        """
+        return self._size
+
+    @property
+    def hits(self) -> int:
+        r"""
+        The number of artifacts found in the cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        r"""
+        The number of artifacts not found in the cache.
+        """
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(
+        code: type | str,
+        distance: int,
+        number_of_rounds: int,
+        depolarize1_rate: float,
+        depolarize2_rate: float,
+        basis: str = "Z",
+        idle_rate: float = 0,
+        measurement_flip_rate: float = 0,
+        reset_flip_rate: float = 0,
+    ) -> str:
+        r"""
+        Return the key of the artifacts of a memory experiment. The key is also
+        the name of the files of the on-disk store.
+
+        :param code: The code class or its name.
+        :param distance: The distance of the code.
+        :param number_of_rounds: The number of rounds in the memory.
+        :param depolarize1_rate: Single qubit depolarization rate.
+        :param depolarize2_rate: Two qubit depolarization rate.
+        :param basis: The basis of the memory, only X memories have a suffix.
+        :param idle_rate: Depolarization rate of idle qubits.
+        :param measurement_flip_rate: Probability of flipping a measurement result.
+        :param reset_flip_rate: Probability of resetting to the orthogonal state.
+            The three rates only have a suffix when one of them is not zero.
+        """
+        name = code if isinstance(code, str) else code.__name__
+        key = (
+            f"{name}_d{distance}_r{number_of_rounds}"
+            f"_p{float(depolarize1_rate)!r}_p{float(depolarize2_rate)!r}"
+        )
+        if idle_rate or measurement_flip_rate or reset_flip_rate:
+            key += (
+                f"_i{float(idle_rate)!r}_m{float(measurement_flip_rate)!r}"
+                f"_r{float(reset_flip_rate)!r}"
+            )
+        return key if basis == "Z" else f"{key}_b{basis}"
+
+    def get(self, key: str, kind: str) -> any:
+        r"""
+        Return the artifact from memory, or from disk, or None if it is not cached.
+
+        :param key: The key of the memory experiment.
+        :param kind: The kind of artifact, "circuit", "dem" or "matcher".
+        """
+
+        if (key, kind) in self._entries:
+            self._entries.move_to_end((key, kind))
+            self._hits += 1
+            return self._entries[(key, kind)][0]
+
+        path = self._path(key=key, kind=kind)
+        if path is not None and os.path.exists(path):
+            if kind == "circuit":
+                value = Circuit.from_file(path)
+            else:
+                value = DetectorErrorModel.from_file(path)
+            self._remember(key=key, kind=kind, value=value, size=os.path.getsize(path))
+            self._hits += 1
+            return value
+
+        self._misses += 1
+        return None
+
+    def put(self, key: str, kind: str, value: any) -> None:
+        r"""
+        Store an artifact in memory and, for circuits and detector error models, on
+        disk.
+
+        :param key: The key of the memory experiment.
+        :param kind: The kind of artifact, "circuit", "dem" or "matcher".
+        :param value: The artifact.
+        """
+
+        if kind in self._extensions:
+            text = str(value)
+            size = len(text)
+
+            path = self._path(key=key, kind=kind)
+            if path is not None and not os.path.exists(path):
+                # Write then rename so that concurrent readers never see a partial file
+                fd, temp_path = tempfile.mkstemp(dir=self.directory)
+                with os.fdopen(fd, "w") as f:
+                    f.write(text)
+                os.replace(temp_path, path)
+        else:
+            # Rough footprint of a matcher per edge of its matching graph
+            size = 128 * value.num_edges
+
+        self._remember(key=key, kind=kind, value=value, size=size)
+
+    def clear(self) -> None:
+        r"""
+        Remove every in-memory artifact. The on-disk store is left untouched.
+        """
+        self._entries.clear()
+        self._size = 0
+
+    def _path(self, key: str, kind: str) -> str | None:
+        r"""
+        Return the on-disk path of the artifact, or None if it is not stored on disk.
+        """
+        if self.directory is None or kind not in self._extensions:
+            return None
+        return os.path.join(self.directory, key + self._extensions[kind])
+
+    def _remember(self, key: str, kind: str, value: any, size: int) -> None:
+        r"""
+        Add the artifact to the in-memory LRU and evict the least recently used
+        ones until the size fits.
+        """
+
+        if (key, kind) in self._entries:
+            self._size -= self._entries.pop((key, kind))[1]
+
+        if size > self.max_bytes:
+            return
+
+        self._entries[(key, kind)] = (value, size)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
@@ -0,0 +1,270 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import argparse
+import csv
+import importlib
+import json
+import sys
+from typing import TextIO
+
+import numpy as np
+
+from qec.artifact_cache import ArtifactCache
+from qec.codes import RepetitionCode, RotatedSurfaceCode
+from qec.lab.threshold import ThresholdLAB
+
+__all__ = ["main", "build_parser"]
+
+# Codes selectable by name, any other code is given by its "module:Class" path
+CODES = {"repetition": RepetitionCode, "rotated-surface": RotatedSurfaceCode}
+
+# Default batch size with --max-errors, a point overshoots the budget by the
+# errors of at most one batch
+MAX_ERRORS_BATCH_SIZE = 1000
+
+
+def _positive_int(value: str) -> int:
+    r"""
+    Parse a strictly positive integer argument.
+    """
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    r"""
+    Return the parser of the command line arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="qec",
+        description=(
+            "Run a threshold sweep headless and stream one record per (distance, "
+            "error rate) point as CSV or JSON lines."
+        ),
+    )
+    parser.add_argument(
+        "--code",
+        default="repetition",
+        help=f"One of {', '.join(CODES)}, or the import path module:Class of a code.",
+    )
+    parser.add_argument(
+        "--distances", type=int, nargs="+", required=True, help="Code distances."
+    )
+
+    grid = parser.add_mutually_exclusive_group(required=True)
+    grid.add_argument(
+        "--error-rates", type=float, nargs="+", help="Physical error rates."
+    )
+    grid.add_argument(
+        "--error-rate-range",
+        type=float,
+        nargs=3,
+        metavar=("START", "STOP", "NUM"),
+        help="NUM error rates evenly spaced from START to STOP.",
+    )
+    parser.add_argument(
+        "--log-spaced",
+        action="store_true",
+        help="Space the --error-rate-range grid logarithmically.",
+    )
+
+    parser.add_argument(
+        "--bases",
+        nargs="+",
+        choices=["Z", "X"],
+        default=["Z"],
+        help="Bases of the memories, sampled together in each task. Default to Z.",
+    )
+
+    parser.add_argument(
+        "--shots",
+        type=_positive_int,
+        required=True,
+        help="Maximum number of shots per point and basis.",
+    )
+    parser.add_argument(
+        "--max-errors",
+        type=_positive_int,
+        default=None,
+        help="Stop a point once this number of errors is reached.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=_positive_int,
+        default=None,
+        help="Shots sampled and decoded at once, the error budget is checked "
+        f"between batches. Default to {MAX_ERRORS_BATCH_SIZE} with --max-errors, "
+        "else all shots.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes."
+    )
+    parser.add_argument(
+        "--memory-gb",
+        type=float,
+        default=None,
+        help="Memory shared by the workers in GB, lowering the workers and batch "
+        "sizes to fit. Default to 80%% of the available memory.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the sweep.")
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory storing the circuits and detector error models.",
+    )
+
+    parser.add_argument(
+        "--output", default="-", help="Output file, default to the standard output."
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl"],
+        default=None,
+        help="Output format. Default to jsonl for .json and .jsonl files, else csv.",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Report the progress of the sweep on the standard error.",
+    )
+    return parser
+
+
+def _load_code(name: str) -> type:
+    r"""
+    Return the code class from its name or its import path.
+    """
+
+    if name in CODES:
+        return CODES[name]
+
+    module, _, qualname = name.partition(":")
+    if not qualname:
+        raise ValueError(
+            f"Unknown code {name!r}, expected one of {', '.join(CODES)} or "
+            "module:Class."
+        )
+    code = importlib.import_module(module)
+    for attribute in qualname.split("."):
+        code = getattr(code, attribute)
+    return code
+
+
+def _error_rates(args: argparse.Namespace) -> list[float]:
+    r"""
+    Return the error rates of the sweep from the parsed arguments.
+    """
+
+    if args.error_rates is not None:
+        return list(args.error_rates)
+
+    start, stop, num = args.error_rate_range
+    space = np.geomspace if args.log_spaced else np.linspace
+    return [float(p) for p in space(start, stop, int(num))]
+
+
+def _write_records(records, output: TextIO, fmt: str, code_name: str) -> None:
+    r"""
+    Write each record as soon as it is produced.
+    """
+
+    writer = None
+    for record in records:
+        row = {
+            "code": code_name,
+            **record,
+            "logical_error_rate": (
+                record["errors"] / record["shots"] if record["shots"] else float("nan")
+            ),
+        }
+
+        if fmt == "jsonl":
+            output.write(json.dumps(row) + "\n")
+        else:
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+
+        # Flush so that the results survive a job killed by the scheduler
+        output.flush()
+
+
+def _print_progress(progress: dict) -> None:
+    eta = progress["eta_seconds"]
+    print(
+        f"[{progress['completed_tasks']}/{progress['total_tasks']}] "
+        f"d={progress['distance']} p={progress['error_rate']} "
+        f"shots={progress['shots_done']} errors={progress['errors']} "
+        f"eta={'?' if eta is None else f'{eta:.0f}s'}",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    r"""
+    Run the threshold sweep described by the command line arguments.
+
+    :param argv: The arguments, default to the ones of the process.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        code = _load_code(args.code)
+    except (ValueError, ImportError, AttributeError) as error:
+        parser.error(str(error))
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "jsonl" if args.output.endswith((".json", ".jsonl")) else "csv"
+
+    batch_size = args.batch_size
+    if batch_size is None and args.max_errors is not None:
+        batch_size = min(args.shots, MAX_ERRORS_BATCH_SIZE)
+
+    lab = ThresholdLAB(
+        code=code,
+        distances=args.distances,
+        error_rates=_error_rates(args),
+        cache=(
+            None if args.cache_dir is None else ArtifactCache(directory=args.cache_dir)
+        ),
+        memory_limit=None if args.memory_gb is None else int(args.memory_gb * 2**30),
+        bases=args.bases,
+    )
+    records = lab.iter_stats(
+        num_shots=args.shots,
+        num_workers=args.workers,
+        batch_size=batch_size,
+        progress_callback=_print_progress if args.progress else None,
+        max_errors=args.max_errors,
+        seed=args.seed,
+    )
+
+    if args.output == "-":
+        _write_records(records, output=sys.stdout, fmt=fmt, code_name=lab.code_name)
+    else:
+        with open(args.output, "w", newline="") as output:
+            _write_records(records, output=output, fmt=fmt, code_name=lab.code_name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
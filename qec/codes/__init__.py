@@ -1,3 +1,7 @@
 from .base_code import BaseCode  # noqa
 from .repetition_code import RepetitionCode  # noqa
+from .rotated_surface_lattice import RotatedSurfaceLattice  # noqa
 from .rotated_surface_code import RotatedSurfaceCode  # noqa
+from .sparse_css_code import SparseCSSCode  # noqa
+from .code_spec import CodeSpec  # noqa
+from .code_family import CodeFamily  # noqa
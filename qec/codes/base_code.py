@@ -13,12 +13,14 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 import networkx as nx
-from stim import Circuit, target_rec
+import numpy as np
+from stim import Circuit, DetectorErrorModel, target_rec
 
+from qec.artifact_cache import ArtifactCache
+from qec.codes.code_spec import CodeSpec
 from qec.measurement import Measurement
+from qec.noise_model import NoiseModel
 from qec.stab import X_check, Z_check
 
 __all__ = ["BaseCode"]
@@ -30,7 +32,8 @@ class BaseCode(ABC):
     """
 
     __slots__ = (
-        "_name" "_distance",
+        "_name",
+        "_distance",
         "_memory_circuit",
         "_depolarize1_rate",
         "_depolarize2_rate",
@@ -38,13 +41,37 @@ class BaseCode(ABC):
         "_graph",
         "_checks",
         "_logic_check",
+        "_number_of_rounds",
+        "_body_circuit",
+        "_basis",
+        "_logic_x_check",
+        "_noise_model",
     )
 
+    # Calibrated on circuit-level depolarizing noise, where a location is a qubit
+    # or a CNOT of one round. The byte counts are peak resident memory.
+    DEM_ERRORS_PER_LOCATION = 4.0
+    MATCHER_EDGES_PER_LOCATION = 1.0
+    DEM_BYTES_PER_ERROR = 320
+    MATCHER_BYTES_PER_EDGE = 512
+    # Single core seconds, rough upper estimates used until a task is measured
+    BUILD_SECONDS_PER_DEM_ERROR = 2e-5
+    SAMPLE_SECONDS_PER_DETECTOR = 1e-7
+
+    # Bases of the memory experiments
+    BASES = ("Z", "X")
+
+    # Largest graph drawn with labels, and by default with networkx
+    DRAW_LABEL_MAX_NODES = 200
+
     def __init__(
         self,
         distance: int = 3,
         depolarize1_rate: float = 0,
         depolarize2_rate: float = 0,
+        idle_rate: float = 0,
+        measurement_flip_rate: float = 0,
+        reset_flip_rate: float = 0,
     ) -> None:
         r"""
         Initialization of the Base Code class.
@@ -52,12 +79,25 @@ class BaseCode(ABC):
         :param distance: Distance of the code.
         :param depolarize1_rate: Single qubit depolarization rate.
         :param depolarize2_rate: Two qubit depolarization rate.
+        :param idle_rate: Depolarization rate of the qubits idle during a layer.
+        :param measurement_flip_rate: Probability of flipping a measurement result.
+        :param reset_flip_rate: Probability of resetting to the orthogonal state.
         """
 
         self._distance = distance
         self._depolarize1_rate = depolarize1_rate
         self._depolarize2_rate = depolarize2_rate
+        self._noise_model = NoiseModel(
+            depolarize1_rate=depolarize1_rate,
+            depolarize2_rate=depolarize2_rate,
+            idle_rate=idle_rate,
+            measurement_flip_rate=measurement_flip_rate,
+            reset_flip_rate=reset_flip_rate,
+        )
         self._memory_circuit: Circuit
+        self._number_of_rounds: int | None = None
+        self._body_circuit: Circuit | None = None
+        self._basis = "Z"
         self._measurement = Measurement()
         self._checks: list[str]
         self._logic_check: list[str]
@@ -86,6 +126,40 @@ class BaseCode(ABC):
         """
         return self._memory_circuit
 
+    @property
+    def number_of_rounds(self) -> int | None:
+        r"""
+        The number of rounds of the memory circuit, or None if it is not built.
+        """
+        return self._number_of_rounds
+
+    @property
+    def basis(self) -> str:
+        r"""
+        The basis of the memory circuit, "Z" or "X".
+        """
+        return self._basis
+
+    @property
+    def spec(self) -> CodeSpec:
+        r"""
+        The compact specification rebuilding this code.
+        """
+        return CodeSpec.from_code(self)
+
+    @property
+    def cache_key(self) -> str:
+        r"""
+        The key of the memory circuit artifacts in an ArtifactCache.
+        """
+        return self._basis_cache_key(self.basis)
+
+    def _basis_cache_key(self, basis: str) -> str:
+        r"""
+        Return the key of the memory circuit artifacts of a basis.
+        """
+        return self.spec.replace(basis=basis).key
+
     @property
     def depolarize1_rate(self) -> float:
         r"""
@@ -100,6 +174,34 @@ class BaseCode(ABC):
         """
         return self._depolarize2_rate
 
+    @property
+    def idle_rate(self) -> float:
+        r"""
+        The depolarization rate of idle qubits.
+        """
+        return self._noise_model.idle_rate
+
+    @property
+    def measurement_flip_rate(self) -> float:
+        r"""
+        The probability of flipping a measurement result.
+        """
+        return self._noise_model.measurement_flip_rate
+
+    @property
+    def reset_flip_rate(self) -> float:
+        r"""
+        The probability of resetting to the orthogonal state.
+        """
+        return self._noise_model.reset_flip_rate
+
+    @property
+    def noise_model(self) -> NoiseModel:
+        r"""
+        The noise model added to the layers of the memory circuit.
+        """
+        return self._noise_model
+
     @property
     def measurement(self) -> Measurement:
         r"""
@@ -135,20 +237,326 @@ class BaseCode(ABC):
         """
         return self._logic_check
 
+    @property
+    def logic_x_check(self) -> list[int]:
+        r"""
+        The data qubits supporting the logical X operator observed by an X memory.
+        """
+        logic_x_check = getattr(self, "_logic_x_check", None)
+        if logic_x_check is None:
+            raise ValueError(f"The {self.name} code has no logical X operator.")
+        return logic_x_check
+
+    def qubit_counts(self) -> dict[str, int]:
+        r"""
+        Return the number of data qubits, of check qubits of each type, and of
+        CNOTs in a round of stabilizer measurements.
+        """
+        counts = {"data": 0, **{check: 0 for check in self.checks}}
+        for _, data in self.graph.nodes(data=True):
+            counts[data.get("type")] = counts.get(data.get("type"), 0) + 1
+        counts["CNOT"] = self.graph.number_of_edges()
+        return counts
+
+    def estimate_resources(self, number_of_rounds: int) -> dict:
+        r"""
+        Return an estimate of the size of the memory experiment and of the memory
+        needed to decode it, without building the circuit.
+
+        The sizes of the detector error model and of the matcher are rough upper
+        estimates that scale with the number of noisy locations. The bytes per shot
+        are those of unpacked detection events and of the bit tables of the
+        sampler. The build_seconds of the circuit, the detector error model and
+        the matcher, and the seconds_per_shot of sampling and decoding, are
+        equally rough and depend on the machine.
+
+        :param number_of_rounds: The number of rounds in the memory.
+        """
+
+        counts = self.qubit_counts()
+        num_z = counts.get("Z-check", 0)
+        num_checks = sum(counts.get(check, 0) for check in self.checks)
+        num_qubits = counts["data"] + num_checks
+
+        num_detectors = 2 * num_z + (number_of_rounds - 1) * num_checks
+        num_measurements = number_of_rounds * num_checks + counts["data"]
+        num_observables = 1
+
+        locations = number_of_rounds * (num_qubits + counts["CNOT"])
+        num_dem_errors = int(self.DEM_ERRORS_PER_LOCATION * locations)
+        num_matcher_edges = int(self.MATCHER_EDGES_PER_LOCATION * locations)
+
+        return {
+            "num_qubits": num_qubits,
+            "num_data_qubits": counts["data"],
+            "num_check_qubits": num_checks,
+            "num_detectors": num_detectors,
+            "num_measurements": num_measurements,
+            "num_dem_errors": num_dem_errors,
+            "dem_bytes": self.DEM_BYTES_PER_ERROR * num_dem_errors,
+            "num_matcher_edges": num_matcher_edges,
+            "matcher_bytes": self.MATCHER_BYTES_PER_EDGE * num_matcher_edges,
+            "sample_bytes_per_shot": num_detectors
+            + num_observables
+            + 2 * ((num_measurements + num_detectors + 7) // 8),
+            "build_seconds": self.BUILD_SECONDS_PER_DEM_ERROR * num_dem_errors,
+            "seconds_per_shot": self.SAMPLE_SECONDS_PER_DETECTOR * num_detectors,
+        }
+
+    @classmethod
+    def family_kwargs(cls, distances: list[int]) -> dict[int, dict]:
+        r"""
+        Return the additional constructor arguments of each code of a family of
+        distances. See :class:`qec.codes.code_family.CodeFamily`.
+
+        :param distances: The distances of the family.
+        """
+        return {distance: {} for distance in distances}
+
     @abstractmethod
     def build_graph(self) -> None:
         r"""
         Build the graph representing the qubit network.
         """
 
-    def build_memory_circuit(self, number_of_rounds: int) -> None:
+    def build_memory_circuit(
+        self,
+        number_of_rounds: int,
+        cache: ArtifactCache | None = None,
+        basis: str = "Z",
+    ) -> None:
         r"""
         Build and return a Stim Circuit object implementing a memory for the given time.
 
+        If the circuit is found in the cache it is not generated again, and the
+        measurement record is rebuilt from the check qubits and the number of
+        rounds, the same as after generating it.
+
         :param number_of_rounds: The number of rounds in the memory.
+        :param cache: The cache of the compiled artifacts.
+        :param basis: The basis of the memory. A Z memory prepares and measures the
+            data qubits in the Z basis and observes :attr:`logic_check`, an X memory
+            does so in the X basis and observes :attr:`logic_x_check`.
+        """
+        self.build_memory_circuits(
+            number_of_rounds=number_of_rounds, bases=[basis], cache=cache
+        )
+
+    def build_memory_circuits(
+        self,
+        number_of_rounds: int,
+        bases: list[str] = ("Z", "X"),
+        cache: ArtifactCache | None = None,
+    ) -> dict[str, Circuit]:
+        r"""
+        Build the memory circuits of several bases in one pass and return them by
+        basis. The stabilizer rounds and the measurement record are generated once
+        and shared, only the preparation, the first and final detectors and the
+        observable differ between the bases.
+
+        The memory circuit of the code is the one of the first basis.
+
+        :param number_of_rounds: The number of rounds in the memory.
+        :param bases: The bases of the memories, "Z" or "X".
+        :param cache: The cache of the compiled artifacts.
+        """
+
+        bases = self._start_memory(number_of_rounds=number_of_rounds, bases=bases)
+        circuits = self._get_cached_circuits(bases=bases, cache=cache)
+        if circuits is not None:
+            return circuits
+
+        data_qubits, check_qubits = self._qubits_by_type()
+        self._measurement = Measurement()
+
+        # The rounds are shared, the detectors of the first round are not
+        self._memory_circuit = Circuit()
+        self.append_stab_circuit(
+            round=0, data_qubits=data_qubits, check_qubits=check_qubits
+        )
+        first_round = self._noisy(self._memory_circuit)
+        first_detectors = {
+            basis: self._first_detectors(basis=basis, check_qubits=check_qubits)
+            for basis in bases
+        }
+
+        self._memory_circuit = Circuit()
+        self._append_body_rounds(
+            start=1,
+            stop=number_of_rounds,
+            data_qubits=data_qubits,
+            check_qubits=check_qubits,
+        )
+        body_rounds = self._noisy(self._memory_circuit)
+
+        self._add_data_outcomes(
+            number_of_rounds=number_of_rounds, data_qubits=data_qubits
+        )
+
+        circuits = {}
+        for basis in bases:
+            body = (
+                self._initialization(basis=basis, data_qubits=data_qubits)
+                + first_round
+                + first_detectors[basis]
+                + body_rounds
+            )
+            if basis == bases[0]:
+                self._body_circuit = body
+            circuits[basis] = body + self._final_block(
+                basis=basis,
+                number_of_rounds=number_of_rounds,
+                data_qubits=data_qubits,
+                check_qubits=check_qubits,
+            )
+
+        self._set_memory_circuits(circuits=circuits, cache=cache)
+        return circuits
+
+    def _start_memory(self, number_of_rounds: int, bases: list[str]) -> list[str]:
+        r"""
+        Check the bases and reset the state of the memory before building it.
+        """
+
+        bases = list(bases)
+        for basis in bases:
+            if basis not in self.BASES:
+                raise ValueError(f"The basis must be 'Z' or 'X', not {basis!r}.")
+
+        self._number_of_rounds = number_of_rounds
+        self._basis = bases[0]
+        self._body_circuit = None
+        return bases
+
+    def _get_cached_circuits(
+        self, bases: list[str], cache: ArtifactCache | None
+    ) -> dict[str, Circuit] | None:
+        r"""
+        Return the memory circuits of the bases if the cache holds all of them, the
+        first one becoming the memory circuit, else None. The measurement record of
+        the circuits is rebuilt, without generating them.
+        """
+
+        if cache is None:
+            return None
+
+        circuits = {}
+        for basis in bases:
+            circuit = cache.get(key=self._basis_cache_key(basis), kind="circuit")
+            if circuit is None:
+                return None
+            circuits[basis] = circuit
+
+        self._memory_circuit = circuits[bases[0]]
+        self._rebuild_measurement(number_of_rounds=self._number_of_rounds)
+        return circuits
+
+    def _rebuild_measurement(self, number_of_rounds: int) -> None:
+        r"""
+        Fill the measurement record in the order of the outcomes of the memory
+        circuit, the checks of each round followed by the final data qubits.
+        """
+
+        data_qubits, check_qubits = self._qubits_by_type()
+        all_check_qubits = [q for qubits in check_qubits.values() for q in qubits]
+
+        self._measurement = Measurement()
+        for round in range(number_of_rounds):
+            for i, q in enumerate(all_check_qubits):
+                self.add_outcome(
+                    outcome=target_rec(-1 - i), qubit=q, round=round, type="check"
+                )
+        self._add_data_outcomes(
+            number_of_rounds=number_of_rounds, data_qubits=data_qubits
+        )
+
+    def _set_memory_circuits(
+        self, circuits: dict[str, Circuit], cache: ArtifactCache | None
+    ) -> None:
+        r"""
+        Make the circuit of the first basis the memory circuit and store all of
+        them in the cache.
+        """
+
+        self._memory_circuit = next(iter(circuits.values()))
+        if cache is not None:
+            for basis, circuit in circuits.items():
+                cache.put(
+                    key=self._basis_cache_key(basis), kind="circuit", value=circuit
+                )
+
+    def extend_memory_circuit(
+        self, number_of_rounds: int, cache: ArtifactCache | None = None
+    ) -> None:
+        r"""
+        Extend the memory circuit to a larger number of rounds, appending the new
+        rounds to the body rounds kept from the previous build and emitting only
+        the final data measurements, detectors and observable again.
+
+        The result is the circuit :meth:`build_memory_circuit` builds for the same
+        number of rounds and basis, so that a sweep over the number of rounds costs
+        about one build of the longest circuit. Without kept body rounds, as when
+        the circuit came from the cache, or for fewer rounds, the circuit is built
+        anew.
+
+        :param number_of_rounds: The number of rounds in the memory.
+        :param cache: The cache of the compiled artifacts, the extended circuit is
+            stored in it.
+        """
+
+        if (
+            self._body_circuit is None
+            or self._number_of_rounds is None
+            or number_of_rounds < self._number_of_rounds
+        ):
+            self.build_memory_circuit(
+                number_of_rounds=number_of_rounds, cache=cache, basis=self.basis
+            )
+            return
+
+        data_qubits, check_qubits = self._qubits_by_type()
+
+        # Forget the final data measurements, each outcome being one measurement
+        self._measurement.truncate(register_count=self._body_circuit.num_measurements)
+
+        self._memory_circuit = Circuit()
+        self._append_body_rounds(
+            start=self._number_of_rounds,
+            stop=number_of_rounds,
+            data_qubits=data_qubits,
+            check_qubits=check_qubits,
+        )
+        self._number_of_rounds = number_of_rounds
+        self._body_circuit += self._noisy(self._memory_circuit)
+        self._memory_circuit = self._body_circuit.copy()
+
+        self._add_data_outcomes(
+            number_of_rounds=number_of_rounds, data_qubits=data_qubits
+        )
+        self._memory_circuit += self._final_block(
+            basis=self.basis,
+            number_of_rounds=number_of_rounds,
+            data_qubits=data_qubits,
+            check_qubits=check_qubits,
+        )
+
+        if cache is not None:
+            cache.put(key=self.cache_key, kind="circuit", value=self._memory_circuit)
+
+    def _noisy(self, circuit: Circuit) -> Circuit:
+        r"""
+        Return the circuit with the noise model added to its layers, every qubit of
+        the graph idling when not acted on.
+        """
+        return self.noise_model.apply(
+            circuit=circuit, qubits=[q for q in self.graph.nodes()]
+        )
+
+    def _qubits_by_type(self) -> tuple[list[int], dict[str, list[int]]]:
+        r"""
+        Return the data qubits and the check qubits of each type.
         """
 
-        all_qubits = [q for q in self.graph.nodes()]
         data_qubits = [
             node
             for node, data in self.graph.nodes(data=True)
@@ -162,26 +570,54 @@ class BaseCode(ABC):
                 for node, data in self.graph.nodes(data=True)
                 if data.get("type") == check
             ]
+        return data_qubits, check_qubits
 
-        temp = [item for item in check_qubits.values()]
-        all_check_qubits = [item for sublist in temp for item in sublist]
+    def _initialization(self, basis: str, data_qubits: list[int]) -> Circuit:
+        r"""
+        Return the reset of the qubits, the data qubits being prepared in the
+        basis of the memory.
+        """
 
-        # Initialization
-        self._memory_circuit = Circuit()
+        all_qubits = [q for q in self.graph.nodes()]
+        circuit = Circuit()
+        if basis == "Z":
+            circuit.append("R", all_qubits)
+        else:
+            data = set(data_qubits)
+            circuit.append("RX", data_qubits)
+            circuit.append("R", [q for q in all_qubits if q not in data])
+        return self._noisy(circuit)
+
+    def _first_detectors(
+        self, basis: str, check_qubits: dict[str, list[int]]
+    ) -> Circuit:
+        r"""
+        Return the detectors of the first round, on the checks of the basis of the
+        memory, which are deterministic after the preparation.
+        """
 
-        self._memory_circuit.append("R", all_qubits)
-        self._memory_circuit.append("DEPOLARIZE1", all_qubits, self.depolarize1_rate)
+        circuit = Circuit()
+        for q in check_qubits.get(f"{basis}-check", []):
+            rec = self.get_target_rec(qubit=q, round=0)
+            circuit.append("DETECTOR", [target_rec(rec)])
+        return circuit
 
-        self.append_stab_circuit(
-            round=0, data_qubits=data_qubits, check_qubits=check_qubits
-        )
+    def _append_body_rounds(
+        self,
+        start: int,
+        stop: int,
+        data_qubits: list[int],
+        check_qubits: dict[str, list[int]],
+    ) -> None:
+        r"""
+        Append the rounds from start to stop, excluded, with the detectors comparing
+        each check to its previous round.
+        """
 
-        for qz in check_qubits["Z-check"]:
-            rec = self.get_target_rec(qubit=qz, round=0)
-            self._memory_circuit.append("DETECTOR", [target_rec(rec)])
+        temp = [item for item in check_qubits.values()]
+        all_check_qubits = [item for sublist in temp for item in sublist]
 
-        # Body rounds
-        for round in range(1, number_of_rounds):
+        for round in range(start, stop):
 
             self.append_stab_circuit(
                 round=round, data_qubits=data_qubits, check_qubits=check_qubits
@@ -195,66 +631,95 @@ class BaseCode(ABC):
                     [target_rec(past_rec), target_rec(current_rec)],
                 )
 
-        # Finalization
-        self._memory_circuit.append("DEPOLARIZE1", data_qubits, self.depolarize1_rate)
-        self._memory_circuit.append("M", data_qubits)
-
+    def _add_data_outcomes(self, number_of_rounds: int, data_qubits: list[int]) -> None:
+        r"""
+        Add the final measurements of the data qubits to the measurement record,
+        shared by the memories of every basis.
+        """
         for i, q in enumerate(data_qubits):
             self.add_outcome(
                 outcome=target_rec(-1 - i), qubit=q, round=number_of_rounds, type="data"
             )
 
+    def _final_block(
+        self,
+        basis: str,
+        number_of_rounds: int,
+        data_qubits: list[int],
+        check_qubits: dict[str, list[int]],
+    ) -> Circuit:
+        r"""
+        Return the measurement of the data qubits in the basis of the memory, the
+        detectors comparing them to the last round of checks of that basis and the
+        logical observable. The data outcomes must be in the measurement record.
+        """
+
+        circuit = Circuit()
+        circuit.append("TICK")
+        circuit.append("M" if basis == "Z" else "MX", data_qubits)
+
         # Syndrome extraction grouping data qubits
-        for qz in check_qubits["Z-check"]:
+        for q in check_qubits.get(f"{basis}-check", []):
 
-            qz_adjacent_data_qubits = self.graph.neighbors(qz)
+            adjacent_data_qubits = self.graph.neighbors(q)
 
             recs = [
                 self.get_target_rec(qubit=qd, round=number_of_rounds)
-                for qd in qz_adjacent_data_qubits
+                for qd in adjacent_data_qubits
             ]
-            recs += [self.get_target_rec(qubit=qz, round=number_of_rounds - 1)]
+            recs += [self.get_target_rec(qubit=q, round=number_of_rounds - 1)]
+
+            circuit.append("DETECTOR", [target_rec(r) for r in recs])
 
-            self._memory_circuit.append("DETECTOR", [target_rec(r) for r in recs])
+        circuit = self._noisy(circuit)
 
         # Adding the comparison with the expected state
-        recs = [
-            self.get_target_rec(qubit=q, round=number_of_rounds)
-            for q in self.logic_check
-        ]
+        logical = self.logic_check if basis == "Z" else self.logic_x_check
+        recs = [self.get_target_rec(qubit=q, round=number_of_rounds) for q in logical]
         recs_str = " ".join(f"rec[{rec}]" for rec in recs)
-        self._memory_circuit.append_from_stim_program_text(
-            f"OBSERVABLE_INCLUDE(0) {recs_str}"
+        circuit.append_from_stim_program_text(f"OBSERVABLE_INCLUDE(0) {recs_str}")
+        return circuit
+
+    def detector_error_model(
+        self, cache: ArtifactCache | None = None
+    ) -> DetectorErrorModel:
+        r"""
+        Return the detector error model of the memory circuit.
+
+        :param cache: The cache of the compiled artifacts.
+        """
+
+        if cache is not None:
+            detector_error_model = cache.get(key=self.cache_key, kind="dem")
+            if detector_error_model is not None:
+                return detector_error_model
+
+        detector_error_model = self.memory_circuit.detector_error_model(
+            decompose_errors=False
         )
 
+        if cache is not None:
+            cache.put(key=self.cache_key, kind="dem", value=detector_error_model)
+        return detector_error_model
+
     def append_stab_circuit(
         self, round: int, data_qubits: list[int], check_qubits: dict[str, list[int]]
     ) -> None:
         r"""
-        Append the stabilizer circuit.
+        Append the noiseless stabilizer circuit, each layer starting with a TICK.
         """
 
         temp = [item for item in check_qubits.values()]
         all_check_qubits = [item for sublist in temp for item in sublist]
 
-        if round > 0:
-            self._memory_circuit.append(
-                "DEPOLARIZE1", all_check_qubits, self.depolarize1_rate
-            )
-
+        # Each layer starts with a TICK, the noise model adds the noise per layer
         if "X-check" in self.checks:
+            self._memory_circuit.append("TICK")
             self._memory_circuit.append("H", [q for q in check_qubits["X-check"]])
-            self._memory_circuit.append(
-                "DEPOLARIZE1",
-                [q for q in check_qubits["X-check"]],
-                self.depolarize1_rate,
-            )
-
-        # A flag to tell us if a data qubit was used this round
-        measured = {qd: False for qd in data_qubits}
 
         # Perform CNOTs with specific order to avoid hook errors
         for order in range(1, 5):
+            layer_started = False
             for check in check_qubits.keys():
                 for q in check_qubits[check]:
                     data = [
@@ -263,30 +728,18 @@ class BaseCode(ABC):
                         if attrs.get("weight") == order
                     ]
                     if len(data) == 1:
-                        data = data[0]
+                        if not layer_started:
+                            self._memory_circuit.append("TICK")
+                            layer_started = True
                         self.append_stab_element(
-                            data_qubit=data, check_qubit=q, check=check
-                        )
-                        self._memory_circuit.append(
-                            "DEPOLARIZE2", [data, q], self.depolarize2_rate
+                            data_qubit=data[0], check_qubit=q, check=check
                         )
-                        measured[data] = True
-
-        # Apply depolarization channel to account for the time not being used
-        not_measured = [key for key, value in measured.items() if value is False]
-        self._memory_circuit.append("DEPOLARIZE1", not_measured, self.depolarize1_rate)
 
         if "X-check" in self.checks:
+            self._memory_circuit.append("TICK")
             self._memory_circuit.append("H", [q for q in check_qubits["X-check"]])
-            self._memory_circuit.append(
-                "DEPOLARIZE1",
-                [q for q in check_qubits["X-check"]],
-                self.depolarize1_rate,
-            )
 
-        self._memory_circuit.append(
-            "DEPOLARIZE1", [q for q in all_check_qubits], self.depolarize1_rate
-        )
+        self._memory_circuit.append("TICK")
         self._memory_circuit.append("MR", [q for q in all_check_qubits])
         for i, q in enumerate(all_check_qubits):
             self.add_outcome(
@@ -357,11 +810,23 @@ class BaseCode(ABC):
         except TypeError:
             return None
 
-    def draw_graph(self) -> None:
+    def draw_graph(self, fast: bool | None = None, path: str | None = None) -> None:
         r"""
         Draw the graph.
+
+        :param fast: Draw the qubits and the edges as one scatter and one line
+            collection, without the edge weights, and label the qubits only up to
+            DRAW_LABEL_MAX_NODES qubits. Default to the fast drawing above that
+            number of qubits.
+        :param path: The file the figure is saved to, without going through
+            pyplot and the interactive backend. Default to showing the figure.
         """
 
+        import matplotlib.patches as mpatches
+
+        if fast is None:
+            fast = self.graph.number_of_nodes() > self.DRAW_LABEL_MAX_NODES
+
         # Extract qubit type for coloring
         node_categories = nx.get_node_attributes(self.graph, "type")
 
@@ -394,27 +859,44 @@ class BaseCode(ABC):
         except KeyError:
             pos = nx.spring_layout(self.graph)
 
-        # Draw the graph
-        plt.figure(figsize=(6, 6))
-
-        # Draw the graph with node numbers and colors
-        nx.draw(
-            self.graph,
-            pos,
-            with_labels=True,
-            node_size=400,
-            node_color=node_colors,
-            font_size=8,
-            font_weight="bold",
-            edge_color="gray",
-            width=1,  # Edge width (adjust as needed)
-        )
+        # A figure outside of pyplot needs no interactive backend
+        if path is None:
+            import matplotlib.pyplot as plt
 
-        # Add edge weights as labels
-        edge_labels = nx.get_edge_attributes(self.graph, "weight")
-        nx.draw_networkx_edge_labels(
-            self.graph, pos, edge_labels=edge_labels, font_size=8, font_weight="bold"
-        )
+            fig = plt.figure(figsize=(6, 6))
+        else:
+            from matplotlib.figure import Figure
+
+            fig = Figure(figsize=(6, 6))
+        ax = fig.add_subplot()
+
+        if fast:
+            self._draw_graph_fast(ax=ax, pos=pos, node_colors=node_colors)
+        else:
+            # Draw the graph with node numbers and colors
+            nx.draw(
+                self.graph,
+                pos,
+                ax=ax,
+                with_labels=True,
+                node_size=400,
+                node_color=node_colors,
+                font_size=8,
+                font_weight="bold",
+                edge_color="gray",
+                width=1,  # Edge width (adjust as needed)
+            )
+
+            # Add edge weights as labels
+            edge_labels = nx.get_edge_attributes(self.graph, "weight")
+            nx.draw_networkx_edge_labels(
+                self.graph,
+                pos,
+                ax=ax,
+                edge_labels=edge_labels,
+                font_size=8,
+                font_weight="bold",
+            )
 
         # Create and display custom legend patches for each unique type
         category_legend = [
@@ -423,8 +905,56 @@ class BaseCode(ABC):
         ]
 
         # Display the graph
-        plt.legend(
+        ax.legend(
             handles=category_legend, loc="upper left", bbox_to_anchor=(1, 1), title=""
         )
-        plt.title("")
-        plt.show()
+        ax.set_title("")
+
+        if path is None:
+            plt.show()
+        else:
+            fig.savefig(path, bbox_inches="tight")
+
+    def _draw_graph_fast(
+        self, ax: any, pos: dict[int, tuple[float, float]], node_colors: list[str]
+    ) -> None:
+        r"""
+        Draw the qubits as one scatter and the edges as one line collection, the
+        labels only up to DRAW_LABEL_MAX_NODES qubits.
+        """
+
+        from matplotlib.collections import LineCollection
+
+        nodes = list(self.graph.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        xy = np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+        edges = np.array(
+            [(index[u], index[v]) for u, v in self.graph.edges()], dtype=np.int64
+        ).reshape(-1, 2)
+
+        ax.add_collection(
+            LineCollection(xy[edges], colors="gray", linewidths=1, zorder=1)
+        )
+
+        labels = len(nodes) <= self.DRAW_LABEL_MAX_NODES
+        # The area of the markers shrinks with the number of qubits, without labels
+        # they only need to be told apart
+        size = 400 if labels else max(1.0, 100 * self.DRAW_LABEL_MAX_NODES / len(nodes))
+        ax.scatter(xy[:, 0], xy[:, 1], s=size, c=node_colors, zorder=2)
+
+        if labels:
+            for node, (x, y) in zip(nodes, xy):
+                ax.text(
+                    x,
+                    y,
+                    str(node),
+                    fontsize=8,
+                    fontweight="bold",
+                    ha="center",
+                    va="center",
+                    zorder=3,
+                )
+
+        ax.set_aspect("equal")
+        ax.autoscale_view()
+        ax.set_axis_off()
@@ -0,0 +1,141 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+from qec.artifact_cache import ArtifactCache
+
+if TYPE_CHECKING:
+    from qec.codes.base_code import BaseCode
+
+__all__ = ["CodeFamily"]
+
+
+class CodeFamily:
+    r"""
+    A class for the codes of several distances sharing the same noise, to build,
+    iterate over and extend them together.
+
+    The constructor arguments of every distance come from
+    :meth:`BaseCode.family_kwargs`, for the rotated surface code the lattices
+    cut from the lattice of the largest distance. Each code is built on first
+    access, and its graph takes as long to build as the one of an independent
+    code, so building a whole family is not faster than building its codes one
+    by one. Distances can be added later.
+    """
+
+    __slots__ = (
+        "_code",
+        "_depolarize1_rate",
+        "_depolarize2_rate",
+        "_kwargs",
+        "_codes",
+    )
+
+    def __init__(
+        self,
+        code: type,
+        distances: list[int],
+        depolarize1_rate: float = 0,
+        depolarize2_rate: float = 0,
+    ) -> None:
+        r"""
+        Initialization of the Code Family class.
+
+        :param code: The code class, a subclass of BaseCode.
+        :param distances: Distances of the codes.
+        :param depolarize1_rate: Single qubit depolarization rate.
+        :param depolarize2_rate: Two qubit depolarization rate.
+        """
+
+        self._code = code
+        self._depolarize1_rate = depolarize1_rate
+        self._depolarize2_rate = depolarize2_rate
+        self._kwargs = {}
+        self._codes = {}
+
+        self.add(distances)
+
+    @property
+    def code(self) -> type:
+        r"""
+        The code class.
+        """
+        return self._code
+
+    @property
+    def distances(self) -> list[int]:
+        r"""
+        The distances of the codes, in increasing order.
+        """
+        return sorted(self._kwargs)
+
+    @property
+    def depolarize1_rate(self) -> float:
+        r"""
+        The depolarization rate for single qubit gate.
+        """
+        return self._depolarize1_rate
+
+    @property
+    def depolarize2_rate(self) -> float:
+        r"""
+        The depolarization rate for two-qubit gate.
+        """
+        return self._depolarize2_rate
+
+    def __getitem__(self, distance: int) -> BaseCode:
+        if distance not in self._codes:
+            self._codes[distance] = self.code(
+                distance=distance,
+                depolarize1_rate=self.depolarize1_rate,
+                depolarize2_rate=self.depolarize2_rate,
+                **self._kwargs[distance],
+            )
+            # The code holds its own structure now
+            self._kwargs[distance] = {}
+        return self._codes[distance]
+
+    def __contains__(self, distance: int) -> bool:
+        return distance in self._kwargs
+
+    def __iter__(self) -> Iterator[BaseCode]:
+        return (self[distance] for distance in self.distances)
+
+    def __len__(self) -> int:
+        return len(self._kwargs)
+
+    def add(self, distances: list[int]) -> None:
+        r"""
+        Generate the structure of the distances not yet in the family.
+
+        :param distances: Distances of the codes.
+        """
+        new_distances = sorted(set(distances) - set(self._kwargs))
+        self._kwargs.update(self.code.family_kwargs(new_distances))
+
+    def build_memory_circuits(
+        self, rounds_per_distance: int = 3, cache: ArtifactCache | None = None
+    ) -> None:
+        r"""
+        Build the memory circuit of every code, with a number of rounds
+        proportional to its distance.
+
+        :param rounds_per_distance: The number of rounds per unit of distance.
+        :param cache: The cache of the compiled artifacts.
+        """
+        for code in self:
+            code.build_memory_circuit(
+                number_of_rounds=rounds_per_distance * code.distance, cache=cache
+            )
@@ -0,0 +1,316 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import importlib
+from typing import TYPE_CHECKING
+
+from qec.artifact_cache import ArtifactCache
+
+if TYPE_CHECKING:
+    from qec.codes.base_code import BaseCode
+
+__all__ = ["CodeSpec"]
+
+
+class CodeSpec:
+    r"""
+    An immutable specification of a code and its memory experiment.
+
+    The specification only holds the code class and its parameters, so it pickles
+    in a few dozen bytes and rebuilds the same code deterministically in another
+    process.
+    """
+
+    __slots__ = (
+        "_code",
+        "_distance",
+        "_depolarize1_rate",
+        "_depolarize2_rate",
+        "_number_of_rounds",
+        "_basis",
+        "_idle_rate",
+        "_measurement_flip_rate",
+        "_reset_flip_rate",
+    )
+
+    def __init__(
+        self,
+        code: type,
+        distance: int = 3,
+        depolarize1_rate: float = 0,
+        depolarize2_rate: float = 0,
+        number_of_rounds: int | None = None,
+        basis: str = "Z",
+        idle_rate: float = 0,
+        measurement_flip_rate: float = 0,
+        reset_flip_rate: float = 0,
+    ) -> None:
+        r"""
+        Initialization of the Code Spec class.
+
+        :param code: The code class, a subclass of BaseCode.
+        :param distance: Distance of the code.
+        :param depolarize1_rate: Single qubit depolarization rate.
+        :param depolarize2_rate: Two qubit depolarization rate.
+        :param number_of_rounds: The number of rounds in the memory, or None to
+            build the code without its memory circuit.
+        :param basis: The basis of the memory, "Z" or "X".
+        :param idle_rate: Depolarization rate of idle qubits.
+        :param measurement_flip_rate: Probability of flipping a measurement result.
+        :param reset_flip_rate: Probability of resetting to the orthogonal state.
+        """
+
+        if basis not in ("Z", "X"):
+            raise ValueError(f"The basis must be 'Z' or 'X', not {basis!r}.")
+
+        object.__setattr__(self, "_code", code)
+        object.__setattr__(self, "_distance", int(distance))
+        object.__setattr__(self, "_depolarize1_rate", float(depolarize1_rate))
+        object.__setattr__(self, "_depolarize2_rate", float(depolarize2_rate))
+        object.__setattr__(
+            self,
+            "_number_of_rounds",
+            None if number_of_rounds is None else int(number_of_rounds),
+        )
+        object.__setattr__(self, "_basis", basis)
+        object.__setattr__(self, "_idle_rate", float(idle_rate))
+        object.__setattr__(self, "_measurement_flip_rate", float(measurement_flip_rate))
+        object.__setattr__(self, "_reset_flip_rate", float(reset_flip_rate))
+
+    def __setattr__(self, name: str, value: any) -> None:
+        raise AttributeError("CodeSpec is immutable.")
+
+    def __reduce__(self) -> tuple:
+        return (self.__class__, self._astuple())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CodeSpec):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __hash__(self) -> int:
+        return hash(self._astuple())
+
+    def __repr__(self) -> str:
+        return (
+            f"CodeSpec({self.code.__name__}, distance={self.distance}, "
+            f"depolarize1_rate={self.depolarize1_rate}, "
+            f"depolarize2_rate={self.depolarize2_rate}, "
+            f"number_of_rounds={self.number_of_rounds}, basis={self.basis!r}, "
+            f"idle_rate={self.idle_rate}, "
+            f"measurement_flip_rate={self.measurement_flip_rate}, "
+            f"reset_flip_rate={self.reset_flip_rate})"
+        )
+
+    @classmethod
+    def from_code(cls, code: BaseCode) -> CodeSpec:
+        r"""
+        Return the specification of an existing code.
+
+        :param code: The code instance.
+        """
+        return cls(
+            code=type(code),
+            distance=code.distance,
+            depolarize1_rate=code.depolarize1_rate,
+            depolarize2_rate=code.depolarize2_rate,
+            number_of_rounds=code.number_of_rounds,
+            basis=code.basis,
+            idle_rate=code.idle_rate,
+            measurement_flip_rate=code.measurement_flip_rate,
+            reset_flip_rate=code.reset_flip_rate,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> CodeSpec:
+        r"""
+        Return the specification from its dictionary form.
+
+        :param data: The dictionary returned by :meth:`to_dict`.
+        """
+        module, _, name = data["code"].partition(":")
+        code = importlib.import_module(module)
+        for attribute in name.split("."):
+            code = getattr(code, attribute)
+
+        return cls(
+            code=code,
+            distance=data["distance"],
+            depolarize1_rate=data["depolarize1_rate"],
+            depolarize2_rate=data["depolarize2_rate"],
+            number_of_rounds=data["number_of_rounds"],
+            basis=data.get("basis", "Z"),
+            idle_rate=data.get("idle_rate", 0),
+            measurement_flip_rate=data.get("measurement_flip_rate", 0),
+            reset_flip_rate=data.get("reset_flip_rate", 0),
+        )
+
+    def to_dict(self) -> dict:
+        r"""
+        Return the specification as a JSON serializable dictionary, where the code
+        class is referred to by its import path.
+        """
+        return {
+            "code": f"{self.code.__module__}:{self.code.__qualname__}",
+            "distance": self.distance,
+            "depolarize1_rate": self.depolarize1_rate,
+            "depolarize2_rate": self.depolarize2_rate,
+            "number_of_rounds": self.number_of_rounds,
+            "basis": self.basis,
+            "idle_rate": self.idle_rate,
+            "measurement_flip_rate": self.measurement_flip_rate,
+            "reset_flip_rate": self.reset_flip_rate,
+        }
+
+    @property
+    def code(self) -> type:
+        r"""
+        The code class.
+        """
+        return self._code
+
+    @property
+    def distance(self) -> int:
+        r"""
+        The distance of the code.
+        """
+        return self._distance
+
+    @property
+    def depolarize1_rate(self) -> float:
+        r"""
+        The depolarization rate for single qubit gate.
+        """
+        return self._depolarize1_rate
+
+    @property
+    def depolarize2_rate(self) -> float:
+        r"""
+        The depolarization rate for two-qubit gate.
+        """
+        return self._depolarize2_rate
+
+    @property
+    def number_of_rounds(self) -> int | None:
+        r"""
+        The number of rounds in the memory.
+        """
+        return self._number_of_rounds
+
+    @property
+    def basis(self) -> str:
+        r"""
+        The basis of the memory, "Z" or "X".
+        """
+        return self._basis
+
+    @property
+    def idle_rate(self) -> float:
+        r"""
+        The depolarization rate of idle qubits.
+        """
+        return self._idle_rate
+
+    @property
+    def measurement_flip_rate(self) -> float:
+        r"""
+        The probability of flipping a measurement result.
+        """
+        return self._measurement_flip_rate
+
+    @property
+    def reset_flip_rate(self) -> float:
+        r"""
+        The probability of resetting to the orthogonal state.
+        """
+        return self._reset_flip_rate
+
+    @property
+    def code_kwargs(self) -> dict:
+        r"""
+        The keyword arguments building the code.
+        """
+        return {
+            "distance": self.distance,
+            "depolarize1_rate": self.depolarize1_rate,
+            "depolarize2_rate": self.depolarize2_rate,
+            "idle_rate": self.idle_rate,
+            "measurement_flip_rate": self.measurement_flip_rate,
+            "reset_flip_rate": self.reset_flip_rate,
+        }
+
+    @property
+    def key(self) -> str:
+        r"""
+        The key of the memory circuit artifacts in an ArtifactCache.
+        """
+        return ArtifactCache.key(
+            code=self.code,
+            distance=self.distance,
+            number_of_rounds=self.number_of_rounds,
+            depolarize1_rate=self.depolarize1_rate,
+            depolarize2_rate=self.depolarize2_rate,
+            basis=self.basis,
+            idle_rate=self.idle_rate,
+            measurement_flip_rate=self.measurement_flip_rate,
+            reset_flip_rate=self.reset_flip_rate,
+        )
+
+    def replace(self, **changes: any) -> CodeSpec:
+        r"""
+        Return a copy of the specification with some parameters changed, for
+        instance the basis.
+
+        :param changes: The parameters of the constructor to change.
+        """
+        return CodeSpec(
+            **{
+                "code": self.code,
+                "distance": self.distance,
+                "depolarize1_rate": self.depolarize1_rate,
+                "depolarize2_rate": self.depolarize2_rate,
+                "number_of_rounds": self.number_of_rounds,
+                "basis": self.basis,
+                "idle_rate": self.idle_rate,
+                "measurement_flip_rate": self.measurement_flip_rate,
+                "reset_flip_rate": self.reset_flip_rate,
+                **changes,
+            }
+        )
+
+    def build(self, cache: ArtifactCache | None = None) -> BaseCode:
+        r"""
+        Build the code and, if the number of rounds is set, its memory circuit.
+
+        :param cache: The cache of the compiled artifacts.
+        """
+
+        code = self.code(**self.code_kwargs)
+        if self.number_of_rounds is not None:
+            code.build_memory_circuit(
+                number_of_rounds=self.number_of_rounds, cache=cache, basis=self.basis
+            )
+        return code
+
+    def _astuple(self) -> tuple:
+        return (
+            self.code,
+            self.distance,
+            self.depolarize1_rate,
+            self.depolarize2_rate,
+            self.number_of_rounds,
+            self.basis,
+            self.idle_rate,
+            self.measurement_flip_rate,
+            self.reset_flip_rate,
+        )
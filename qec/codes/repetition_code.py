@@ -22,6 +22,8 @@ class RepetitionCode(BaseCode):
     A class for Repetition code.
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         *args,
@@ -37,6 +39,9 @@ class RepetitionCode(BaseCode):
 
         super().__init__(*args, **kwargs)
 
+        # Z errors are not detected, an X memory only checks the preparation
+        self._logic_x_check = list(range(self.distance))
+
     def build_graph(self) -> None:
         r"""
         Build the graph for the repetition code
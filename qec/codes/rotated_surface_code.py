@@ -13,102 +13,72 @@
 from __future__ import annotations
 
 from qec.codes.base_code import BaseCode
+from qec.codes.rotated_surface_lattice import RotatedSurfaceLattice
 
 __all__ = ["RotatedSurfaceCode"]
 
 
 class RotatedSurfaceCode(BaseCode):
     r"""
-    A class for the Rotated Surface code.
+    A class for the Rotated Surface code, of odd distance.
     """
 
+    __slots__ = ("_lattice",)
+
     def __init__(
         self,
         *args,
+        lattice: RotatedSurfaceLattice | None = None,
         **kwargs,
     ) -> None:
         r"""
         Initialize the Rotated Surface Code instance.
+
+        :param lattice: The lattice of the code, for instance a view of the lattice
+            of a larger distance. Default to generating it.
+        :raises ValueError: If the distance is even.
         """
 
         self._name = "Rotated Surface"
         self._checks = ["Z-check", "X-check"]
+        self._lattice = lattice
 
         super().__init__(*args, **kwargs)
 
         self._logic_check = [i + i * self.distance for i in range(self.distance)]
+        # The first column, crossing the diagonal of logic_check once
+        self._logic_x_check = [i * self.distance for i in range(self.distance)]
+
+    @classmethod
+    def family_kwargs(cls, distances: list[int]) -> dict[int, dict]:
+        r"""
+        Return the lattice of each distance, all cut from a single lattice of the
+        largest distance.
+
+        :param distances: The distances of the family.
+        """
+        if not distances:
+            return {}
+        lattice = RotatedSurfaceLattice(distance=max(distances))
+        return {d: {"lattice": lattice.view(distance=d)} for d in distances}
 
     def build_graph(self) -> None:
         r"""
         Build the 2D lattice of the rotated surface code.
         """
 
-        # Add the nodes for the data qubits
-        data_qubits_coords = [
-            (col, row)
-            for row in range(1, self.distance + 1)
-            for col in range(1, self.distance + 1)
-        ]
-        data = [
-            (i, {"type": "data", "coords": data_qubits_coords[i]})
-            for i in range(len(data_qubits_coords))
-        ]
-        self._graph.add_nodes_from(data)
-
-        # Add the nodes the X check qubits.
-        x_qubits_coords = [
-            (col + (0.5 if row % 2 != 0 else -0.5), row - 0.5)
-            for row in range(1, self.distance + 2)
-            for col in range(2, self.distance, 2)
-        ]
-        x_check = [
-            (i + len(data), {"type": "X-check", "coords": x_qubits_coords[i]})
-            for i in range(len(x_qubits_coords))
-        ]
-        self._graph.add_nodes_from(x_check)
-
-        # Add the ordered edges for the X checks
-        x_edges = []
-        for qx in x_check:
-
-            coords = qx[1]["coords"]
-            ordered_neighbors = self.get_neighbor_qubits(
-                coord=coords, index_order=[1, 3, 0, 2]
-            )
-
-            for order, neighbor in enumerate(ordered_neighbors):
-                if neighbor is not None:
-                    x_edges.append((neighbor, qx[0], order + 1))
-        self._graph.add_weighted_edges_from(x_edges)
-
-        # Add the nodes the Z check qubits.
-        z_qubits_coords = [
-            (col + (0.5 if row % 2 == 0 else -0.5), row + 0.5)
-            for row in range(1, self.distance)
-            for col in range(1, self.distance + 1, 2)
-        ]
-        z_check = [
-            (
-                i + len(data) + len(x_check),
-                {"type": "Z-check", "coords": z_qubits_coords[i]},
+        lattice = self._lattice
+        if lattice is None:
+            lattice = RotatedSurfaceLattice(distance=self.distance)
+        elif lattice.distance != self.distance:
+            raise ValueError(
+                f"The lattice has distance {lattice.distance} instead of "
+                f"{self.distance}."
             )
-            for i in range(len(z_qubits_coords))
-        ]
-        self._graph.add_nodes_from(z_check)
 
-        # Add the ordered edges for the Z checks
-        z_edges = []
-        for qz in z_check:
-
-            coords = qz[1]["coords"]
-            ordered_neighbors = self.get_neighbor_qubits(
-                coord=coords, index_order=[1, 0, 3, 2]
-            )
-
-            for order, neighbor in enumerate(ordered_neighbors):
-                if neighbor is not None:
-                    z_edges.append((neighbor, qz[0], order + 1))
-        self._graph.add_weighted_edges_from(z_edges)
+        lattice.add_to_graph(self._graph)
+        # The graph holds everything, the arrays are not needed anymore
+        self._lattice = None
 
     def get_neighbor_qubits(
         self, coord: tuple[float, float], index_order: list[int] | None = None
@@ -124,23 +94,29 @@ class RotatedSurfaceCode(BaseCode):
         :param index_order: The order in which the neighbors are
         """
         col, row = coord
-        neighbors_coords = [
-            (col + dx, row + dy) for dx in [-0.5, 0.5] for dy in [-0.5, 0.5]
-        ]
-
         neighbors = []
-        for coords in neighbors_coords:
-            try:
-                node = [
-                    node
-                    for node, data in self.graph.nodes(data=True)
-                    if data.get("coords") == coords
-                ][0]
-                neighbors.append(node)
-            except IndexError:
-                neighbors.append(None)
+        for dx in [-0.5, 0.5]:
+            for dy in [-0.5, 0.5]:
+                c, r = col + dx, row + dy
+                if float(c).is_integer() and float(r).is_integer():
+                    # Data qubits are numbered row by row
+                    inside = 1 <= c <= self.distance and 1 <= r <= self.distance
+                    neighbors.append(
+                        int((r - 1) * self.distance + (c - 1)) if inside else None
+                    )
+                else:
+                    neighbors.append(self._find_node(coords=(c, r)))
 
         if index_order is None:
             return neighbors
         else:
             return [neighbors[i] for i in index_order]
+
+    def _find_node(self, coords: tuple[float, float]) -> int | None:
+        r"""
+        Return the node at the coordinates, or None.
+        """
+        for node, data in self.graph.nodes(data=True):
+            if data.get("coords") == coords:
+                return node
+        return None
@@ -0,0 +1,266 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import networkx as nx
+import numpy as np
+
+__all__ = ["RotatedSurfaceLattice"]
+
+
+class RotatedSurfaceLattice:
+    r"""
+    A class for the qubits and the CNOT schedule of a rotated surface code
+    lattice, held in numpy arrays.
+
+    Data qubits sit at integer coordinates (col, row) and check qubits at the
+    centers of the plaquettes. The lattice of distance d is the corner of the
+    lattice of any larger distance, so :meth:`view` extracts it without
+    generating it again. The boundaries only match the layout for odd distances,
+    even distances are rejected.
+    """
+
+    __slots__ = (
+        "_distance",
+        "_data_coords",
+        "_x_coords",
+        "_z_coords",
+        "_x_edges",
+        "_z_edges",
+    )
+
+    # Neighbors of a check in CNOT order, as (dx, dy) offsets, avoiding hook errors
+    X_ORDER = [(-0.5, 0.5), (0.5, 0.5), (-0.5, -0.5), (0.5, -0.5)]
+    Z_ORDER = [(-0.5, 0.5), (-0.5, -0.5), (0.5, 0.5), (0.5, -0.5)]
+
+    def __init__(self, distance: int) -> None:
+        r"""
+        Initialization of the Rotated Surface Lattice class.
+
+        :param distance: Distance of the code, an odd number.
+        :raises ValueError: If the distance is even.
+        """
+
+        self._check_distance(distance)
+        self._distance = distance
+
+        # Data qubits, row by row
+        rows, cols = np.divmod(np.arange(distance**2), distance)
+        self._data_coords = np.stack([cols + 1, rows + 1], axis=1)
+
+        # X checks, shifted right on odd rows and left on even rows
+        rows, cols = np.meshgrid(
+            np.arange(1, distance + 2), np.arange(2, distance, 2), indexing="ij"
+        )
+        rows, cols = rows.ravel(), cols.ravel()
+        self._x_coords = np.stack(
+            [cols + np.where(rows % 2 != 0, 0.5, -0.5), rows - 0.5], axis=1
+        )
+
+        # Z checks, shifted right on even rows and left on odd rows
+        rows, cols = np.meshgrid(
+            np.arange(1, distance), np.arange(1, distance + 1, 2), indexing="ij"
+        )
+        rows, cols = rows.ravel(), cols.ravel()
+        self._z_coords = np.stack(
+            [cols + np.where(rows % 2 == 0, 0.5, -0.5), rows + 0.5], axis=1
+        )
+
+        self._x_edges = self._ordered_edges(self._x_coords, self.X_ORDER)
+        self._z_edges = self._ordered_edges(self._z_coords, self.Z_ORDER)
+
+    @property
+    def distance(self) -> int:
+        r"""
+        The distance of the code.
+        """
+        return self._distance
+
+    @property
+    def data_coords(self) -> np.ndarray:
+        r"""
+        The (col, row) coordinates of the data qubits.
+        """
+        return self._data_coords
+
+    @property
+    def x_coords(self) -> np.ndarray:
+        r"""
+        The coordinates of the X check qubits.
+        """
+        return self._x_coords
+
+    @property
+    def z_coords(self) -> np.ndarray:
+        r"""
+        The coordinates of the Z check qubits.
+        """
+        return self._z_coords
+
+    @property
+    def x_edges(self) -> np.ndarray:
+        r"""
+        The (data, X check, order) rows of the X check CNOTs, the checks being
+        indexed from zero.
+        """
+        return self._x_edges
+
+    @property
+    def z_edges(self) -> np.ndarray:
+        r"""
+        The (data, Z check, order) rows of the Z check CNOTs, the checks being
+        indexed from zero.
+        """
+        return self._z_edges
+
+    def data_index(self, col: np.ndarray, row: np.ndarray) -> np.ndarray:
+        r"""
+        Return the index of the data qubits at the coordinates, or -1 where there
+        is none.
+
+        :param col: The column coordinates.
+        :param row: The row coordinates.
+        """
+
+        col, row = np.asarray(col, dtype=float), np.asarray(row, dtype=float)
+        valid = (
+            (col == np.round(col))
+            & (row == np.round(row))
+            & (col >= 1)
+            & (col <= self.distance)
+            & (row >= 1)
+            & (row <= self.distance)
+        )
+        index = (row - 1) * self.distance + (col - 1)
+        return np.where(valid, index, -1).astype(np.int64)
+
+    def view(self, distance: int) -> RotatedSurfaceLattice:
+        r"""
+        Return the lattice of a smaller or equal distance, cut from this one.
+
+        :param distance: Distance of the code, an odd number.
+        :raises ValueError: If the distance is even or larger than the one of this
+            lattice.
+        """
+
+        self._check_distance(distance)
+        if distance > self.distance:
+            raise ValueError(
+                f"Cannot view distance {distance} in a lattice of distance "
+                f"{self.distance}."
+            )
+
+        data = (self._data_coords <= distance).all(axis=1)
+        # The right boundary holds Z checks and the bottom boundary X checks
+        x_checks = (self._x_coords[:, 0] < distance) & (
+            self._x_coords[:, 1] < distance + 1
+        )
+        z_checks = (self._z_coords[:, 0] < distance + 1) & (
+            self._z_coords[:, 1] < distance
+        )
+
+        lattice = object.__new__(RotatedSurfaceLattice)
+        lattice._distance = distance
+        lattice._data_coords = self._data_coords[data]
+        lattice._x_coords = self._x_coords[x_checks]
+        lattice._z_coords = self._z_coords[z_checks]
+        lattice._x_edges = self._restrict_edges(self._x_edges, data, x_checks)
+        lattice._z_edges = self._restrict_edges(self._z_edges, data, z_checks)
+        return lattice
+
+    def add_to_graph(self, graph: nx.Graph) -> None:
+        r"""
+        Add the qubits and the weighted CNOT edges to the graph. Data qubits come
+        first, then the X and the Z check qubits.
+
+        :param graph: The graph of the code.
+        """
+
+        num_data, num_x = len(self._data_coords), len(self._x_coords)
+
+        graph.add_nodes_from(
+            (i, {"type": "data", "coords": tuple(coords)})
+            for i, coords in enumerate(self._data_coords.tolist())
+        )
+        graph.add_nodes_from(
+            (num_data + i, {"type": "X-check", "coords": tuple(coords)})
+            for i, coords in enumerate(self._x_coords.tolist())
+        )
+        graph.add_weighted_edges_from(
+            self._shift_checks(self._x_edges, num_data).tolist()
+        )
+        graph.add_nodes_from(
+            (num_data + num_x + i, {"type": "Z-check", "coords": tuple(coords)})
+            for i, coords in enumerate(self._z_coords.tolist())
+        )
+        graph.add_weighted_edges_from(
+            self._shift_checks(self._z_edges, num_data + num_x).tolist()
+        )
+
+    def _ordered_edges(
+        self, coords: np.ndarray, order: list[tuple[float, float]]
+    ) -> np.ndarray:
+        r"""
+        Return the (data, check, order) rows of the checks at the coordinates,
+        check by check and in CNOT order.
+        """
+
+        offsets = np.asarray(order)
+        neighbors = self.data_index(
+            coords[:, None, 0] + offsets[None, :, 0],
+            coords[:, None, 1] + offsets[None, :, 1],
+        )
+        checks = np.broadcast_to(np.arange(len(coords))[:, None], neighbors.shape)
+        orders = np.broadcast_to(np.arange(1, len(order) + 1), neighbors.shape)
+
+        edges = np.stack([neighbors, checks, orders], axis=-1).reshape(-1, 3)
+        return edges[edges[:, 0] >= 0]
+
+    @staticmethod
+    def _check_distance(distance: int) -> None:
+        r"""
+        Raise ValueError if the distance is even.
+        """
+        if distance % 2 == 0:
+            raise ValueError(
+                f"The rotated surface lattice needs an odd distance, not {distance}."
+            )
+
+    @staticmethod
+    def _restrict_edges(
+        edges: np.ndarray, data: np.ndarray, checks: np.ndarray
+    ) -> np.ndarray:
+        r"""
+        Return the edges between the kept qubits, reindexed.
+        """
+
+        kept = data[edges[:, 0]] & checks[edges[:, 1]]
+        data_index = np.cumsum(data) - 1
+        check_index = np.cumsum(checks) - 1
+        return np.stack(
+            [
+                data_index[edges[kept, 0]],
+                check_index[edges[kept, 1]],
+                edges[kept, 2],
+            ],
+            axis=1,
+        )
+
+    @staticmethod
+    def _shift_checks(edges: np.ndarray, offset: int) -> np.ndarray:
+        r"""
+        Return the edges with the check indices shifted to node ids.
+        """
+        shifted = edges.copy()
+        shifted[:, 1] += offset
+        return shifted
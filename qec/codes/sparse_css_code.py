@@ -0,0 +1,543 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import hashlib
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from stim import Circuit, CircuitRepeatBlock
+
+from qec.artifact_cache import ArtifactCache
+from qec.codes.base_code import BaseCode
+from qec.codes.code_spec import CodeSpec
+
+__all__ = ["SparseCSSCode"]
+
+
+def _to_csr(matrix: any) -> sparse.csr_matrix:
+    r"""
+    Return the binary parity-check matrix in canonical CSR form.
+    """
+    csr = sparse.csr_matrix(matrix, dtype=np.int64, copy=True)
+    csr.data %= 2
+    csr.eliminate_zeros()
+    csr.sort_indices()
+    return csr.astype(np.uint8)
+
+
+def _instruction(name: str, targets: np.ndarray) -> str:
+    r"""
+    Return the line of a Stim program applying the instruction to the targets.
+    """
+    return name + " " + " ".join(map(str, np.asarray(targets).tolist()))
+
+
+def _greedy_edge_coloring(matrix: sparse.csr_matrix) -> np.ndarray:
+    r"""
+    Return a color for each nonzero of the matrix, in CSR order, such that no row
+    and no column holds two nonzeros of the same color. Each check greedily takes
+    the smallest color free on both the check and the data qubit, which uses at
+    most twice the maximum degree of the Tanner graph.
+    """
+
+    colors = np.empty(matrix.nnz, dtype=np.int64)
+    # Bit c of the mask is set when the data qubit already has color c
+    qubit_masks = [0] * matrix.shape[1]
+
+    for row in range(matrix.shape[0]):
+        row_mask = 0
+        for k in range(matrix.indptr[row], matrix.indptr[row + 1]):
+            qubit = matrix.indices[k]
+            used = row_mask | qubit_masks[qubit]
+            color = (~used & (used + 1)).bit_length() - 1
+            colors[k] = color
+            row_mask |= 1 << color
+            qubit_masks[qubit] |= 1 << color
+
+    return colors
+
+
+def _check_coloring(matrix: sparse.csr_matrix, colors: np.ndarray) -> np.ndarray:
+    r"""
+    Return the colors as an array after checking they are a valid edge coloring.
+    """
+
+    colors = np.asarray(colors, dtype=np.int64)
+    if colors.shape != (matrix.nnz,) or (colors < 0).any():
+        raise ValueError("The schedule must hold one color per nonzero of the matrix.")
+
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    for qubits in [rows, matrix.indices]:
+        pairs = np.unique(np.stack([colors, qubits]), axis=1)
+        if pairs.shape[1] != matrix.nnz:
+            raise ValueError("A qubit is used twice in a layer of the schedule.")
+    return colors
+
+
+def _gf2_row_reduce(matrix: np.ndarray) -> tuple[np.ndarray, list[int]]:
+    r"""
+    Return the reduced row echelon form over GF(2) of a binary matrix, without its
+    zero rows, and its pivot columns.
+    """
+
+    reduced = matrix.astype(bool)
+    pivots = []
+    row = 0
+    for col in range(reduced.shape[1]):
+        if row == reduced.shape[0]:
+            break
+        candidates = np.flatnonzero(reduced[row:, col])
+        if len(candidates) == 0:
+            continue
+
+        pivot = row + candidates[0]
+        reduced[[row, pivot]] = reduced[[pivot, row]]
+        others = reduced[:, col].copy()
+        others[row] = False
+        reduced[others] ^= reduced[row]
+
+        pivots.append(col)
+        row += 1
+
+    return reduced[:row], pivots
+
+
+def _find_logical(
+    checks: sparse.csr_matrix, stabilizers: sparse.csr_matrix
+) -> np.ndarray:
+    r"""
+    Return the support of a logical operator, a vector of the kernel of checks
+    that is not in the row space of stabilizers. A logical Z operator is found
+    from hx and hz, a logical X operator from hz and hx.
+    """
+
+    num_qubits = checks.shape[1]
+
+    # Basis of the kernel of the checks, one vector per free column
+    reduced, pivots = _gf2_row_reduce(checks.toarray())
+    free = np.setdiff1d(np.arange(num_qubits), pivots)
+    kernel = np.zeros((len(free), num_qubits), dtype=bool)
+    kernel[np.arange(len(free)), free] = True
+    kernel[:, pivots] = reduced[:, free].T
+
+    s_reduced, s_pivots = _gf2_row_reduce(stabilizers.toarray())
+    for vector in kernel:
+        remainder = vector.copy()
+        for row, col in zip(s_reduced, s_pivots):
+            if remainder[col]:
+                remainder ^= row
+        if remainder.any():
+            return np.flatnonzero(vector)
+
+    raise ValueError("The code does not encode any logical qubit.")
+
+
+class SparseCSSCode(BaseCode):
+    r"""
+    A class for CSS codes defined by sparse X and Z parity-check matrices.
+
+    Data qubits are the columns of the matrices, followed by one check qubit per
+    row of hx and then per row of hz. The checks are measured with a Z phase of
+    CNOT layers followed by an X phase, each layer being a color of an edge
+    coloring of the Tanner graph. The memory circuit is generated from the CSR
+    structure in time linear in the number of nonzeros, with the body rounds
+    written once in a REPEAT block. The measurement record is therefore not
+    filled, and the Tanner graph is only built on first access of graph.
+
+    A code specification only holds the distance and the noise rates, which do
+    not determine the matrices, so accessing the spec of a sparse CSS code raises
+    ValueError. Its artifacts are cached under a digest of the matrices instead.
+    """
+
+    __slots__ = ("_hx", "_hz", "_x_schedule", "_z_schedule", "_digest")
+
+    def __init__(
+        self,
+        hx: any,
+        hz: any,
+        logical_z: list[int] | None = None,
+        logical_x: list[int] | None = None,
+        x_schedule: np.ndarray | None = None,
+        z_schedule: np.ndarray | None = None,
+        distance: int | None = None,
+        depolarize1_rate: float = 0,
+        depolarize2_rate: float = 0,
+        idle_rate: float = 0,
+        measurement_flip_rate: float = 0,
+        reset_flip_rate: float = 0,
+    ) -> None:
+        r"""
+        Initialize the Sparse CSS Code instance.
+
+        :param hx: The X parity-check matrix, any scipy sparse or dense binary
+            matrix with one row per X check.
+        :param hz: The Z parity-check matrix, with one row per Z check.
+        :param logical_z: The data qubits supporting the observed logical Z
+            operator. Default to one found by Gaussian elimination over GF(2),
+            which is cubic in the number of qubits.
+        :param logical_x: The data qubits supporting the logical X operator observed
+            by an X memory. Default to one found the same way on first use.
+        :param x_schedule: The CNOT layer of each nonzero of hx in CSR order.
+            Default to a greedy edge coloring.
+        :param z_schedule: The CNOT layer of each nonzero of hz in CSR order.
+            Default to a greedy edge coloring.
+        :param distance: The distance of the code, if known.
+        :param depolarize1_rate: Single qubit depolarization rate.
+        :param depolarize2_rate: Two qubit depolarization rate.
+        :param idle_rate: Depolarization rate of the qubits idle during a layer.
+        :param measurement_flip_rate: Probability of flipping a measurement result.
+        :param reset_flip_rate: Probability of resetting to the orthogonal state.
+        """
+
+        self._name = "Sparse CSS"
+        self._checks = ["Z-check", "X-check"]
+
+        self._hx = _to_csr(hx)
+        self._hz = _to_csr(hz)
+        if self._hx.shape[1] != self._hz.shape[1]:
+            raise ValueError("hx and hz must have one column per data qubit.")
+        if ((self._hx.astype(np.int64) @ self._hz.T).data % 2).any():
+            raise ValueError("The X and Z checks do not commute.")
+
+        self._x_schedule = (
+            _greedy_edge_coloring(self._hx)
+            if x_schedule is None
+            else _check_coloring(self._hx, x_schedule)
+        )
+        self._z_schedule = (
+            _greedy_edge_coloring(self._hz)
+            if z_schedule is None
+            else _check_coloring(self._hz, z_schedule)
+        )
+
+        if logical_z is None:
+            logical_z = _find_logical(self._hx, self._hz)
+        logical_z = np.unique(np.asarray(logical_z, dtype=np.int64))
+        support = np.zeros(self.num_data_qubits, dtype=np.int64)
+        support[logical_z] = 1
+        if (self._hx @ support % 2).any():
+            raise ValueError("logical_z does not commute with the X checks.")
+        self._logic_check = [int(q) for q in logical_z]
+
+        self._logic_x_check = None
+        if logical_x is not None:
+            logical_x = np.unique(np.asarray(logical_x, dtype=np.int64))
+            support = np.zeros(self.num_data_qubits, dtype=np.int64)
+            support[logical_x] = 1
+            if (self._hz @ support % 2).any():
+                raise ValueError("logical_x does not commute with the Z checks.")
+            self._logic_x_check = [int(q) for q in logical_x]
+
+        digest = hashlib.sha1()
+        for matrix in [self._hx, self._hz]:
+            digest.update(np.asarray(matrix.shape, dtype=np.int64).tobytes())
+            digest.update(matrix.indptr.astype(np.int64).tobytes())
+            digest.update(matrix.indices.astype(np.int64).tobytes())
+        for array in [self._x_schedule, self._z_schedule, logical_z]:
+            digest.update(array.tobytes())
+        if logical_x is not None:
+            digest.update(b"X" + logical_x.tobytes())
+        self._digest = digest.hexdigest()[:16]
+
+        super().__init__(
+            distance=distance,
+            depolarize1_rate=depolarize1_rate,
+            depolarize2_rate=depolarize2_rate,
+            idle_rate=idle_rate,
+            measurement_flip_rate=measurement_flip_rate,
+            reset_flip_rate=reset_flip_rate,
+        )
+
+    @property
+    def hx(self) -> sparse.csr_matrix:
+        r"""
+        The X parity-check matrix.
+        """
+        return self._hx
+
+    @property
+    def hz(self) -> sparse.csr_matrix:
+        r"""
+        The Z parity-check matrix.
+        """
+        return self._hz
+
+    @property
+    def x_schedule(self) -> np.ndarray:
+        r"""
+        The CNOT layer of each nonzero of hx in CSR order.
+        """
+        return self._x_schedule
+
+    @property
+    def z_schedule(self) -> np.ndarray:
+        r"""
+        The CNOT layer of each nonzero of hz in CSR order.
+        """
+        return self._z_schedule
+
+    @property
+    def num_data_qubits(self) -> int:
+        r"""
+        The number of data qubits.
+        """
+        return self._hx.shape[1]
+
+    @property
+    def logic_x_check(self) -> list[int]:
+        r"""
+        The data qubits supporting the logical X operator observed by an X memory,
+        found on first access unless given.
+        """
+        if self._logic_x_check is None:
+            self._logic_x_check = [int(q) for q in _find_logical(self._hz, self._hx)]
+        return self._logic_x_check
+
+    @property
+    def spec(self) -> CodeSpec:
+        r"""
+        Raise ValueError, the matrices of the code do not fit in a specification.
+        """
+        raise ValueError(
+            "A SparseCSSCode has no CodeSpec, its parity-check matrices cannot be "
+            "rebuilt from the distance and the noise rates."
+        )
+
+    def _basis_cache_key(self, basis: str) -> str:
+        r"""
+        Return the key of the memory circuit artifacts of a basis, which includes a
+        digest of the matrices and schedules.
+        """
+        return ArtifactCache.key(
+            code=f"{type(self).__name__}-{self._digest}",
+            distance=self.distance,
+            number_of_rounds=self.number_of_rounds,
+            depolarize1_rate=self.depolarize1_rate,
+            depolarize2_rate=self.depolarize2_rate,
+            basis=basis,
+            idle_rate=self.idle_rate,
+            measurement_flip_rate=self.measurement_flip_rate,
+            reset_flip_rate=self.reset_flip_rate,
+        )
+
+    def _rebuild_measurement(self, number_of_rounds: int) -> None:
+        r"""
+        The measurement record is never filled, cached circuits included.
+        """
+
+    def qubit_counts(self) -> dict[str, int]:
+        r"""
+        Return the number of data qubits, of check qubits of each type, and of
+        CNOTs in a round of stabilizer measurements, read from the matrices.
+        """
+        return {
+            "data": self.num_data_qubits,
+            "Z-check": self._hz.shape[0],
+            "X-check": self._hx.shape[0],
+            "CNOT": self._hx.nnz + self._hz.nnz,
+        }
+
+    @property
+    def graph(self) -> nx.Graph:
+        r"""
+        The Tanner graph, where the weight of an edge is its CNOT layer.
+        """
+        if self._graph.number_of_nodes() == 0:
+            self._build_tanner_graph()
+        return self._graph
+
+    def build_graph(self) -> None:
+        r"""
+        The Tanner graph is built on first access of graph, the memory circuit is
+        generated from the parity-check matrices directly.
+        """
+
+    def build_memory_circuits(
+        self,
+        number_of_rounds: int,
+        bases: list[str] = ("Z", "X"),
+        cache: ArtifactCache | None = None,
+    ) -> dict[str, Circuit]:
+        r"""
+        Build the memory circuits of several bases in one pass and return them by
+        basis, the stabilizer rounds being written once for all of them. See
+        :meth:`BaseCode.build_memory_circuits`.
+
+        :param number_of_rounds: The number of rounds in the memory.
+        :param bases: The bases of the memories, "Z" or "X".
+        :param cache: The cache of the compiled artifacts.
+        """
+
+        bases = self._start_memory(number_of_rounds=number_of_rounds, bases=bases)
+        circuits = self._get_cached_circuits(bases=bases, cache=cache)
+        if circuits is not None:
+            return circuits
+
+        num_data = self.num_data_qubits
+        num_x, num_z = self._hx.shape[0], self._hz.shape[0]
+        num_checks = num_x + num_z
+        data_qubits = np.arange(num_data)
+        check_qubits = np.arange(num_data, num_data + num_checks)
+        all_qubits = np.arange(num_data + num_checks)
+
+        # The program is written as text, much faster than appending target lists,
+        # and the noise is added once to the rounds shared by the bases
+        first_round = self._noisy_program(self._stab_round_program())
+
+        # Body rounds, identical up to the measurement offsets
+        body_rounds = Circuit()
+        if number_of_rounds > 1:
+            body = self._stab_round_program()
+            body += [
+                f"DETECTOR rec[{i - num_checks}] rec[{i - 2 * num_checks}]"
+                for i in range(num_checks)
+            ]
+            body_rounds.append(
+                CircuitRepeatBlock(number_of_rounds - 1, self._noisy_program(body))
+            )
+
+        circuits = {}
+        for basis in bases:
+
+            # Z checks are measured first in each round
+            if basis == "Z":
+                matrix, first_check, logical = self._hz, 0, self.logic_check
+                initialization = [_instruction("R", all_qubits)]
+            else:
+                matrix, first_check, logical = self._hx, num_z, self.logic_x_check
+                initialization = [
+                    _instruction("RX", data_qubits),
+                    _instruction("R", check_qubits),
+                ]
+
+            # Initialization
+            circuit = self._noisy_program(initialization) + first_round
+            circuit += Circuit(
+                "\n".join(
+                    f"DETECTOR rec[{first_check + i - num_checks}]"
+                    for i in range(matrix.shape[0])
+                )
+            )
+            circuit += body_rounds
+
+            # Finalization
+            program = ["TICK", _instruction("M" if basis == "Z" else "MX", data_qubits)]
+
+            indptr, indices = matrix.indptr, matrix.indices
+            for i in range(matrix.shape[0]):
+                recs = (indices[indptr[i] : indptr[i + 1]] - num_data).tolist()
+                recs.append(first_check + i - num_checks - num_data)
+                program.append("DETECTOR " + " ".join(f"rec[{r}]" for r in recs))
+
+            recs = " ".join(f"rec[{q - num_data}]" for q in logical)
+            program.append(f"OBSERVABLE_INCLUDE(0) {recs}")
+
+            circuits[basis] = circuit + self._noisy_program(program)
+
+        self._set_memory_circuits(circuits=circuits, cache=cache)
+        return circuits
+
+    def _cnot_layers(self, check: str) -> list[np.ndarray]:
+        r"""
+        Return the CNOT targets of each layer of a check type, as flat arrays of
+        (control, target) pairs.
+        """
+
+        num_data = self.num_data_qubits
+        if check == "Z-check":
+            matrix, colors = self._hz, self._z_schedule
+            offset = num_data + self._hx.shape[0]
+        else:
+            matrix, colors, offset = self._hx, self._x_schedule, num_data
+
+        checks = offset + np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        data = matrix.indices.astype(np.int64)
+
+        order = np.argsort(colors, kind="stable")
+        bounds = np.cumsum(np.bincount(colors))[:-1] if len(colors) else []
+
+        layers = []
+        for layer in np.split(order, bounds):
+            if len(layer) == 0:
+                continue
+            if check == "Z-check":
+                pairs = np.stack([data[layer], checks[layer]], axis=1)
+            else:
+                pairs = np.stack([checks[layer], data[layer]], axis=1)
+            layers.append(pairs.ravel())
+        return layers
+
+    def _noisy_program(self, program: list[str]) -> Circuit:
+        r"""
+        Return the circuit of a noiseless program with the noise model added to its
+        layers, every qubit idling when not acted on.
+        """
+        num_qubits = self.num_data_qubits + self._hx.shape[0] + self._hz.shape[0]
+        return self.noise_model.apply(
+            circuit=Circuit("\n".join(program)), qubits=range(num_qubits)
+        )
+
+    def _stab_round_program(self) -> list[str]:
+        r"""
+        Return the noiseless program of one round of stabilizer measurements, each
+        layer starting with a TICK as in :meth:`BaseCode.append_stab_circuit`.
+        """
+
+        num_data = self.num_data_qubits
+        num_x, num_z = self._hx.shape[0], self._hz.shape[0]
+        x_qubits = num_data + np.arange(num_x)
+        z_qubits = num_data + num_x + np.arange(num_z)
+        check_qubits = np.concatenate([z_qubits, x_qubits])
+
+        program = []
+        if num_x:
+            program += ["TICK", _instruction("H", x_qubits)]
+
+        for check in self._checks:
+            for targets in self._cnot_layers(check):
+                program += ["TICK", _instruction("CNOT", targets)]
+
+        if num_x:
+            program += ["TICK", _instruction("H", x_qubits)]
+
+        program += ["TICK", _instruction("MR", check_qubits)]
+        return program
+
+    def _build_tanner_graph(self) -> None:
+        r"""
+        Add the qubits and the CNOTs of the schedule to the graph.
+        """
+
+        num_data = self.num_data_qubits
+        num_x = self._hx.shape[0]
+
+        self._graph.add_nodes_from(range(num_data), type="data")
+        self._graph.add_nodes_from(range(num_data, num_data + num_x), type="X-check")
+        self._graph.add_nodes_from(
+            range(num_data + num_x, num_data + num_x + self._hz.shape[0]),
+            type="Z-check",
+        )
+
+        for matrix, colors, offset in [
+            (self._hx, self._x_schedule, num_data),
+            (self._hz, self._z_schedule, num_data + num_x),
+        ]:
+            rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+            self._graph.add_weighted_edges_from(
+                zip(
+                    matrix.indices.tolist(),
+                    (rows + offset).tolist(),
+                    (colors + 1).tolist(),
+                )
+            )
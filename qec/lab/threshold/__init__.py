@@ -1 +1,7 @@
 from .threshold_lab import ThresholdLAB  # noqa
+from .threshold_fit import fit_threshold, fit_suppression_factor  # noqa
+from .progress import ProgressTracker  # noqa
+from .budget import allocate_shots  # noqa
+from .shared_pipeline import SyndromeRingBuffer, compute_logical_errors_shared  # noqa
+from .syndrome_dataset import SyndromeDataset  # noqa
+from .work_queue import WorkQueue  # noqa
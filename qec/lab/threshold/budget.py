@@ -0,0 +1,108 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import math
+
+__all__ = ["allocate_shots"]
+
+
+def allocate_shots(
+    points: dict[tuple[int, float], tuple[int, int, float]],
+    precision: float,
+    max_points: int,
+    min_shots: int,
+    max_shots: int,
+    shot_budget: float = math.inf,
+    seconds_budget: float = math.inf,
+    task_costs: dict[tuple[int, float], tuple[float, float]] | None = None,
+) -> dict[tuple[int, float], int]:
+    r"""
+    Return the number of shots to sample next at each (distance, error rate)
+    point, for one round of a budgeted sweep.
+
+    Points never sampled get min_shots first. The other points are ranked by the
+    decrease of the relative variance of their logical error rate per second of
+    sampling, which is (1 - p) / (n k) divided by the measured seconds per shot
+    for n shots and k errors. Each of the max_points best points gets the shots
+    expected to reach the target precision, within [min_shots, max_shots] and
+    what is left of the budgets. Points already within the target precision and
+    points without any error get nothing.
+
+    A task is charged to seconds_budget its fixed seconds plus its shots times
+    its seconds per shot, as given in task_costs. A point whose fixed seconds
+    exceed the seconds left is skipped for the next one. Without task_costs, a task has
+    no fixed seconds and the seconds per shot measured in points. A point never
+    sampled then costs nothing.
+
+    :param points: The (shots, errors, seconds) of each point, seconds being the
+        time spent sampling and decoding its shots.
+    :param precision: The target relative standard error of the logical error rate.
+    :param max_points: The maximum number of points sampled in the round.
+    :param min_shots: The minimum number of shots given to a point.
+    :param max_shots: The maximum number of shots given to a point.
+    :param shot_budget: The number of shots left.
+    :param seconds_budget: The sampling time in seconds left.
+    :param task_costs: The fixed seconds and the seconds per shot of a task at
+        each point. The fixed seconds are spent before sampling, for instance
+        building the circuit, the detector error model and the matcher.
+    """
+
+    if task_costs is None:
+        task_costs = {}
+
+    unsampled = []
+    ranked = []
+    for point, (shots, errors, seconds) in points.items():
+        if shots == 0:
+            unsampled.append(point)
+            continue
+        if errors == 0:
+            continue
+
+        rate = errors / shots
+        relative_variance = (1 - rate) / errors
+        if relative_variance <= precision**2:
+            continue
+
+        seconds_per_shot = max(seconds / shots, 1e-12)
+        score = relative_variance / shots / seconds_per_shot
+        needed = math.ceil(shots * (relative_variance / precision**2 - 1))
+        ranked.append(
+            (score, point, min(max(needed, min_shots), max_shots), seconds_per_shot)
+        )
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    candidates = [(point, min_shots, 0.0) for point in unsampled] + [
+        (point, shots, seconds_per_shot) for _, point, shots, seconds_per_shot in ranked
+    ]
+
+    allocation = {}
+    for point, shots, seconds_per_shot in candidates:
+        if len(allocation) == max_points:
+            break
+
+        # A point too costly for the seconds left leaves them to the next ones
+        fixed_seconds, seconds_per_shot = task_costs.get(point, (0.0, seconds_per_shot))
+        if fixed_seconds >= seconds_budget:
+            continue
+        if seconds_per_shot > 0:
+            shots = min(shots, (seconds_budget - fixed_seconds) / seconds_per_shot)
+        shots = int(min(shots, shot_budget))
+        if shots < 1:
+            continue
+
+        allocation[point] = shots
+        shot_budget -= shots
+        seconds_budget -= fixed_seconds + shots * seconds_per_shot
+
+    return allocation
@@ -0,0 +1,273 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from collections.abc import Callable
+import math
+import time
+
+__all__ = ["ProgressTracker"]
+
+
+class ProgressTracker:
+    r"""
+    A class for tracking the progress of a sweep and reporting it to a callback.
+
+    The tracker is updated once per sampled batch and calls the callback at most
+    once per interval, so that it can stay enabled on long runs. Several tasks
+    can run at once, each batch being added to its (distance, error rate) task.
+    The shots a task does not sample, as when it stops on its error budget, are
+    removed from the total when it finishes, so that the estimated time to
+    completion converges.
+
+    The throughput of the sweep and of each task is an exponentially weighted
+    average over the last rate_seconds, so that the estimated times follow the
+    current rate rather than the average since the start.
+    """
+
+    __slots__ = (
+        "_callback",
+        "_interval",
+        "_rate_seconds",
+        "_total_tasks",
+        "_total_shots",
+        "_completed_tasks",
+        "_shots_done",
+        "_errors",
+        "_start_time",
+        "_last_report_time",
+        "_last_update_time",
+        "_shots_per_second",
+        "_distance",
+        "_error_rate",
+        "_tasks",
+    )
+
+    def __init__(
+        self,
+        callback: Callable[[dict], None],
+        total_tasks: int,
+        total_shots: int,
+        interval: float = 1.0,
+        rate_seconds: float = 10.0,
+    ) -> None:
+        r"""
+        Initialization of the Progress Tracker class.
+
+        :param callback: The function called with the progress record.
+        :param total_tasks: The number of (distance, error rate) tasks of the sweep.
+        :param total_shots: The number of shots of the sweep.
+        :param interval: The minimum time in seconds between two reports.
+        :param rate_seconds: The time constant in seconds of the weighted average
+            of the shots per second.
+        """
+
+        self._callback = callback
+        self._interval = interval
+        self._rate_seconds = rate_seconds
+        self._total_tasks = total_tasks
+        self._total_shots = total_shots
+        self._completed_tasks = 0
+        self._shots_done = 0
+        self._errors = 0
+        self._start_time = time.monotonic()
+        self._last_report_time = None
+        self._last_update_time = self._start_time
+        self._shots_per_second = None
+        self._distance = None
+        self._error_rate = None
+        # The shots, errors, planned shots, rate and last update time of each
+        # running task
+        self._tasks = {}
+
+    @property
+    def record(self) -> dict:
+        r"""
+        The current progress, with the throughput in shots per second and the
+        estimated time to completion in seconds. The tasks entry holds, for each
+        running task, its shots and errors, its remaining_shots and its own
+        throughput and estimated time to completion. The task_shots and
+        task_errors are those of the last updated task.
+        """
+
+        elapsed = time.monotonic() - self._start_time
+        shots_to_go = max(self._total_shots - self._shots_done, 0)
+
+        tasks = []
+        for (distance, error_rate), task in self._tasks.items():
+            remaining = (
+                None
+                if task["total_shots"] is None
+                else max(task["total_shots"] - task["shots"], 0)
+            )
+            tasks.append(
+                {
+                    "distance": distance,
+                    "error_rate": error_rate,
+                    "shots": task["shots"],
+                    "errors": task["errors"],
+                    "remaining_shots": remaining,
+                    "shots_per_second": task["shots_per_second"],
+                    "eta_seconds": _eta(remaining, task["shots_per_second"]),
+                }
+            )
+        current = self._tasks.get((self._distance, self._error_rate), {})
+
+        return {
+            "completed_tasks": self._completed_tasks,
+            "total_tasks": self._total_tasks,
+            "shots_done": self._shots_done,
+            "shots_to_go": shots_to_go,
+            "errors": self._errors,
+            "distance": self._distance,
+            "error_rate": self._error_rate,
+            "task_shots": current.get("shots", 0),
+            "task_errors": current.get("errors", 0),
+            "elapsed_seconds": elapsed,
+            "shots_per_second": self._shots_per_second or 0.0,
+            "eta_seconds": _eta(shots_to_go, self._shots_per_second),
+            "tasks": tasks,
+        }
+
+    @property
+    def running_tasks(self) -> list[tuple[int, float]]:
+        r"""
+        The (distance, error rate) of the tasks started and not finished.
+        """
+        return list(self._tasks)
+
+    def start_task(
+        self, distance: int, error_rate: float, num_shots: int | None = None
+    ) -> None:
+        r"""
+        Start tracking a new (distance, error rate) task.
+
+        :param distance: The distance of the code.
+        :param error_rate: The physical error rate.
+        :param num_shots: The number of shots planned for the task, counted in the
+            total shots of the sweep.
+        """
+        self._distance = distance
+        self._error_rate = error_rate
+        self._tasks[distance, error_rate] = {
+            "shots": 0,
+            "errors": 0,
+            "total_shots": num_shots,
+            "shots_per_second": None,
+            "last_update_time": time.monotonic(),
+        }
+
+    def update(
+        self,
+        shots: int,
+        errors: int,
+        report: bool = True,
+        distance: int | None = None,
+        error_rate: float | None = None,
+    ) -> None:
+        r"""
+        Add a sampled batch to the progress.
+
+        :param shots: The number of shots of the batch.
+        :param errors: The number of logical errors of the batch.
+        :param report: Report the progress, subject to the interval.
+        :param distance: The distance of the task of the batch. Default to the
+            last started or updated task.
+        :param error_rate: The physical error rate of the task of the batch.
+        """
+
+        if distance is not None:
+            self._distance, self._error_rate = distance, error_rate
+        now = time.monotonic()
+
+        self._shots_done += shots
+        self._errors += errors
+        self._shots_per_second = self._weighted_rate(
+            self._shots_per_second, shots, now - self._last_update_time
+        )
+        self._last_update_time = now
+
+        task = self._tasks.get((self._distance, self._error_rate))
+        if task is not None:
+            task["shots"] += shots
+            task["errors"] += errors
+            task["shots_per_second"] = self._weighted_rate(
+                task["shots_per_second"], shots, now - task["last_update_time"]
+            )
+            task["last_update_time"] = now
+
+        if report:
+            self.report()
+
+    def finish_task(
+        self, distance: int | None = None, error_rate: float | None = None
+    ) -> None:
+        r"""
+        Mark a task as completed, removing the planned shots it did not sample from
+        the total. The last task is always reported.
+
+        :param distance: The distance of the task. Default to the last started or
+            updated task.
+        :param error_rate: The physical error rate of the task.
+        """
+
+        if distance is None:
+            distance, error_rate = self._distance, self._error_rate
+        task = self._tasks.pop((distance, error_rate), None)
+        if task is not None and task["total_shots"] is not None:
+            self._total_shots -= max(task["total_shots"] - task["shots"], 0)
+        self._completed_tasks += 1
+        self.report(force=self._completed_tasks >= self._total_tasks)
+
+    def report(self, force: bool = False) -> None:
+        r"""
+        Call the callback if the interval elapsed since the previous report.
+
+        :param force: Report regardless of the interval.
+        """
+
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_report_time is not None
+            and now - self._last_report_time < self._interval
+        ):
+            return
+
+        self._last_report_time = now
+        self._callback(self.record)
+
+    def _weighted_rate(
+        self, rate: float | None, shots: int, seconds: float
+    ) -> float | None:
+        r"""
+        Return the rate averaged with the one of shots sampled over seconds, each
+        weighted by how much of rate_seconds the seconds cover.
+        """
+        seconds = max(seconds, 1e-9)
+        if rate is None:
+            return shots / seconds
+        weight = 1 - math.exp(-seconds / self._rate_seconds)
+        return weight * shots / seconds + (1 - weight) * rate
+
+
+def _eta(shots: int | None, shots_per_second: float | None) -> float | None:
+    r"""
+    Return the seconds to sample the shots, or None if unknown.
+    """
+    if shots is None:
+        return None
+    if shots == 0:
+        return 0.0
+    if not shots_per_second:
+        return None
+    return shots / shots_per_second
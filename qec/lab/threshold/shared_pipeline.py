@@ -0,0 +1,376 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import queue
+
+import numpy as np
+
+from qec.artifact_cache import ArtifactCache
+from qec.codes.code_spec import CodeSpec
+
+__all__ = ["SyndromeRingBuffer", "compute_logical_errors_shared"]
+
+# Interval in seconds at which blocked processes check that the others are alive
+POLL_SECONDS = 0.1
+
+
+class SyndromeRingBuffer:
+    r"""
+    A class for a ring of bit-packed syndrome batches in shared memory.
+
+    Each slot holds up to slot_shots shots of bit-packed detection events followed
+    by their bit-packed observable flips. Processes exchange only the slot indices
+    and the number of shots, and read the batches in place.
+    """
+
+    __slots__ = (
+        "_memory",
+        "_num_slots",
+        "_slot_shots",
+        "_num_detectors",
+        "_num_observables",
+        "_owner",
+    )
+
+    def __init__(
+        self,
+        num_slots: int,
+        slot_shots: int,
+        num_detectors: int,
+        num_observables: int,
+        name: str | None = None,
+    ) -> None:
+        r"""
+        Initialization of the Syndrome Ring Buffer class. The shared memory is
+        created if no name is given, otherwise the existing one is attached.
+
+        :param num_slots: The number of batches held at once.
+        :param slot_shots: The maximum number of shots of a batch.
+        :param num_detectors: The number of detectors of the memory circuit.
+        :param num_observables: The number of observables of the memory circuit.
+        :param name: The name of the shared memory to attach.
+        """
+
+        self._num_slots = num_slots
+        self._slot_shots = slot_shots
+        self._num_detectors = num_detectors
+        self._num_observables = num_observables
+        self._owner = name is None
+
+        if self._owner:
+            self._memory = SharedMemory(create=True, size=max(self.nbytes, 1))
+        else:
+            self._memory = SharedMemory(name=name)
+
+    def __reduce__(self) -> tuple:
+        # Other processes attach to the same memory instead of owning a copy
+        return (self.__class__, self.attach_args)
+
+    @property
+    def attach_args(self) -> tuple:
+        r"""
+        The arguments attaching another buffer to the same shared memory.
+        """
+        return (
+            self.num_slots,
+            self.slot_shots,
+            self._num_detectors,
+            self._num_observables,
+            self.name,
+        )
+
+    @property
+    def name(self) -> str:
+        r"""
+        The name of the shared memory.
+        """
+        return self._memory.name
+
+    @property
+    def num_slots(self) -> int:
+        r"""
+        The number of batches held at once.
+        """
+        return self._num_slots
+
+    @property
+    def slot_shots(self) -> int:
+        r"""
+        The maximum number of shots of a batch.
+        """
+        return self._slot_shots
+
+    @property
+    def detector_bytes(self) -> int:
+        r"""
+        The size in bytes of the bit-packed detection events of a shot.
+        """
+        return (self._num_detectors + 7) // 8
+
+    @property
+    def observable_bytes(self) -> int:
+        r"""
+        The size in bytes of the bit-packed observable flips of a shot.
+        """
+        return (self._num_observables + 7) // 8
+
+    @property
+    def slot_bytes(self) -> int:
+        r"""
+        The size in bytes of a slot.
+        """
+        return self.slot_shots * (self.detector_bytes + self.observable_bytes)
+
+    @property
+    def nbytes(self) -> int:
+        r"""
+        The size in bytes of the ring.
+        """
+        return self.num_slots * self.slot_bytes
+
+    def views(self, slot: int, shots: int) -> tuple[np.ndarray, np.ndarray]:
+        r"""
+        Return the detection events and observable flips arrays of a slot. The
+        arrays are views on the shared memory, nothing is copied.
+
+        :param slot: The index of the slot.
+        :param shots: The number of shots in the batch.
+        """
+
+        offset = slot * self.slot_bytes
+        detection_events = np.ndarray(
+            (shots, self.detector_bytes),
+            dtype=np.uint8,
+            buffer=self._memory.buf,
+            offset=offset,
+        )
+        observable_flips = np.ndarray(
+            (shots, self.observable_bytes),
+            dtype=np.uint8,
+            buffer=self._memory.buf,
+            offset=offset + self.slot_shots * self.detector_bytes,
+        )
+        return detection_events, observable_flips
+
+    def close(self) -> None:
+        r"""
+        Detach from the shared memory, and free it if this buffer created it.
+        """
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+def _get(messages: multiprocessing.Queue) -> any:
+    r"""
+    Return the next message of the queue, waiting for it only as long as the
+    parent process is alive.
+    """
+    while True:
+        try:
+            return messages.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            if not multiprocessing.parent_process().is_alive():
+                raise RuntimeError("The parent process exited.")
+
+
+def _check_processes(processes: list[multiprocessing.Process]) -> None:
+    r"""
+    Raise if one of the processes exited with an error, killed included.
+    """
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise RuntimeError(
+                f"A {process.name} process failed with exit code {process.exitcode}."
+            )
+
+
+def _sampler_process(
+    spec: CodeSpec,
+    ring_args: tuple,
+    batches: list[int],
+    free_slots: multiprocessing.Queue,
+    filled_slots: multiprocessing.Queue,
+    cache: ArtifactCache | None,
+) -> None:
+    r"""
+    Sample the batches of the memory circuit into free slots of the ring.
+    """
+
+    ring = SyndromeRingBuffer(*ring_args)
+    circuit = spec.build(cache=cache).memory_circuit
+    sampler = circuit.compile_detector_sampler()
+
+    for shots in batches:
+        slot = _get(free_slots)
+        detection_events, observable_flips = ring.views(slot=slot, shots=shots)
+        detection_events[:], observable_flips[:] = sampler.sample(
+            shots, separate_observables=True, bit_packed=True
+        )
+        filled_slots.put((slot, shots))
+
+    ring.close()
+
+
+def _decoder_process(
+    spec: CodeSpec,
+    ring_args: tuple,
+    free_slots: multiprocessing.Queue,
+    filled_slots: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    cache: ArtifactCache | None,
+) -> None:
+    r"""
+    Decode the filled slots of the ring in place until a None message is received,
+    then report the number of errors.
+    """
+
+    # Imported here, PyMatching pulls in matplotlib at import time
+    import pymatching
+
+    ring = SyndromeRingBuffer(*ring_args)
+    code = spec.build(cache=cache)
+    matcher = pymatching.Matching.from_detector_error_model(
+        code.detector_error_model(cache=cache)
+    )
+
+    num_errors = 0
+    while (message := _get(filled_slots)) is not None:
+        slot, shots = message
+        detection_events, observable_flips = ring.views(slot=slot, shots=shots)
+        predictions = matcher.decode_batch(
+            detection_events, bit_packed_shots=True, bit_packed_predictions=True
+        )
+        num_errors += int(np.any(predictions != observable_flips, axis=1).sum())
+        free_slots.put(slot)
+
+    results.put(num_errors)
+    ring.close()
+
+
+def compute_logical_errors_shared(
+    spec: CodeSpec,
+    num_shots: int,
+    num_samplers: int = 1,
+    num_decoders: int = 1,
+    batch_size: int = 10**4,
+    num_slots: int | None = None,
+    cache: ArtifactCache | None = None,
+) -> int:
+    r"""
+    Sample and decode the memory experiment in separate processes and return the
+    number of errors.
+
+    Sampler processes write bit-packed batches into a ring of shared memory slots
+    and decoder processes decode them in place, so the syndromes are never pickled.
+    The processes rebuild the circuit from the specification, pass a cache with a
+    directory to generate it only once. If a process fails or is killed, the others
+    are terminated and a RuntimeError is raised instead of waiting forever.
+
+    :param spec: The specification of the memory experiment.
+    :param num_shots: The number of samples.
+    :param num_samplers: The number of sampler processes.
+    :param num_decoders: The number of decoder processes.
+    :param batch_size: The number of shots of a batch.
+    :param num_slots: The number of batches held at once. Default to two per
+        process.
+    :param cache: The cache of the compiled artifacts.
+    """
+
+    circuit = spec.build(cache=cache).memory_circuit
+    if num_slots is None:
+        num_slots = 2 * (num_samplers + num_decoders)
+
+    ring = SyndromeRingBuffer(
+        num_slots=num_slots,
+        slot_shots=batch_size,
+        num_detectors=circuit.num_detectors,
+        num_observables=circuit.num_observables,
+    )
+
+    batches = [batch_size] * (num_shots // batch_size)
+    if num_shots % batch_size:
+        batches.append(num_shots % batch_size)
+
+    context = multiprocessing.get_context()
+    free_slots = context.Queue()
+    filled_slots = context.Queue()
+    results = context.Queue()
+    for slot in range(num_slots):
+        free_slots.put(slot)
+
+    samplers = [
+        context.Process(
+            target=_sampler_process,
+            name="sampler",
+            args=(
+                spec,
+                ring.attach_args,
+                batches[i::num_samplers],
+                free_slots,
+                filled_slots,
+                cache,
+            ),
+        )
+        for i in range(num_samplers)
+    ]
+    decoders = [
+        context.Process(
+            target=_decoder_process,
+            name="decoder",
+            args=(spec, ring.attach_args, free_slots, filled_slots, results, cache),
+        )
+        for _ in range(num_decoders)
+    ]
+
+    try:
+        for process in samplers + decoders:
+            process.start()
+
+        # The samplers wait for free slots, which a failed decoder never frees
+        for process in samplers:
+            while process.is_alive():
+                _check_processes(samplers + decoders)
+                process.join(timeout=POLL_SECONDS)
+        _check_processes(samplers + decoders)
+
+        for _ in decoders:
+            filled_slots.put(None)
+
+        num_errors = 0
+        for _ in decoders:
+            while True:
+                # A decoder that exited has flushed its result into the queue
+                alive = any(process.is_alive() for process in decoders)
+                try:
+                    num_errors += results.get(timeout=POLL_SECONDS)
+                    break
+                except queue.Empty:
+                    _check_processes(decoders)
+                    if not alive:
+                        raise RuntimeError("A decoder process exited without result.")
+
+        for process in decoders:
+            process.join()
+    finally:
+        for process in samplers + decoders:
+            if process.is_alive():
+                process.terminate()
+        for process in samplers + decoders:
+            if process.pid is not None:
+                process.join()
+        ring.close()
+
+    return num_errors
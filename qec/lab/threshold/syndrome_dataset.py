@@ -0,0 +1,210 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import json
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+from stim import Circuit
+
+if TYPE_CHECKING:
+    import pymatching
+
+__all__ = ["SyndromeDataset"]
+
+
+class SyndromeDataset:
+    r"""
+    A class for recorded syndromes of a memory experiment.
+
+    A dataset is a directory holding the circuit, the detection events and the
+    observable flips as bit-packed Stim ``b8`` files, and a small JSON metadata
+    file describing their layout. The syndromes are read through memory maps, so
+    decoders can be compared on the same samples without loading them in RAM.
+    """
+
+    __slots__ = ("_directory", "_metadata")
+
+    CIRCUIT_FILE = "circuit.stim"
+    DETECTORS_FILE = "detectors.b8"
+    OBSERVABLES_FILE = "observables.b8"
+    METADATA_FILE = "metadata.json"
+
+    # Keys of the metadata describing the files, which user metadata cannot use
+    LAYOUT_KEYS = ("format", "num_shots", "num_detectors", "num_observables", "seed")
+
+    def __init__(self, directory: str) -> None:
+        r"""
+        Initialization of the Syndrome Dataset class from an existing directory.
+
+        :param directory: The directory of the dataset.
+        """
+
+        self._directory = directory
+        with open(os.path.join(directory, self.METADATA_FILE)) as f:
+            self._metadata = json.load(f)
+
+    @classmethod
+    def record(
+        cls,
+        directory: str,
+        circuit: Circuit,
+        num_shots: int,
+        metadata: dict | None = None,
+        seed: int | None = None,
+    ) -> SyndromeDataset:
+        r"""
+        Sample the circuit straight to disk and return the dataset.
+
+        :param directory: The directory of the dataset, created if needed.
+        :param circuit: The memory circuit.
+        :param num_shots: The number of samples.
+        :param metadata: Additional information stored with the dataset, without
+            the LAYOUT_KEYS.
+        :param seed: The seed of the sampler.
+        """
+
+        collisions = sorted(set(metadata or {}) & set(cls.LAYOUT_KEYS))
+        if collisions:
+            raise ValueError(
+                f"The metadata cannot set the layout keys {', '.join(collisions)}."
+            )
+
+        os.makedirs(directory, exist_ok=True)
+        circuit.to_file(os.path.join(directory, cls.CIRCUIT_FILE))
+
+        sampler = circuit.compile_detector_sampler(seed=seed)
+        sampler.sample_write(
+            num_shots,
+            filepath=os.path.join(directory, cls.DETECTORS_FILE),
+            format="b8",
+            obs_out_filepath=os.path.join(directory, cls.OBSERVABLES_FILE),
+            obs_out_format="b8",
+        )
+
+        header = {
+            "format": "b8",
+            "num_shots": num_shots,
+            "num_detectors": circuit.num_detectors,
+            "num_observables": circuit.num_observables,
+            "seed": seed,
+            **(metadata or {}),
+        }
+        with open(os.path.join(directory, cls.METADATA_FILE), "w") as f:
+            json.dump(header, f, indent=2)
+
+        return cls(directory)
+
+    @property
+    def directory(self) -> str:
+        r"""
+        The directory of the dataset.
+        """
+        return self._directory
+
+    @property
+    def metadata(self) -> dict:
+        r"""
+        The metadata of the dataset.
+        """
+        return self._metadata
+
+    @property
+    def num_shots(self) -> int:
+        r"""
+        The number of recorded shots.
+        """
+        return self.metadata["num_shots"]
+
+    @property
+    def num_detectors(self) -> int:
+        r"""
+        The number of detectors per shot.
+        """
+        return self.metadata["num_detectors"]
+
+    @property
+    def num_observables(self) -> int:
+        r"""
+        The number of observables per shot.
+        """
+        return self.metadata["num_observables"]
+
+    @property
+    def circuit(self) -> Circuit:
+        r"""
+        The memory circuit the syndromes were sampled from.
+        """
+        return Circuit.from_file(os.path.join(self.directory, self.CIRCUIT_FILE))
+
+    @property
+    def detection_events(self) -> np.memmap:
+        r"""
+        The bit-packed detection events, a read-only memory map of one row per shot.
+        """
+        return self._memmap(self.DETECTORS_FILE, self.num_detectors)
+
+    @property
+    def observable_flips(self) -> np.memmap:
+        r"""
+        The bit-packed observable flips, a read-only memory map of one row per shot.
+        """
+        return self._memmap(self.OBSERVABLES_FILE, self.num_observables)
+
+    def replay(
+        self, matcher: pymatching.Matching | None = None, chunk_size: int = 10**4
+    ) -> int:
+        r"""
+        Decode the recorded syndromes chunk by chunk and return the number of
+        errors.
+
+        :param matcher: The decoder. Default to a matcher built from the detector
+            error model of the recorded circuit.
+        :param chunk_size: The number of shots decoded at once.
+        """
+
+        if matcher is None:
+            # Imported here, PyMatching pulls in matplotlib at import time
+            import pymatching
+
+            matcher = pymatching.Matching.from_detector_error_model(
+                self.circuit.detector_error_model(decompose_errors=False)
+            )
+
+        detection_events = self.detection_events
+        observable_flips = self.observable_flips
+
+        num_errors = 0
+        for start in range(0, self.num_shots, chunk_size):
+            stop = min(start + chunk_size, self.num_shots)
+            predictions = matcher.decode_batch(
+                detection_events[start:stop],
+                bit_packed_shots=True,
+                bit_packed_predictions=True,
+            )
+            num_errors += int(
+                np.any(predictions != observable_flips[start:stop], axis=1).sum()
+            )
+        return num_errors
+
+    def _memmap(self, filename: str, num_bits: int) -> np.memmap:
+        r"""
+        Return the memory map of a b8 file with num_bits bits per shot.
+        """
+        return np.memmap(
+            os.path.join(self.directory, filename),
+            dtype=np.uint8,
+            mode="r",
+            shape=(self.num_shots, (num_bits + 7) // 8),
+        )
@@ -0,0 +1,169 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import numpy as np
+from scipy.optimize import curve_fit
+from scipy.stats import norm
+
+__all__ = ["fit_threshold", "fit_suppression_factor"]
+
+
+def _tally_arrays(
+    tallies: dict[tuple[int, float], tuple[int, int]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    r"""
+    Return the distances, error rates, logical error rates and their standard
+    deviations of the sampled points.
+
+    The standard deviation uses the add-half estimate of the binomial rate, so that
+    points without any error still carry a finite weight.
+    """
+
+    points = [(key, value) for key, value in tallies.items() if value[0] > 0]
+    distances = np.array([key[0] for key, _ in points], dtype=float)
+    error_rates = np.array([key[1] for key, _ in points], dtype=float)
+    shots = np.array([value[0] for _, value in points], dtype=float)
+    errors = np.array([value[1] for _, value in points], dtype=float)
+
+    rates = errors / shots
+    smoothed = (errors + 0.5) / (shots + 1)
+    sigmas = np.sqrt(smoothed * (1 - smoothed) / shots)
+    return distances, error_rates, rates, sigmas
+
+
+def _threshold_model(
+    x: tuple[np.ndarray, np.ndarray],
+    threshold: float,
+    nu: float,
+    a: float,
+    b: float,
+    c: float,
+) -> np.ndarray:
+    r"""
+    Finite-size scaling ansatz P_L = a + b x + c x^2 with x = (p - p_th) d^(1/nu).
+    """
+    error_rates, distances = x
+    rescaled = (error_rates - threshold) * distances ** (1 / nu)
+    return a + b * rescaled + c * rescaled**2
+
+
+def fit_threshold(
+    tallies: dict[tuple[int, float], tuple[int, int]],
+    confidence: float = 0.95,
+    error_rate_range: tuple[float, float] | None = None,
+    threshold_guess: float | None = None,
+) -> dict:
+    r"""
+    Fit the threshold with the finite-size scaling ansatz and return a record with
+    the threshold, the critical exponent nu, their standard deviations and the
+    confidence interval on the threshold.
+
+    :param tallies: The (shots, errors) tallies keyed by (distance, error rate).
+    :param confidence: The confidence level of the interval.
+    :param error_rate_range: The error rates to include, the ansatz only holds close
+        to the threshold.
+    :param threshold_guess: The starting point of the fit.
+    """
+
+    distances, error_rates, rates, sigmas = _tally_arrays(tallies)
+
+    if error_rate_range is not None:
+        mask = (error_rates >= error_rate_range[0]) & (
+            error_rates <= error_rate_range[1]
+        )
+        distances, error_rates = distances[mask], error_rates[mask]
+        rates, sigmas = rates[mask], sigmas[mask]
+
+    if len(np.unique(distances)) < 2 or len(rates) < 6:
+        raise ValueError(
+            "At least two distances and six points are required to fit the threshold."
+        )
+
+    if threshold_guess is None:
+        threshold_guess = float(np.median(error_rates))
+
+    params, covariance = curve_fit(
+        _threshold_model,
+        (error_rates, distances),
+        rates,
+        p0=[threshold_guess, 1.0, float(np.mean(rates)), 1.0, 0.0],
+        sigma=sigmas,
+        absolute_sigma=True,
+        maxfev=10**4,
+    )
+    stds = np.sqrt(np.diag(covariance))
+
+    residuals = (rates - _threshold_model((error_rates, distances), *params)) / sigmas
+    z = norm.ppf((1 + confidence) / 2)
+
+    return {
+        "threshold": float(params[0]),
+        "threshold_std": float(stds[0]),
+        "interval": (float(params[0] - z * stds[0]), float(params[0] + z * stds[0])),
+        "nu": float(params[1]),
+        "nu_std": float(stds[1]),
+        "reduced_chi2": float(np.sum(residuals**2) / max(len(rates) - len(params), 1)),
+        "confidence": confidence,
+    }
+
+
+def fit_suppression_factor(
+    tallies: dict[tuple[int, float], tuple[int, int]],
+    error_rate: float,
+    confidence: float = 0.95,
+) -> dict:
+    r"""
+    Fit the error suppression factor Lambda at a given error rate below threshold
+    and return a record with Lambda, its standard deviation and its confidence
+    interval.
+
+    The logical error rate is modelled as P_L = A / Lambda^((d + 1) / 2), a line in
+    log scale whose slope is fitted over the distances that recorded errors.
+
+    :param tallies: The (shots, errors) tallies keyed by (distance, error rate).
+    :param error_rate: The physical error rate at which Lambda is computed.
+    :param confidence: The confidence level of the interval.
+    """
+
+    distances, error_rates, rates, sigmas = _tally_arrays(tallies)
+
+    mask = np.isclose(error_rates, error_rate) & (rates > 0)
+    distances, rates, sigmas = distances[mask], rates[mask], sigmas[mask]
+
+    if len(np.unique(distances)) < 2:
+        raise ValueError(
+            "At least two distances with errors are required to fit Lambda."
+        )
+
+    params, covariance = curve_fit(
+        lambda d, log_a, log_lambda: log_a - (d + 1) / 2 * log_lambda,
+        distances,
+        np.log(rates),
+        p0=[float(np.log(rates[0])), 1.0],
+        sigma=sigmas / rates,
+        absolute_sigma=True,
+    )
+    log_lambda, log_lambda_std = params[1], float(np.sqrt(covariance[1, 1]))
+    z = norm.ppf((1 + confidence) / 2)
+
+    return {
+        "error_rate": float(error_rate),
+        "lambda": float(np.exp(log_lambda)),
+        "lambda_std": float(np.exp(log_lambda) * log_lambda_std),
+        "interval": (
+            float(np.exp(log_lambda - z * log_lambda_std)),
+            float(np.exp(log_lambda + z * log_lambda_std)),
+        ),
+        "confidence": confidence,
+    }
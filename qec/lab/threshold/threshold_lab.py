@@ -11,16 +11,136 @@
 # limitations under the License.
 
 from __future__ import annotations
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import (
+    CancelledError,
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    wait,
+)
+import functools
+import multiprocessing
+import os
+from queue import Empty
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING
 
 import numpy as np
-import matplotlib.pyplot as plt
-import pymatching
+from stim import Circuit
 
+from qec.artifact_cache import ArtifactCache
 from qec.codes.base_code import BaseCode
+from qec.codes.code_spec import CodeSpec
+from qec.lab.threshold.budget import allocate_shots
+from qec.lab.threshold.progress import ProgressTracker
+from qec.lab.threshold.shared_pipeline import compute_logical_errors_shared
+from qec.lab.threshold.syndrome_dataset import SyndromeDataset
+from qec.lab.threshold.work_queue import WorkQueue
+from qec.lab.threshold.threshold_fit import fit_threshold, fit_suppression_factor
+
+if TYPE_CHECKING:
+    import pymatching
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
 
 __all__ = ["ThresholdLAB"]
 
 
+def _peak_rss() -> int | None:
+    r"""
+    Return the peak resident set size of the process in bytes, if available.
+    """
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes whereas macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _available_memory() -> int:
+    r"""
+    Return the memory available to new processes in bytes, read from
+    /proc/meminfo on Linux and from the free physical pages elsewhere.
+    """
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def _task_seed(seed: int | None, index: int) -> int | None:
+    r"""
+    Return the seed of the index-th task of a sweep seeded with seed, so that
+    tasks draw independent samples in whatever process they run.
+    """
+    if seed is None:
+        return None
+    state = np.random.SeedSequence([seed, index]).generate_state(1, dtype=np.uint64)
+    return int(state[0])
+
+
+def _queue_batch(
+    batches: any, distance: int, error_rate: float, shots: int, errors: int
+) -> None:
+    r"""
+    Put a batch sampled in a worker process on the progress queue of the sweep.
+    """
+    batches.put((distance, error_rate, shots, errors))
+
+
+def _track_batches(
+    batches: any,
+    progress: ProgressTracker,
+    planned_shots: dict[tuple[int, float], int],
+) -> None:
+    r"""
+    Add the batches on the progress queue to the tracker, starting each task on
+    its first batch.
+    """
+    while True:
+        try:
+            distance, error_rate, shots, errors = batches.get_nowait()
+        except Empty:
+            return
+        if (distance, error_rate) not in progress.running_tasks:
+            progress.start_task(
+                distance=distance,
+                error_rate=error_rate,
+                num_shots=planned_shots[distance, error_rate],
+            )
+        progress.update(
+            shots=shots, errors=errors, distance=distance, error_rate=error_rate
+        )
+
+
+def _renew_lease(
+    queue: WorkQueue,
+    task_id: str,
+    worker: str | None,
+    stop: threading.Event,
+    lost: threading.Event,
+) -> None:
+    r"""
+    Renew the lease of a task every third of the lease duration until stopped, or
+    until the lease is lost to another worker, which sets the lost event.
+    """
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.renew(task_id=task_id, worker=worker):
+            lost.set()
+            return
+
+
 class ThresholdLAB:
     r"""
     A class for wrapping threshold calculation
@@ -32,10 +152,37 @@ class ThresholdLAB:
         "_code",
         "_collected_stats",
         "_code_name",
+        "_tallies",
+        "_collected_timings",
+        "_task_callback",
+        "_cache",
+        "_memory_limit",
+        "_bases",
     )
 
+    # Fraction of the available memory used when no memory limit is given
+    MEMORY_FRACTION = 0.8
+    # Smallest batch worth sampling when sharing the memory among workers
+    MIN_BATCH_SIZE = 256
+    # Fraction of the seconds left that a budgeted round plans to spend, so that
+    # tasks up to a third slower than planned, as larger batches are, stay within
+    # the budget
+    BUDGET_SECONDS_FRACTION = 0.75
+    # Largest batch of a streamed task, which checks for cancellation between
+    # batches, and default batch of a task whose progress is reported
+    STREAM_BATCH_SIZE = 10**4
+    # Time between two reads of the batches sampled by worker processes
+    PROGRESS_POLL_SECONDS = 0.1
+
     def __init__(
-        self, code: BaseCode, distances: list[int], error_rates: list[float]
+        self,
+        code: BaseCode,
+        distances: list[int],
+        error_rates: list[float],
+        task_callback: Callable[[dict], None] | None = None,
+        cache: ArtifactCache | None = None,
+        memory_limit: int | None = None,
+        bases: list[str] | None = None,
     ) -> None:
         r"""
         Initialization of the Base Code class.
@@ -43,6 +190,14 @@ class ThresholdLAB:
         :param code: The code
         :param distances: Distances for the code.
         :param error_rates: Error rate.
+        :param task_callback: A function called with the timing record of each
+            sampled (distance, error rate) task.
+        :param cache: The cache of the compiled artifacts, consulted before
+            generating the circuit, detector error model and matcher of a task.
+        :param memory_limit: The memory in bytes shared by the tasks running at
+            once. Default to a fraction of the memory available when sampling.
+        :param bases: The bases of the memories sampled by each task, whose records
+            sum the shots and errors over them. Default to the Z basis.
         """
 
         self._distances = distances
@@ -50,6 +205,15 @@ class ThresholdLAB:
         self._code_name = code().name
         self._error_rates = error_rates
         self._collected_stats = {}
+        self._tallies = {}
+        self._collected_timings = []
+        self._task_callback = task_callback
+        self._cache = cache
+        self._memory_limit = memory_limit
+        self._bases = ["Z"] if bases is None else list(bases)
+        for basis in self._bases:
+            if basis not in BaseCode.BASES:
+                raise ValueError(f"The basis must be 'Z' or 'X', not {basis!r}.")
 
     @property
     def distances(self) -> list[int]:
@@ -86,64 +250,1528 @@ class ThresholdLAB:
         """
         return self._code_name
 
+    @property
+    def tallies(self) -> dict:
+        r"""
+        The accumulated (shots, errors) tallies for each (distance, error rate).
+        """
+        return self._tallies
+
+    @property
+    def collected_timings(self) -> list[dict]:
+        r"""
+        The timing records of the sampled tasks, with the wall time of each stage
+        in seconds, the throughput and the peak memory.
+        """
+        return self._collected_timings
+
+    @property
+    def task_callback(self) -> Callable[[dict], None] | None:
+        r"""
+        The function called with the timing record of each sampled task.
+        """
+        return self._task_callback
+
+    @property
+    def cache(self) -> ArtifactCache | None:
+        r"""
+        The cache of the compiled artifacts.
+        """
+        return self._cache
+
+    @property
+    def bases(self) -> list[str]:
+        r"""
+        The bases of the memories sampled by each task.
+        """
+        return self._bases
+
+    @property
+    def memory_limit(self) -> int:
+        r"""
+        The memory in bytes shared by the tasks running at once.
+        """
+        if self._memory_limit is not None:
+            return self._memory_limit
+        return int(self.MEMORY_FRACTION * _available_memory())
+
     @staticmethod
-    def compute_logical_errors(code: BaseCode, num_shots: int) -> int:
+    def compute_logical_errors(
+        code: BaseCode,
+        num_shots: int,
+        timings: dict | None = None,
+        batch_size: int | None = None,
+        batch_callback: Callable[[int, int], None] | None = None,
+        cache: ArtifactCache | None = None,
+    ) -> int:
         r"""
         Sample the memory circuit and return the number of errors.
 
         :param code: The code to simulate.
         :param num_shots: The number of samples.
+        :param timings: If given, filled with the wall time in seconds of the
+            DEM extraction, matcher construction, sampler compilation, sampling and
+            decoding stages.
+        :param batch_size: The number of samples drawn and decoded at once. Default
+            to all of them.
+        :param batch_callback: A function called with the number of shots and of
+            errors of each batch.
+        :param cache: The cache of the compiled artifacts.
         """
 
-        # Sample the memory circuit
-        sampler = code.memory_circuit.compile_detector_sampler()
-        detection_events, observable_flips = sampler.sample(
-            num_shots, separate_observables=True
-        )
+        if timings is None:
+            timings = {}
 
-        # Configure the decoder using the memory circuit then run the decoder
-        detector_error_model = code.memory_circuit.detector_error_model(
-            decompose_errors=False
+        matcher = ThresholdLAB.build_matcher(
+            circuit=code.memory_circuit,
+            timings=timings,
+            cache=cache,
+            key=None if cache is None else code.cache_key,
+        )
+        return ThresholdLAB.count_logical_errors(
+            circuit=code.memory_circuit,
+            matcher=matcher,
+            num_shots=num_shots,
+            timings=timings,
+            batch_size=batch_size,
+            batch_callback=batch_callback,
         )
 
+    @staticmethod
+    def build_matcher(
+        circuit: Circuit,
+        timings: dict | None = None,
+        cache: ArtifactCache | None = None,
+        key: str | None = None,
+    ) -> pymatching.Matching:
+        r"""
+        Return the matcher decoding the memory circuit, built from its detector
+        error model unless the cache already holds them.
+
+        :param circuit: The memory circuit.
+        :param timings: If given, filled with the wall time in seconds of the DEM
+            extraction and matcher construction stages.
+        :param cache: The cache of the compiled artifacts.
+        :param key: The key of the memory circuit in the cache.
+        """
+
+        if timings is None:
+            timings = {}
+        timings["dem_seconds"] = 0.0
+        timings["matcher_seconds"] = 0.0
+
+        if cache is not None:
+            matcher = cache.get(key=key, kind="matcher")
+            if matcher is not None:
+                return matcher
+
+        # Configure the decoder using the memory circuit
+        start = time.perf_counter()
+        detector_error_model = None if cache is None else cache.get(key=key, kind="dem")
+        if detector_error_model is None:
+            detector_error_model = circuit.detector_error_model(decompose_errors=False)
+            if cache is not None:
+                cache.put(key=key, kind="dem", value=detector_error_model)
+        timings["dem_seconds"] = time.perf_counter() - start
+
+        # Imported here, PyMatching pulls in matplotlib at import time
+        import pymatching
+
+        start = time.perf_counter()
         matcher = pymatching.Matching.from_detector_error_model(detector_error_model)
-        predictions = matcher.decode_batch(detection_events)
+        timings["matcher_seconds"] = time.perf_counter() - start
 
-        # Count the number of errors
+        if cache is not None:
+            cache.put(key=key, kind="matcher", value=matcher)
+        return matcher
+
+    @staticmethod
+    def count_logical_errors(
+        circuit: Circuit,
+        matcher: pymatching.Matching,
+        num_shots: int,
+        timings: dict | None = None,
+        batch_size: int | None = None,
+        batch_callback: Callable[[int, int], None] | None = None,
+        max_errors: int | None = None,
+        seed: int | None = None,
+    ) -> int:
+        r"""
+        Sample the memory circuit, decode the samples and return the number of
+        errors.
+
+        :param circuit: The memory circuit.
+        :param matcher: The matcher decoding the memory circuit.
+        :param num_shots: The number of samples.
+        :param timings: If given, filled with the wall time in seconds of the
+            sampler compilation, sampling and decoding stages.
+        :param batch_size: The number of samples drawn and decoded at once. Default
+            to all of them.
+        :param batch_callback: A function called with the number of shots and of
+            errors of each batch.
+        :param max_errors: Stop sampling once this number of errors is reached.
+            It is checked after each batch.
+        :param seed: The seed of the sampler.
+        """
+
+        if timings is None:
+            timings = {}
+
+        # Compile the sampler of the memory circuit
+        start = time.perf_counter()
+        sampler = circuit.compile_detector_sampler(seed=seed)
+        timings["compile_seconds"] = time.perf_counter() - start
+
+        timings["sample_seconds"] = 0.0
+        timings["decode_seconds"] = 0.0
+
+        batch_size = batch_size or num_shots
         num_errors = 0
-        for shot in range(num_shots):
-            actual_for_shot = observable_flips[shot]
-            predicted_for_shot = predictions[shot]
-            if not np.array_equal(actual_for_shot, predicted_for_shot):
-                num_errors += 1
+        shots_done = 0
+        while shots_done < num_shots:
+
+            shots = min(batch_size, num_shots - shots_done)
+
+            # Sample the memory circuit
+            start = time.perf_counter()
+            detection_events, observable_flips = sampler.sample(
+                shots, separate_observables=True
+            )
+            timings["sample_seconds"] += time.perf_counter() - start
+
+            # Run the decoder and count the shots with a wrong prediction
+            start = time.perf_counter()
+            predictions = matcher.decode_batch(detection_events)
+            errors = int(np.any(predictions != observable_flips, axis=1).sum())
+            timings["decode_seconds"] += time.perf_counter() - start
+
+            num_errors += errors
+            shots_done += shots
+            if batch_callback is not None:
+                batch_callback(shots, errors)
+            if max_errors is not None and num_errors >= max_errors:
+                break
+
         return num_errors
 
-    def collect_stats(self, num_shots: int) -> None:
-        r"""Collect sampling statistics over ranges of distance and errors."""
+    def task_spec(self, distance: int, error_rate: float) -> CodeSpec:
+        r"""
+        Return the specification of the memory experiment of a (distance, error
+        rate) task. Both depolarization rates are set to the error rate.
 
-        # Loop over distance range
-        for distance in self.distances:
+        :param distance: The distance of the code.
+        :param error_rate: The physical error rate.
+        """
+        return CodeSpec(
+            code=self.code,
+            distance=distance,
+            depolarize1_rate=error_rate,
+            depolarize2_rate=error_rate,
+            number_of_rounds=distance * 3,
+            basis=self.bases[0],
+        )
+
+    def estimate_task(self, distance: int, error_rate: float) -> dict:
+        r"""
+        Return the estimated size and memory of a (distance, error rate) task,
+        from the graph of the code only. See :meth:`BaseCode.estimate_resources`.
 
-            temp_logical_error_rate = []
+        :param distance: The distance of the code.
+        :param error_rate: The physical error rate.
+        """
 
-            # Loop over physical errors
-            for prob_error in self.error_rates:
+        spec = self.task_spec(distance=distance, error_rate=error_rate)
+        code = spec.code(**spec.code_kwargs)
+        return code.estimate_resources(number_of_rounds=spec.number_of_rounds)
+
+    def plan_task(
+        self,
+        distance: int,
+        error_rate: float,
+        num_shots: int,
+        num_workers: int = 1,
+        batch_size: int | None = None,
+        estimate: dict | None = None,
+    ) -> dict:
+        r"""
+        Return the estimate of a task with the batch size fitting its share of the
+        memory limit, and the memory_bytes it then needs.
+
+        :param distance: The distance of the code.
+        :param error_rate: The physical error rate.
+        :param num_shots: The number of samples.
+        :param num_workers: The number of tasks sharing the memory limit.
+        :param batch_size: The largest batch size wanted. Default to all shots.
+        :param estimate: The estimate of the task, computed if not given.
+        :raises MemoryError: If the detector error model and the matcher of the
+            task, with a batch of one shot, do not fit in its share of the memory.
+        """
+
+        if estimate is None:
+            estimate = self.estimate_task(distance=distance, error_rate=error_rate)
+
+        share = self.memory_limit // max(num_workers, 1)
+        fixed = estimate["dem_bytes"] + estimate["matcher_bytes"]
+        per_shot = estimate["sample_bytes_per_shot"]
+        fitting = (share - fixed) // per_shot
+        if fitting < 1:
+            raise MemoryError(
+                f"The task at distance {distance} and error rate {error_rate} needs "
+                f"about {fixed + per_shot} bytes but {share} are available to it."
+            )
+
+        batch_size = int(min(batch_size or num_shots, num_shots, fitting))
+        return {
+            **estimate,
+            "batch_size": batch_size,
+            "memory_bytes": fixed + batch_size * per_shot,
+        }
+
+    def _plan_workers(
+        self, tasks: list[tuple[int, float, int, int | None]], num_workers: int | None
+    ) -> tuple[int, dict]:
+        r"""
+        Return the number of workers whose tasks fit together in the memory limit,
+        at most num_workers or the number of CPUs, and the estimate of each point.
+        Raise MemoryError before any task starts if one does not fit on its own.
+        """
+
+        estimates = {}
+        for distance, prob_error, num_shots, _ in tasks:
+            if (distance, prob_error) not in estimates:
+                estimates[distance, prob_error] = self.plan_task(
+                    distance=distance, error_rate=prob_error, num_shots=num_shots
+                )
+
+        workers = num_workers or os.cpu_count() or 1
+        for (distance, prob_error), estimate in estimates.items():
+            needed = (
+                estimate["dem_bytes"]
+                + estimate["matcher_bytes"]
+                + estimate["sample_bytes_per_shot"]
+                * min(estimate["batch_size"], self.MIN_BATCH_SIZE)
+            )
+            workers = min(workers, max(self.memory_limit // needed, 1))
+        return workers, estimates
+
+    @staticmethod
+    def sample_task(
+        spec: CodeSpec,
+        num_shots: int,
+        batch_size: int | None = None,
+        batch_callback: Callable[[int, int], None] | None = None,
+        cache: ArtifactCache | None = None,
+        max_errors: int | None = None,
+        seed: int | None = None,
+        bases: list[str] | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> dict:
+        r"""
+        Build the code, sample its memory experiment and return the task record
+        with the number of shots and errors and the timing of each stage.
+
+        The specification is cheap to send to worker processes. When the cache
+        holds the artifacts of the task, the code is not built.
+
+        With several bases, the memory circuits of all of them are generated in one
+        pass and each is sampled with num_shots shots. The record then sums the
+        shots, errors and timings over the bases, so that errors / shots is their
+        average logical error rate, and holds the shots and errors of each basis,
+        as Z_shots and Z_errors for the Z basis.
+
+        :param spec: The specification of the memory experiment.
+        :param num_shots: The number of samples.
+        :param batch_size: The number of samples drawn and decoded at once.
+        :param batch_callback: A function called with the number of shots and of
+            errors of each batch.
+        :param cache: The cache of the compiled artifacts.
+        :param max_errors: Stop sampling once this number of errors is reached,
+            the record then holds the number of shots actually sampled. With
+            several bases it applies to each basis.
+        :param seed: The seed of the sampler.
+        :param bases: The bases of the memories sampled. Default to the basis of
+            the specification.
+        :param cancel_event: An event checked after each batch, possibly shared
+            with other processes through a manager. Once it is set, the task stops
+            and raises CancelledError.
+        """
+
+        task_start = time.perf_counter()
+
+        bases = [spec.basis] if bases is None else list(bases)
+        keys = {basis: spec.replace(basis=basis).key for basis in bases}
+        circuits = {}
+        if cache is not None:
+            for basis in bases:
+                circuit = cache.get(key=keys[basis], kind="circuit")
+                if circuit is not None:
+                    circuits[basis] = circuit
+        graph_seconds = 0.0
+        circuit_seconds = time.perf_counter() - task_start
+
+        if len(circuits) < len(bases):
+
+            # Build the circuits for the code
+            start = time.perf_counter()
+            code = spec.code(**spec.code_kwargs)
+            graph_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            circuits = code.build_memory_circuits(
+                number_of_rounds=spec.number_of_rounds, bases=bases, cache=cache
+            )
+            circuit_seconds = time.perf_counter() - start
+
+        # Count the sampled shots, fewer than asked when max_errors is reached
+        shots_done = 0
+
+        def on_batch(shots: int, errors: int) -> None:
+            nonlocal shots_done
+            shots_done += shots
+            if batch_callback is not None:
+                batch_callback(shots, errors)
+            if cancel_event is not None and cancel_event.is_set():
+                raise CancelledError()
+
+        # Get the number of logical errors in each basis
+        timings = {}
+        counts = {}
+        num_errors = 0
+        for index, basis in enumerate(bases):
+
+            basis_timings = {}
+            basis_shots = shots_done
+            matcher = ThresholdLAB.build_matcher(
+                circuit=circuits[basis],
+                timings=basis_timings,
+                cache=cache,
+                key=keys[basis],
+            )
+            errors = ThresholdLAB.count_logical_errors(
+                circuit=circuits[basis],
+                matcher=matcher,
+                num_shots=num_shots,
+                timings=basis_timings,
+                batch_size=batch_size,
+                batch_callback=on_batch,
+                max_errors=max_errors,
+                seed=seed if index == 0 else _task_seed(seed=seed, index=index),
+            )
+            # Free the matcher before building the next one
+            del matcher
+
+            num_errors += errors
+            for stage, seconds in basis_timings.items():
+                timings[stage] = timings.get(stage, 0.0) + seconds
+            if len(bases) > 1:
+                counts[f"{basis}_shots"] = shots_done - basis_shots
+                counts[f"{basis}_errors"] = errors
+        seconds = time.perf_counter() - task_start
+
+        return {
+            "distance": spec.distance,
+            "error_rate": spec.depolarize1_rate,
+            "basis": "".join(bases),
+            "shots": shots_done,
+            "errors": num_errors,
+            **counts,
+            "graph_seconds": graph_seconds,
+            "circuit_seconds": circuit_seconds,
+            **timings,
+            "seconds": seconds,
+            "shots_per_second": shots_done / seconds,
+            "detectors_per_shot": circuits[bases[0]].num_detectors,
+            "peak_rss": _peak_rss(),
+        }
+
+    def add_record(self, record: dict) -> None:
+        r"""
+        Add the record of a sampled task to the tallies and the timings.
+
+        :param record: The record returned by :meth:`sample_task`.
+        """
+
+        key = (record["distance"], record["error_rate"])
+        shots, errors = self._tallies.get(key, (0, 0))
+        self._tallies[key] = (shots + record["shots"], errors + record["errors"])
+
+        self._collected_timings.append(record)
+        if self.task_callback is not None:
+            self.task_callback(record)
+
+    def iter_stats(
+        self,
+        num_shots: int,
+        num_workers: int | None = 1,
+        batch_size: int | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+        progress_interval: float = 1.0,
+        max_errors: int | None = None,
+        seed: int | None = None,
+    ) -> Iterator[dict]:
+        r"""
+        Sample every (distance, error rate) point and yield the record of each
+        task as soon as it completes.
+
+        With several workers the tasks run in a process pool and are yielded in
+        completion order. The tallies and collected_stats are updated before each
+        record is yielded, and closing the iterator cancels the pending tasks.
+
+        :param num_shots: The number of samples per distance and error rate.
+        :param num_workers: The number of worker processes, or None for the number
+            of CPUs. It is lowered so that the running tasks fit in the memory limit.
+        :param batch_size: The number of samples drawn and decoded at once. It is
+            lowered to fit the share of the memory limit of each task.
+        :param progress_callback: A function called with the progress record of
+            the sweep. See :class:`qec.lab.threshold.progress.ProgressTracker`.
+        :param progress_interval: The minimum time in seconds between two progress
+            reports.
+        :param max_errors: Stop sampling a point once this number of errors is
+            reached, checked after each batch.
+        :param seed: The seed of the sweep. Each task derives its own seed from it
+            and its position, so a seeded sweep is reproducible with any number of
+            workers.
+        """
+
+        tasks = [
+            (distance, prob_error)
+            for distance in self.distances
+            for prob_error in self.error_rates
+        ]
+
+        progress = None
+        if progress_callback is not None:
+            progress = ProgressTracker(
+                callback=progress_callback,
+                total_tasks=len(tasks),
+                total_shots=len(tasks) * num_shots * len(self.bases),
+                interval=progress_interval,
+            )
+
+        yield from self._iter_tasks(
+            tasks=[
+                (distance, prob_error, num_shots, _task_seed(seed=seed, index=index))
+                for index, (distance, prob_error) in enumerate(tasks)
+            ],
+            num_workers=num_workers,
+            batch_size=batch_size,
+            progress=progress,
+            max_errors=max_errors,
+        )
+
+    def _iter_tasks(
+        self,
+        tasks: list[tuple[int, float, int, int | None]],
+        num_workers: int | None = 1,
+        batch_size: int | None = None,
+        progress: ProgressTracker | None = None,
+        max_errors: int | None = None,
+        executor: ProcessPoolExecutor | None = None,
+    ) -> Iterator[dict]:
+        r"""
+        Sample the (distance, error rate, shots, seed) tasks, add their records and
+        yield them as they complete. The tasks run in the executor if given, else
+        in a pool of num_workers processes, or in this process for a single worker.
+
+        The workers are capped so that their tasks fit in the memory limit, and the
+        batch size of each task is capped to its share of it. num_workers None
+        means the number of CPUs, and with an executor it is the number of tasks
+        it runs at once.
+        """
+
+        # Report the progress within a task
+        if progress is not None and batch_size is None:
+            batch_size = self.STREAM_BATCH_SIZE
+
+        num_workers, estimates = self._plan_workers(tasks, num_workers=num_workers)
+        batch_sizes = [
+            self.plan_task(
+                distance=distance,
+                error_rate=prob_error,
+                num_shots=num_shots,
+                num_workers=num_workers,
+                batch_size=batch_size,
+                estimate=estimates[distance, prob_error],
+            )["batch_size"]
+            for distance, prob_error, num_shots, _ in tasks
+        ]
+
+        if executor is None and num_workers <= 1:
+            for (distance, prob_error, num_shots, seed), task_batch_size in zip(
+                tasks, batch_sizes
+            ):
+
+                if progress is not None:
+                    progress.start_task(
+                        distance=distance,
+                        error_rate=prob_error,
+                        num_shots=num_shots * len(self.bases),
+                    )
+
+                record = self.sample_task(
+                    spec=self.task_spec(distance=distance, error_rate=prob_error),
+                    num_shots=num_shots,
+                    batch_size=task_batch_size,
+                    batch_callback=None if progress is None else progress.update,
+                    cache=self.cache,
+                    max_errors=max_errors,
+                    seed=seed,
+                    bases=self.bases,
+                )
+                self.add_record(record)
+                self.update_stats()
+
+                if progress is not None:
+                    progress.finish_task()
+                yield record
+            return
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=num_workers)
+
+        # The workers put their batches on a queue read by this process
+        manager = batches = None
+        planned_shots = {}
+        if progress is not None:
+            manager = multiprocessing.Manager()
+            batches = manager.Queue()
+
+        futures = {}
+        try:
+            for (distance, prob_error, num_shots, seed), task_batch_size in zip(
+                tasks, batch_sizes
+            ):
+                planned_shots[distance, prob_error] = num_shots * len(self.bases)
+                future = executor.submit(
+                    self.sample_task,
+                    spec=self.task_spec(distance=distance, error_rate=prob_error),
+                    num_shots=num_shots,
+                    batch_size=task_batch_size,
+                    batch_callback=(
+                        None
+                        if batches is None
+                        else functools.partial(
+                            _queue_batch, batches, distance, prob_error
+                        )
+                    ),
+                    cache=self.cache,
+                    max_errors=max_errors,
+                    seed=seed,
+                    bases=self.bases,
+                )
+                futures[future] = (distance, prob_error)
+
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(
+                    not_done,
+                    timeout=None if progress is None else self.PROGRESS_POLL_SECONDS,
+                    return_when=FIRST_COMPLETED,
+                )
+                if progress is not None:
+                    _track_batches(batches, progress, planned_shots)
+
+                for future in done:
+                    record = future.result()
+                    self.add_record(record)
+                    self.update_stats()
+
+                    if progress is not None:
+                        distance, prob_error = futures[future]
+                        if (distance, prob_error) not in progress.running_tasks:
+                            progress.start_task(
+                                distance=distance,
+                                error_rate=prob_error,
+                                num_shots=planned_shots[distance, prob_error],
+                            )
+                        progress.finish_task(distance=distance, error_rate=prob_error)
+                    yield record
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            else:
+                for future in futures:
+                    future.cancel()
+            if manager is not None:
+                manager.shutdown()
+
+    def collect_stats(
+        self,
+        num_shots: int,
+        num_workers: int | None = 1,
+        batch_size: int | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+        progress_interval: float = 1.0,
+        max_errors: int | None = None,
+        seed: int | None = None,
+    ) -> None:
+        r"""
+        Collect sampling statistics over ranges of distance and errors.
+
+        Repeated calls accumulate shots on top of the existing tallies.
+
+        :param num_shots: The number of samples per distance and error rate.
+        :param num_workers: The number of worker processes, or None for the number
+            of CPUs. It is lowered so that the running tasks fit in the memory limit.
+        :param batch_size: The number of samples drawn and decoded at once. It is
+            lowered to fit the share of the memory limit of each task.
+        :param progress_callback: A function called with the progress record of
+            the sweep. See :class:`qec.lab.threshold.progress.ProgressTracker`.
+        :param progress_interval: The minimum time in seconds between two progress
+            reports.
+        :param max_errors: Stop sampling a point once this number of errors is
+            reached, checked after each batch.
+        :param seed: The seed of the sweep, see :meth:`iter_stats`.
+        """
+
+        for _ in self.iter_stats(
+            num_shots=num_shots,
+            num_workers=num_workers,
+            batch_size=batch_size,
+            progress_callback=progress_callback,
+            progress_interval=progress_interval,
+            max_errors=max_errors,
+            seed=seed,
+        ):
+            pass
+
+        self.update_stats()
+
+    def collect_stats_budget(
+        self,
+        shot_budget: int | None = None,
+        seconds_budget: float | None = None,
+        precision: float = 0.1,
+        initial_shots: int = 10**3,
+        max_shots: int = 10**6,
+        num_workers: int | None = 1,
+        points_per_round: int | None = None,
+        batch_size: int | None = None,
+        seed: int | None = None,
+    ) -> None:
+        r"""
+        Collect sampling statistics within a total budget of shots or of compute
+        time, handing out shots across the points in rounds.
+
+        Each round samples the points with the largest decrease of uncertainty per
+        second, measured from the shots per second of each point, and gives them
+        the shots expected to reach the target precision. A task is charged its
+        whole compute time, building included. It is planned with the build and
+        per shot seconds measured at its point, or estimated for a point not
+        sampled yet, see :meth:`BaseCode.estimate_resources`. A round plans
+        BUDGET_SECONDS_FRACTION of the seconds left. Points within the target
+        precision, and points without any error after their initial shots, get no
+        more shots. See :func:`qec.lab.threshold.budget.allocate_shots`. Sampling
+        stops when a budget is spent or no point needs more shots.
+
+        :param shot_budget: The total number of shots of the call, summed over the
+            bases.
+        :param seconds_budget: The total compute time in seconds of the call, summed
+            over the workers.
+        :param precision: The target relative standard error of the logical error
+            rates.
+        :param initial_shots: The shots of the first visit of a point, and the
+            minimum given to a point in a round.
+        :param max_shots: The maximum number of shots given to a point in a round.
+        :param num_workers: The number of worker processes, or None for the number
+            of CPUs. It is lowered so that the running tasks fit in the memory limit.
+        :param points_per_round: The maximum number of points sampled in a round.
+            Default to the number of workers.
+        :param batch_size: The number of samples drawn and decoded at once.
+        :param seed: The seed of the sweep. Each task derives its own seed from it
+            and its rank in the call.
+        """
+
+        if shot_budget is None and seconds_budget is None:
+            raise ValueError("Either shot_budget or seconds_budget must be given.")
+
+        grid = [
+            (distance, prob_error)
+            for distance in self.distances
+            for prob_error in self.error_rates
+        ]
+        num_workers, estimates = self._plan_workers(
+            [(distance, prob_error, max_shots, None) for distance, prob_error in grid],
+            num_workers=num_workers,
+        )
+        points_per_round = points_per_round or max(num_workers, 1)
+
+        executor = None
+        if num_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=num_workers)
+
+        # The allocation and the task costs count the shots of each basis, a task
+        # samples them once per basis
+        num_bases = len(self.bases)
+        spent_shots = 0
+        spent_seconds = 0.0
+        num_tasks = 0
+        try:
+            while True:
+                allocation = allocate_shots(
+                    points=self._point_costs(grid),
+                    precision=precision,
+                    max_points=points_per_round,
+                    min_shots=initial_shots,
+                    max_shots=max_shots,
+                    shot_budget=(
+                        np.inf
+                        if shot_budget is None
+                        else (shot_budget - spent_shots) // num_bases
+                    ),
+                    seconds_budget=(
+                        np.inf
+                        if seconds_budget is None
+                        else (seconds_budget - spent_seconds)
+                        * self.BUDGET_SECONDS_FRACTION
+                    ),
+                    task_costs=self._task_costs(grid, estimates=estimates),
+                )
+                if not allocation:
+                    break
+
+                tasks = [
+                    (distance, prob_error, shots, _task_seed(seed, num_tasks + i))
+                    for i, ((distance, prob_error), shots) in enumerate(
+                        allocation.items()
+                    )
+                ]
+                num_tasks += len(tasks)
+
+                for record in self._iter_tasks(
+                    tasks=tasks,
+                    num_workers=num_workers,
+                    batch_size=batch_size,
+                    executor=executor,
+                ):
+                    spent_shots += record["shots"]
+                    spent_seconds += record["seconds"]
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        self.update_stats()
+
+    def _task_costs(
+        self, points: list[tuple[int, float]], estimates: dict[tuple[int, float], dict]
+    ) -> dict[tuple[int, float], tuple[float, float]]:
+        r"""
+        Return the fixed seconds and the seconds per shot of a task at each point,
+        for the shots of every basis of the lab. They are averaged over the timing
+        records of a sampled point. The estimates of a point not sampled yet are
+        scaled by the ratio of the measured to the estimated seconds of the
+        sampled points.
+        """
+
+        measured = {}
+        for record in self.collected_timings:
+            key = (record["distance"], record["error_rate"])
+            sampling = record.get("sample_seconds", 0.0) + record.get(
+                "decode_seconds", 0.0
+            )
+            tasks, fixed, shots, seconds = measured.get(key, (0, 0.0, 0, 0.0))
+            measured[key] = (
+                tasks + 1,
+                fixed + record["seconds"] - sampling,
+                shots + record["shots"],
+                seconds + sampling,
+            )
+
+        # Calibrate the estimates on this machine
+        num_bases = len(self.bases)
+        scales = [1.0, 1.0]
+        totals = np.zeros((2, 2))
+        for point, (tasks, fixed, shots, seconds) in measured.items():
+            if point in estimates and shots:
+                estimate = estimates[point]
+                totals[0] += fixed, tasks * num_bases * estimate["build_seconds"]
+                totals[1] += seconds, shots * estimate["seconds_per_shot"]
+        for index, (seconds, estimated) in enumerate(totals):
+            if seconds > 0 and estimated > 0:
+                scales[index] = seconds / estimated
+
+        costs = {}
+        for point in points:
+            tasks, fixed, shots, seconds = measured.get(point, (0, 0.0, 0, 0.0))
+            if shots:
+                costs[point] = (fixed / tasks, num_bases * seconds / shots)
+            elif point in estimates:
+                estimate = estimates[point]
+                costs[point] = (
+                    num_bases * scales[0] * estimate["build_seconds"],
+                    num_bases * scales[1] * estimate["seconds_per_shot"],
+                )
+        return costs
+
+    def _point_costs(
+        self, points: list[tuple[int, float]]
+    ) -> dict[tuple[int, float], tuple[int, int, float]]:
+        r"""
+        Return the shots, errors and sampling seconds of the points, the seconds
+        being summed over the timing records of each point.
+        """
+
+        seconds = {}
+        for record in self.collected_timings:
+            key = (record["distance"], record["error_rate"])
+            seconds[key] = (
+                seconds.get(key, 0.0)
+                + record.get("sample_seconds", 0.0)
+                + record.get("decode_seconds", 0.0)
+            )
+
+        return {
+            point: (*self.tallies.get(point, (0, 0)), seconds.get(point, 0.0))
+            for point in points
+        }
+
+    async def astream_stats(
+        self,
+        num_shots: int,
+        num_workers: int | None = 1,
+        batch_size: int | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+        progress_interval: float = 1.0,
+        max_errors: int | None = None,
+        seed: int | None = None,
+        executor: Executor | None = None,
+        max_pending: int | None = None,
+        points: list[tuple[int, float]] | None = None,
+    ) -> AsyncIterator[dict]:
+        r"""
+        Asynchronous counterpart of :meth:`iter_stats`. The tasks run on an
+        executor, so the event loop stays free while they are sampled, and the
+        record of each task is yielded as soon as it completes.
+
+        At most max_pending tasks are handed to the executor at a time. Closing
+        the iterator, or cancelling the task consuming it, drops the tasks not yet
+        started and stops the running ones after their current batch, whose size
+        is at most STREAM_BATCH_SIZE. The running tasks are awaited without
+        blocking the event loop, and their results are discarded. Sampling only
+        some points, or in another order, is done by starting a new sweep with
+        points; the tallies accumulate across sweeps.
+
+        :param num_shots: The number of samples per distance and error rate.
+        :param num_workers: The number of worker processes of the executor created
+            when none is given, or the number of tasks a given executor runs at
+            once. None means the number of CPUs. It is lowered so that the running
+            tasks fit in the memory limit.
+        :param batch_size: The number of samples drawn and decoded at once, at most
+            and by default STREAM_BATCH_SIZE. It is lowered to fit the share of the
+            memory limit of each task.
+        :param progress_callback: A function called with the progress record of
+            the sweep. See :class:`qec.lab.threshold.progress.ProgressTracker`.
+        :param progress_interval: The minimum time in seconds between two progress
+            reports.
+        :param max_errors: Stop sampling a point once this number of errors is
+            reached, checked after each batch.
+        :param seed: The seed of the sweep, see :meth:`iter_stats`. Seeds follow the
+            position of the points in the full grid, or in points if given.
+        :param executor: The executor running the tasks, left running at the end.
+            Default to a process pool of num_workers processes shut down at the end.
+        :param max_pending: The maximum number of tasks handed to the executor at a
+            time. Default to num_workers.
+        :param points: The (distance, error rate) points to sample, in order.
+            Default to every point of the grid.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if points is None:
+            points = [
+                (distance, prob_error)
+                for distance in self.distances
+                for prob_error in self.error_rates
+            ]
+        tasks = iter(enumerate(points))
+
+        progress = None
+        if progress_callback is not None:
+            progress = ProgressTracker(
+                callback=progress_callback,
+                total_tasks=len(points),
+                total_shots=len(points) * num_shots * len(self.bases),
+                interval=progress_interval,
+            )
+
+        # Estimating the tasks builds their circuits, keep the event loop free
+        num_workers, estimates = await loop.run_in_executor(
+            None,
+            functools.partial(
+                self._plan_workers,
+                [
+                    (distance, prob_error, num_shots, None)
+                    for distance, prob_error in points
+                ],
+                num_workers=num_workers,
+            ),
+        )
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=num_workers)
+        max_pending = max(1, max_pending or num_workers)
+
+        # Running tasks check the event after each batch and stop once it is set
+        manager = await loop.run_in_executor(None, multiprocessing.Manager)
+        cancel_event = manager.Event()
+        running = set()
+
+        # The workers put their batches on a queue read by the event loop
+        batches = None if progress is None else manager.Queue()
+        planned_shots = {point: num_shots * len(self.bases) for point in points}
 
-                # Build the circuit for the code
-                code = self.code(
+        async def run(index: int, distance: int, error_rate: float) -> dict:
+            plan = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    self.plan_task,
                     distance=distance,
-                    depolarize1_rate=prob_error,
-                    depolarize2_rate=prob_error,
+                    error_rate=error_rate,
+                    num_shots=num_shots,
+                    num_workers=num_workers,
+                    batch_size=min(
+                        batch_size or self.STREAM_BATCH_SIZE, self.STREAM_BATCH_SIZE
+                    ),
+                    estimate=estimates[distance, error_rate],
+                ),
+            )
+            future = executor.submit(
+                self.sample_task,
+                spec=self.task_spec(distance=distance, error_rate=error_rate),
+                num_shots=num_shots,
+                batch_size=plan["batch_size"],
+                batch_callback=(
+                    None
+                    if batches is None
+                    else functools.partial(_queue_batch, batches, distance, error_rate)
+                ),
+                cache=self.cache,
+                max_errors=max_errors,
+                seed=_task_seed(seed=seed, index=index),
+                bases=self.bases,
+                cancel_event=cancel_event,
+            )
+            running.add(future)
+            try:
+                return await asyncio.wrap_future(future)
+            finally:
+                running.discard(future)
+
+        pending = set()
+        try:
+            while True:
+                # Keep the executor busy without queuing the whole sweep in it
+                while len(pending) < max_pending:
+                    task = next(tasks, None)
+                    if task is None:
+                        break
+                    index, (distance, prob_error) = task
+                    pending.add(asyncio.ensure_future(run(index, distance, prob_error)))
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if progress is None else self.PROGRESS_POLL_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if progress is not None:
+                    _track_batches(batches, progress, planned_shots)
+
+                for future in done:
+                    record = future.result()
+                    self.add_record(record)
+                    self.update_stats()
+
+                    if progress is not None:
+                        point = (record["distance"], record["error_rate"])
+                        if point not in progress.running_tasks:
+                            progress.start_task(
+                                distance=point[0],
+                                error_rate=point[1],
+                                num_shots=planned_shots[point],
+                            )
+                        progress.finish_task(distance=point[0], error_rate=point[1])
+                    yield record
+        finally:
+            # Stop the running tasks after their current batch and wait for them
+            # without blocking the event loop, so that no sampling outlives the sweep
+            cancel_event.set()
+            stopping = set(running)
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(
+                *(asyncio.wrap_future(future) for future in stopping),
+                return_exceptions=True,
+            )
+            if own_executor:
+                await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        executor.shutdown, wait=True, cancel_futures=True
+                    ),
+                )
+            await loop.run_in_executor(None, manager.shutdown)
+
+    async def acollect_stats(
+        self,
+        num_shots: int,
+        num_workers: int | None = 1,
+        batch_size: int | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+        progress_interval: float = 1.0,
+        max_errors: int | None = None,
+        seed: int | None = None,
+        executor: Executor | None = None,
+        max_pending: int | None = None,
+        points: list[tuple[int, float]] | None = None,
+    ) -> None:
+        r"""
+        Asynchronous counterpart of :meth:`collect_stats`. See
+        :meth:`astream_stats` for the parameters and for cancellation.
+        """
+
+        async for _ in self.astream_stats(
+            num_shots=num_shots,
+            num_workers=num_workers,
+            batch_size=batch_size,
+            progress_callback=progress_callback,
+            progress_interval=progress_interval,
+            max_errors=max_errors,
+            seed=seed,
+            executor=executor,
+            max_pending=max_pending,
+            points=points,
+        ):
+            pass
+
+        self.update_stats()
+
+    def sample_point(
+        self,
+        distance: int,
+        error_rate: float,
+        num_shots: int,
+        batch_size: int | None = None,
+        batch_callback: Callable[[int, int], None] | None = None,
+        seed: int | None = None,
+    ) -> int:
+        r"""
+        Sample a single (distance, error rate) point and add it to the tallies.
+
+        :param distance: The distance of the code.
+        :param error_rate: The physical error rate.
+        :param num_shots: The number of samples.
+        :param batch_size: The number of samples drawn and decoded at once.
+        :param batch_callback: A function called with the number of shots and of
+            errors of each batch.
+        :param seed: The seed of the sampler.
+        """
+
+        record = self.sample_task(
+            spec=self.task_spec(distance=distance, error_rate=error_rate),
+            num_shots=num_shots,
+            batch_size=batch_size,
+            batch_callback=batch_callback,
+            seed=seed,
+            cache=self.cache,
+            bases=self.bases,
+        )
+        self.add_record(record)
+        return record["errors"]
+
+    def collect_stats_pipeline(
+        self,
+        num_shots: int,
+        num_samplers: int = 1,
+        num_decoders: int = 1,
+        batch_size: int = 10**4,
+    ) -> None:
+        r"""
+        Collect sampling statistics with the sampling and the decoding of each
+        point running in separate processes, which exchange the syndromes through
+        shared memory. See
+        :func:`qec.lab.threshold.shared_pipeline.compute_logical_errors_shared`.
+
+        :param num_shots: The number of samples per distance and error rate.
+        :param num_samplers: The number of sampler processes.
+        :param num_decoders: The number of decoder processes.
+        :param batch_size: The number of shots of a batch.
+        """
+
+        for distance in self.distances:
+            for prob_error in self.error_rates:
+
+                spec = self.task_spec(distance=distance, error_rate=prob_error)
+
+                start = time.perf_counter()
+                num_errors = sum(
+                    compute_logical_errors_shared(
+                        spec=spec.replace(basis=basis),
+                        num_shots=num_shots,
+                        num_samplers=num_samplers,
+                        num_decoders=num_decoders,
+                        batch_size=batch_size,
+                        cache=self.cache,
+                    )
+                    for basis in self.bases
+                )
+                seconds = time.perf_counter() - start
+                shots = num_shots * len(self.bases)
+
+                self.add_record(
+                    {
+                        "distance": distance,
+                        "error_rate": prob_error,
+                        "basis": "".join(self.bases),
+                        "shots": shots,
+                        "errors": num_errors,
+                        "seconds": seconds,
+                        "shots_per_second": shots / seconds,
+                        "peak_rss": _peak_rss(),
+                    }
                 )
-                code.build_memory_circuit(number_of_rounds=distance * 3)
 
-                # Get the logical error rate
-                num_errors_sampled = self.compute_logical_errors(
-                    code=code, num_shots=num_shots
+        self.update_stats()
+
+    def submit_stats(
+        self, queue: WorkQueue, num_shots: int, num_batches: int = 1
+    ) -> list[str]:
+        r"""
+        Split the sweep into tasks of a file-based work queue and return their
+        ids. Workers on any host sharing the queue directory run them with
+        :meth:`run_worker`, then :meth:`merge_stats` gathers the results.
+
+        :param queue: The work queue.
+        :param num_shots: The number of samples per distance and error rate.
+        :param num_batches: The number of tasks each point is split into.
+        """
+
+        tasks = []
+        for distance in self.distances:
+            for prob_error in self.error_rates:
+                spec = self.task_spec(distance=distance, error_rate=prob_error)
+                for batch in range(num_batches):
+                    shots = num_shots // num_batches + (batch < num_shots % num_batches)
+                    tasks.append(
+                        {
+                            "spec": spec.to_dict(),
+                            "num_shots": shots,
+                            "batch": batch,
+                            "bases": self.bases,
+                        }
+                    )
+        return queue.submit(tasks)
+
+    @staticmethod
+    def run_worker(
+        queue: WorkQueue,
+        cache: ArtifactCache | None = None,
+        max_tasks: int | None = None,
+        worker: str | None = None,
+    ) -> int:
+        r"""
+        Claim and run the tasks of a work queue until none is left, and return the
+        number of completed tasks. The lease of the running task is renewed every
+        third of the lease duration, and the task is dropped if its lease was taken
+        over by another worker.
+
+        :param queue: The work queue.
+        :param cache: The cache of the compiled artifacts.
+        :param max_tasks: The maximum number of tasks to run.
+        :param worker: The name of the worker.
+        """
+
+        num_tasks = 0
+        while max_tasks is None or num_tasks < max_tasks:
+
+            claimed = queue.claim(worker=worker)
+            if claimed is None:
+                break
+
+            task_id, task = claimed
+
+            # Renew the lease while the task runs, so that a task slower than the
+            # lease is not claimed and counted again by another worker. A task
+            # whose lease was taken over anyway is dropped, the other worker
+            # completes it
+            stop = threading.Event()
+            lost = threading.Event()
+            heartbeat = threading.Thread(
+                target=_renew_lease,
+                kwargs={
+                    "queue": queue,
+                    "task_id": task_id,
+                    "worker": worker,
+                    "stop": stop,
+                    "lost": lost,
+                },
+                daemon=True,
+            )
+            heartbeat.start()
+            try:
+                record = ThresholdLAB.sample_task(
+                    spec=CodeSpec.from_dict(task["spec"]),
+                    num_shots=task["num_shots"],
+                    cache=cache,
+                    bases=task.get("bases"),
+                    cancel_event=lost,
                 )
-                temp_logical_error_rate.append(num_errors_sampled / num_shots)
+            except CancelledError:
+                continue
+            finally:
+                stop.set()
+                heartbeat.join()
+            if lost.is_set():
+                continue
+            queue.complete(task_id=task_id, result=record)
+            num_tasks += 1
+
+        return num_tasks
+
+    def merge_stats(self, queue: WorkQueue) -> None:
+        r"""
+        Rebuild the tallies, timings and collected_stats from the results of a
+        work queue. Merging again after more tasks completed does not count the
+        previous results twice. Only the results of tasks with the specification
+        and bases of this lab are merged, so that the counts of a queue shared
+        with another experiment, of other rounds or noise, are not pooled.
+
+        :param queue: The work queue.
+        """
+
+        self._tallies = {}
+        self._collected_timings = []
+
+        for task, record in queue.results():
+            spec = CodeSpec.from_dict(task["spec"])
+            if spec.code is not self.code:
+                continue
+            expected = self.task_spec(
+                distance=spec.distance, error_rate=spec.depolarize1_rate
+            )
+            if spec == expected and task.get("bases", [spec.basis]) == self.bases:
+                self.add_record(record)
+
+        self.update_stats()
+
+    def export_syndromes(
+        self,
+        directory: str,
+        distance: int,
+        error_rate: float,
+        num_shots: int,
+        seed: int | None = None,
+    ) -> SyndromeDataset:
+        r"""
+        Sample a (distance, error rate) point to a memory-mapped syndrome dataset,
+        so that decoders can later be compared on the same samples with
+        :meth:`qec.lab.threshold.syndrome_dataset.SyndromeDataset.replay`.
+
+        :param directory: The directory of the dataset.
+        :param distance: The distance of the code.
+        :param error_rate: The physical error rate.
+        :param num_shots: The number of samples.
+        :param seed: The seed of the sampler.
+        """
+
+        spec = self.task_spec(distance=distance, error_rate=error_rate)
+
+        circuit = None if self.cache is None else self.cache.get(spec.key, "circuit")
+        if circuit is None:
+            circuit = spec.build(cache=self.cache).memory_circuit
+
+        return SyndromeDataset.record(
+            directory=directory,
+            circuit=circuit,
+            num_shots=num_shots,
+            metadata={
+                "code": self.code_name,
+                "distance": distance,
+                "error_rate": float(error_rate),
+                "number_of_rounds": spec.number_of_rounds,
+            },
+            seed=seed,
+        )
+
+    def update_stats(self) -> None:
+        r"""
+        Rebuild the logical error rates in collected_stats from the tallies.
+        """
+
+        for distance in self.distances:
+            logical_error_rate = []
+            for prob_error in self.error_rates:
+                shots, errors = self._tallies.get((distance, prob_error), (0, 0))
+                logical_error_rate.append(errors / shots if shots else float("nan"))
+            self._collected_stats[distance] = logical_error_rate
+
+    def find_crossing(self) -> tuple[float, float, float] | None:
+        r"""
+        Locate where the logical error rate curves of consecutive distances cross.
+
+        Below the threshold a larger distance gives a lower logical error rate and
+        above it a higher one. For each pair of consecutive distances the first
+        sign change of their difference is bracketed and linearly interpolated.
+        Return the averaged crossing estimate with the lowest and highest bracket
+        bounds, or None if no pair of curves crosses.
+        """
+
+        error_rates = np.asarray(self.error_rates, dtype=float)
+        distances = sorted(self.distances)
+        estimates, lows, highs = [], [], []
+
+        for d_small, d_large in zip(distances[:-1], distances[1:]):
+
+            diff = np.asarray(self.collected_stats[d_large]) - np.asarray(
+                self.collected_stats[d_small]
+            )
+
+            # Points where both curves agree (e.g. no errors at all) carry no sign
+            informative = np.flatnonzero(np.nan_to_num(diff) != 0)
+
+            for i, j in zip(informative[:-1], informative[1:]):
+                if diff[i] < 0 < diff[j]:
+                    lows.append(error_rates[i])
+                    highs.append(error_rates[j])
+                    estimates.append(
+                        error_rates[i]
+                        + (error_rates[j] - error_rates[i])
+                        * diff[i]
+                        / (diff[i] - diff[j])
+                    )
+                    break
+
+        if not estimates:
+            return None
+
+        return float(np.mean(estimates)), float(min(lows)), float(max(highs))
 
-            self._collected_stats[distance] = temp_logical_error_rate
+    def fit_threshold(
+        self,
+        confidence: float = 0.95,
+        error_rate_range: tuple[float, float] | None = None,
+    ) -> dict:
+        r"""
+        Fit the threshold on the collected tallies with the finite-size scaling
+        ansatz. See :func:`qec.lab.threshold.threshold_fit.fit_threshold`.
+
+        :param confidence: The confidence level of the interval.
+        :param error_rate_range: The error rates to include. Default to the
+            neighbourhood of the crossing of the curves.
+        """
+
+        crossing = self.find_crossing()
+
+        if error_rate_range is None and crossing is not None:
+            _, low, high = crossing
+            error_rate_range = (low - (high - low), high + (high - low))
+
+        return fit_threshold(
+            self.tallies,
+            confidence=confidence,
+            error_rate_range=error_rate_range,
+            threshold_guess=None if crossing is None else crossing[0],
+        )
+
+    def fit_suppression_factor(
+        self, error_rate: float, confidence: float = 0.95
+    ) -> dict:
+        r"""
+        Fit the error suppression factor Lambda at the given error rate. See
+        :func:`qec.lab.threshold.threshold_fit.fit_suppression_factor`.
+
+        :param error_rate: The physical error rate at which Lambda is computed.
+        :param confidence: The confidence level of the interval.
+        """
+        return fit_suppression_factor(
+            self.tallies, error_rate=error_rate, confidence=confidence
+        )
+
+    def collect_stats_adaptive(
+        self,
+        num_shots: int,
+        precision: float,
+        max_iterations: int = 10,
+        num_points: int = 3,
+        confidence: float = 0.95,
+        seed: int | None = None,
+    ) -> float | None:
+        r"""
+        Collect sampling statistics while refining the error rates around the
+        threshold.
+
+        The current error rates are used as a coarse grid, without the points at
+        p = 0 that never produce errors. At each iteration the crossing of the
+        curves is bracketed, new error rates are inserted inside the bracket and
+        the bracket bounds are sampled again. The refinement stops as soon as the
+        bracket, or the confidence interval of the threshold fit, is narrower than
+        the requested precision. Return the threshold estimate, or None if the
+        curves do not cross.
+
+        :param num_shots: The number of samples per point and iteration.
+        :param precision: The targeted width of the interval around the threshold.
+        :param max_iterations: The maximum number of refinement iterations.
+        :param num_points: The number of error rates inserted at each iteration.
+        :param confidence: The confidence level of the threshold fit.
+        :param seed: The seed of the refinement. The points sampled at each
+            iteration take the task seeds following those of the coarse grid.
+        """
+
+        error_rates = np.asarray(self.error_rates, dtype=float)
+        self._error_rates = np.unique(error_rates[error_rates > 0])
+        self.collect_stats(num_shots=num_shots, seed=seed)
+        num_tasks = len(self.distances) * len(self.error_rates)
+
+        for _ in range(max_iterations):
+
+            crossing = self.find_crossing()
+            if crossing is None:
+                return None
+
+            _, low, high = crossing
+            if high - low <= precision:
+                break
+
+            fit = self._try_fit_threshold(confidence=confidence)
+            if fit is not None and fit["interval"][1] - fit["interval"][0] <= precision:
+                return fit["threshold"]
+
+            new_error_rates = np.linspace(low, high, num_points + 2)[1:-1]
+            new_error_rates = new_error_rates[
+                ~np.isclose(new_error_rates[:, None], self.error_rates).any(axis=1)
+            ]
+            self._error_rates = np.union1d(self.error_rates, new_error_rates)
+
+            # Spend the shots inside the bracket, where the curves are close
+            for distance in self.distances:
+                for prob_error in [low, *new_error_rates, high]:
+                    self.sample_point(
+                        distance=distance,
+                        error_rate=prob_error,
+                        num_shots=num_shots,
+                        seed=_task_seed(seed=seed, index=num_tasks),
+                    )
+                    num_tasks += 1
+            self.update_stats()
+
+        crossing = self.find_crossing()
+        return None if crossing is None else crossing[0]
+
+    def _try_fit_threshold(self, confidence: float) -> dict | None:
+        r"""
+        Return the threshold fit, or None if it cannot be performed yet.
+        """
+        try:
+            fit = self.fit_threshold(confidence=confidence)
+        except (ValueError, RuntimeError):
+            return None
+
+        if not np.all(np.isfinite(fit["interval"])):
+            return None
+        return fit
 
     def plot_stats(
         self,
@@ -154,6 +1782,8 @@ class ThresholdLAB:
     ) -> None:
         r"""Plot the collected data"""
 
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots(1, 1)
 
         for distance in self.collected_stats.keys():
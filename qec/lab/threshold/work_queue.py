@@ -0,0 +1,267 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+from collections.abc import Iterator
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+import uuid
+
+__all__ = ["WorkQueue"]
+
+
+class WorkQueue:
+    r"""
+    A class for a work queue shared through a directory.
+
+    Tasks, leases and results are plain files, so that workers on any number of
+    hosts only need a shared filesystem. A worker claims a task by creating its
+    lock file exclusively, and the lease can be taken over once it expires. Task
+    ids are derived from the task content and results are written atomically, so
+    submitting or completing a task twice has no effect.
+
+    Lease expiry compares wall-clock times, the clocks of the hosts must agree to
+    within a small fraction of the lease duration.
+    """
+
+    __slots__ = ("_directory", "_lease_seconds")
+
+    def __init__(self, directory: str, lease_seconds: float = 3600) -> None:
+        r"""
+        Initialization of the Work Queue class.
+
+        :param directory: The shared directory of the queue, created if needed.
+        :param lease_seconds: The duration after which a claimed task that is not
+            completed can be claimed again.
+        """
+
+        self._directory = directory
+        self._lease_seconds = lease_seconds
+
+        for folder in ["tasks", "leases", "results"]:
+            os.makedirs(os.path.join(directory, folder), exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        r"""
+        The shared directory of the queue.
+        """
+        return self._directory
+
+    @property
+    def lease_seconds(self) -> float:
+        r"""
+        The duration of a lease.
+        """
+        return self._lease_seconds
+
+    @staticmethod
+    def task_id(task: dict) -> str:
+        r"""
+        Return the id of a task, derived from its content.
+
+        :param task: The JSON serializable task.
+        """
+        content = json.dumps(task, sort_keys=True).encode()
+        return hashlib.sha1(content).hexdigest()[:16]
+
+    def submit(self, tasks: list[dict]) -> list[str]:
+        r"""
+        Add tasks to the queue and return their ids. Tasks already in the queue
+        are left untouched.
+
+        :param tasks: The JSON serializable tasks.
+        """
+
+        task_ids = []
+        for task in tasks:
+            task_id = self.task_id(task)
+            path = self._path("tasks", task_id)
+            if not os.path.exists(path):
+                self._write_json(path, task)
+            task_ids.append(task_id)
+        return task_ids
+
+    def task(self, task_id: str) -> dict:
+        r"""
+        Return the content of a task.
+
+        :param task_id: The id of the task.
+        """
+        with open(self._path("tasks", task_id)) as f:
+            return json.load(f)
+
+    def task_ids(self) -> list[str]:
+        r"""
+        Return the ids of every task in the queue.
+        """
+        return sorted(
+            name[: -len(".json")]
+            for name in os.listdir(os.path.join(self.directory, "tasks"))
+            if name.endswith(".json")
+        )
+
+    def pending(self) -> list[str]:
+        r"""
+        Return the ids of the tasks without a result.
+        """
+        return [
+            task_id
+            for task_id in self.task_ids()
+            if not os.path.exists(self._path("results", task_id))
+        ]
+
+    def claim(self, worker: str | None = None) -> tuple[str, dict] | None:
+        r"""
+        Lease a pending task and return its id and content, or None if every
+        pending task is leased.
+
+        :param worker: The name of the worker. Default to the host and process id.
+        """
+
+        if worker is None:
+            worker = f"{socket.gethostname()}-{os.getpid()}"
+
+        for task_id in self.pending():
+            if self._acquire(task_id=task_id, worker=worker):
+                # The task may have been completed while it was being acquired
+                if os.path.exists(self._path("results", task_id)):
+                    self.release(task_id)
+                    continue
+                return task_id, self.task(task_id)
+        return None
+
+    def renew(self, task_id: str, worker: str | None = None) -> bool:
+        r"""
+        Extend the lease of a claimed task by a full lease duration, and return
+        whether it was extended. A lease that expired and was taken over by
+        another worker, or released, is left untouched.
+
+        :param task_id: The id of the task.
+        :param worker: The name of the worker. Default to the host and process id.
+        """
+        if worker is None:
+            worker = f"{socket.gethostname()}-{os.getpid()}"
+
+        path = self._path("leases", task_id, ".lock")
+        try:
+            with open(path) as f:
+                owner = json.load(f)["worker"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return False
+        if owner != worker:
+            return False
+
+        self._write_json(
+            path, {"worker": worker, "expires": time.time() + self.lease_seconds}
+        )
+        return True
+
+    def release(self, task_id: str) -> None:
+        r"""
+        Remove the lease of a task.
+
+        :param task_id: The id of the task.
+        """
+        try:
+            os.remove(self._path("leases", task_id, ".lock"))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, task_id: str, result: dict) -> None:
+        r"""
+        Store the result of a task and release its lease. If the task already has
+        a result, it is kept and the new one is discarded.
+
+        :param task_id: The id of the task.
+        :param result: The JSON serializable result.
+        """
+        path = self._path("results", task_id)
+        if not os.path.exists(path):
+            self._write_json(path, result)
+        self.release(task_id)
+
+    def results(self) -> Iterator[tuple[dict, dict]]:
+        r"""
+        Yield the content and the result of every completed task.
+        """
+        for task_id in self.task_ids():
+            path = self._path("results", task_id)
+            if os.path.exists(path):
+                with open(path) as f:
+                    yield self.task(task_id), json.load(f)
+
+    def _acquire(self, task_id: str, worker: str) -> bool:
+        r"""
+        Try to create the lock file of a task, taking over an expired lease.
+        """
+
+        path = self._path("leases", task_id, ".lock")
+        lease = json.dumps(
+            {"worker": worker, "expires": time.time() + self.lease_seconds}
+        )
+
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(path) as f:
+                        expires = json.load(f)["expires"]
+                except (FileNotFoundError, ValueError, KeyError):
+                    # Being written or removed by another worker
+                    return False
+
+                if expires > time.time():
+                    return False
+
+                # Only one worker succeeds in moving the expired lease away
+                expired_path = f"{path}.{uuid.uuid4().hex}.expired"
+                try:
+                    os.rename(path, expired_path)
+                except FileNotFoundError:
+                    return False
+
+                # Another worker may have renewed the lease in the meantime, then
+                # put it back unless a new lease was created since
+                with open(expired_path) as f:
+                    if json.load(f)["expires"] > time.time():
+                        try:
+                            os.link(expired_path, path)
+                        except FileExistsError:
+                            pass
+                        os.remove(expired_path)
+                        return False
+                os.remove(expired_path)
+                continue
+
+            with os.fdopen(fd, "w") as f:
+                f.write(lease)
+            return True
+
+        return False
+
+    def _path(self, folder: str, task_id: str, extension: str = ".json") -> str:
+        return os.path.join(self.directory, folder, task_id + extension)
+
+    def _write_json(self, path: str, data: dict) -> None:
+        r"""
+        Write the file atomically, readers never see a partial file.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
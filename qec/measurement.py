@@ -100,3 +100,23 @@ class Measurement:
         }
 
         self._register_count += 1
+
+    def truncate(self, register_count: int) -> None:
+        r"""
+        Remove the outcomes registered after the first register_count ones.
+
+        :param register_count: The number of outcomes to keep.
+        """
+
+        for round in list(self._data):
+            outcomes = self._data[round]
+            for qubit in [
+                qubit
+                for qubit, outcome in outcomes.items()
+                if outcome["register_id"] >= register_count
+            ]:
+                del outcomes[qubit]
+            if not outcomes:
+                del self._data[round]
+
+        self._register_count = min(self._register_count, register_count)
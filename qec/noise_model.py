@@ -0,0 +1,248 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from stim import Circuit, CircuitInstruction, CircuitRepeatBlock, GateData, gate_data
+
+__all__ = ["NoiseModel"]
+
+
+@lru_cache(maxsize=None)
+def _gate_data(name: str) -> GateData:
+    r"""
+    Return the data of a gate, looked up once per name.
+    """
+    return gate_data(name)
+
+
+def _instruction(name: str, targets: list[int], arg: float) -> str:
+    r"""
+    Return the line of a Stim program applying the channel to the targets.
+    """
+    return f"{name}({float(arg)!r}) " + " ".join(map(str, targets))
+
+
+class NoiseModel:
+    r"""
+    A circuit-level noise model added layer by layer to a noiseless circuit.
+
+    The layers of the circuit are separated by TICK instructions. The active and
+    idle qubits of each layer are found once, and each channel is inserted as a
+    single instruction over every qubit it acts on in the layer:
+
+    - DEPOLARIZE1 after single qubit gates and resets, and before measurements,
+    - DEPOLARIZE2 after two-qubit gates,
+    - X_ERROR after Z basis resets and Z_ERROR after X basis resets,
+    - the flip probability of the measurements,
+    - DEPOLARIZE1 on the qubits idle during the layer.
+
+    Annotations and noise channels already in the circuit are kept as they are.
+    """
+
+    __slots__ = (
+        "_depolarize1_rate",
+        "_depolarize2_rate",
+        "_idle_rate",
+        "_measurement_flip_rate",
+        "_reset_flip_rate",
+    )
+
+    def __init__(
+        self,
+        depolarize1_rate: float = 0,
+        depolarize2_rate: float = 0,
+        idle_rate: float = 0,
+        measurement_flip_rate: float = 0,
+        reset_flip_rate: float = 0,
+    ) -> None:
+        r"""
+        Initialization of the Noise Model class.
+
+        :param depolarize1_rate: Single qubit depolarization rate, after single
+            qubit gates and resets and before measurements.
+        :param depolarize2_rate: Two qubit depolarization rate, after two-qubit
+            gates.
+        :param idle_rate: Single qubit depolarization rate of the qubits idle
+            during a layer.
+        :param measurement_flip_rate: Probability of flipping a measurement result.
+        :param reset_flip_rate: Probability of resetting to the orthogonal state.
+        """
+
+        self._depolarize1_rate = depolarize1_rate
+        self._depolarize2_rate = depolarize2_rate
+        self._idle_rate = idle_rate
+        self._measurement_flip_rate = measurement_flip_rate
+        self._reset_flip_rate = reset_flip_rate
+
+    def __repr__(self) -> str:
+        return (
+            f"NoiseModel(depolarize1_rate={self.depolarize1_rate}, "
+            f"depolarize2_rate={self.depolarize2_rate}, idle_rate={self.idle_rate}, "
+            f"measurement_flip_rate={self.measurement_flip_rate}, "
+            f"reset_flip_rate={self.reset_flip_rate})"
+        )
+
+    @property
+    def depolarize1_rate(self) -> float:
+        r"""
+        The depolarization rate for single qubit gate.
+        """
+        return self._depolarize1_rate
+
+    @property
+    def depolarize2_rate(self) -> float:
+        r"""
+        The depolarization rate for two-qubit gate.
+        """
+        return self._depolarize2_rate
+
+    @property
+    def idle_rate(self) -> float:
+        r"""
+        The depolarization rate of idle qubits.
+        """
+        return self._idle_rate
+
+    @property
+    def measurement_flip_rate(self) -> float:
+        r"""
+        The probability of flipping a measurement result.
+        """
+        return self._measurement_flip_rate
+
+    @property
+    def reset_flip_rate(self) -> float:
+        r"""
+        The probability of resetting to the orthogonal state.
+        """
+        return self._reset_flip_rate
+
+    def apply(self, circuit: Circuit, qubits: list[int] | None = None) -> Circuit:
+        r"""
+        Return the circuit with the noise added to each of its layers. The body of
+        a REPEAT block is processed once.
+
+        :param circuit: The noiseless circuit, with layers separated by TICK.
+        :param qubits: The qubits that idle when not acted on. Default to every
+            qubit of the circuit.
+        """
+
+        if qubits is None:
+            qubits = range(circuit.num_qubits)
+
+        noisy = Circuit()
+        layer = []
+        start = 0
+        for index, instruction in enumerate(circuit):
+            if isinstance(instruction, CircuitRepeatBlock):
+                body = self.apply(circuit=instruction.body_copy(), qubits=qubits)
+                block = CircuitRepeatBlock(instruction.repeat_count, body)
+            elif instruction.name == "TICK":
+                block = "TICK"
+            else:
+                layer.append(instruction)
+                continue
+
+            self._append_layer(
+                noisy=noisy, copy=circuit[start:index], layer=layer, qubits=qubits
+            )
+            noisy.append(block)
+            layer = []
+            start = index + 1
+
+        self._append_layer(
+            noisy=noisy, copy=circuit[start:], layer=layer, qubits=qubits
+        )
+        return noisy
+
+    def _append_layer(
+        self,
+        noisy: Circuit,
+        copy: Circuit,
+        layer: list[CircuitInstruction],
+        qubits: list[int],
+    ) -> None:
+        r"""
+        Append the instructions of a layer surrounded by its merged noise. The
+        instructions left unchanged are appended as slices of the copy of the
+        layer and the noise as program text, both much faster than appending
+        instructions or target lists one by one.
+        """
+
+        before_measurements = []
+        after_gates = []
+        after_two_qubit_gates = []
+        after_z_resets = []
+        after_x_resets = []
+        active = set()
+        flipped = []
+
+        for index, instruction in enumerate(layer):
+            name = instruction.name
+            gate = _gate_data(name)
+            if not (gate.is_unitary or gate.is_reset or gate.produces_measurements):
+                continue
+
+            targets = [target.value for target in instruction.targets_copy()]
+            active.update(targets)
+
+            if gate.produces_measurements:
+                before_measurements += targets
+                if self.measurement_flip_rate and not instruction.gate_args_copy():
+                    flipped.append(index)
+            if gate.is_reset:
+                after_gates += targets
+                if name in ("RX", "MRX"):
+                    after_x_resets += targets
+                else:
+                    after_z_resets += targets
+            elif gate.is_two_qubit_gate:
+                after_two_qubit_gates += targets
+            elif gate.is_unitary:
+                after_gates += targets
+
+        if before_measurements and self.depolarize1_rate:
+            noisy.append_from_stim_program_text(
+                _instruction("DEPOLARIZE1", before_measurements, self.depolarize1_rate)
+            )
+
+        start = 0
+        for index in flipped:
+            noisy += copy[start:index]
+            name, targets = str(layer[index]).split(" ", 1)
+            noisy.append_from_stim_program_text(
+                f"{name}({float(self.measurement_flip_rate)!r}) {targets}"
+            )
+            start = index + 1
+        noisy += copy[start:]
+
+        after = [
+            _instruction(channel, targets, rate)
+            for channel, targets, rate in [
+                ("DEPOLARIZE1", after_gates, self.depolarize1_rate),
+                ("DEPOLARIZE2", after_two_qubit_gates, self.depolarize2_rate),
+                ("X_ERROR", after_z_resets, self.reset_flip_rate),
+                ("Z_ERROR", after_x_resets, self.reset_flip_rate),
+            ]
+            if targets and rate
+        ]
+
+        if active and self.idle_rate:
+            idle = [q for q in qubits if q not in active]
+            if idle:
+                after.append(_instruction("DEPOLARIZE1", idle, self.idle_rate))
+
+        if after:
+            noisy.append_from_stim_program_text("\n".join(after))
@@ -0,0 +1,53 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from qec import CodeFamily, RepetitionCode, RotatedSurfaceCode
+
+
+class TestCodeFamily:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.family = CodeFamily(
+            code=RotatedSurfaceCode,
+            distances=[5, 3],
+            depolarize1_rate=0.01,
+            depolarize2_rate=0.01,
+        )
+
+    def test_init(self):
+        assert self.family.distances == [3, 5]
+        assert len(self.family) == 2
+        assert 5 in self.family
+        assert self.family[3] is self.family[3]
+        assert [code.distance for code in self.family] == [3, 5]
+
+    def test_memory_circuits(self):
+        self.family.build_memory_circuits(rounds_per_distance=2)
+
+        for code in self.family:
+            reference = RotatedSurfaceCode(
+                distance=code.distance, depolarize1_rate=0.01, depolarize2_rate=0.01
+            )
+            reference.build_memory_circuit(number_of_rounds=2 * code.distance)
+            assert code.memory_circuit == reference.memory_circuit
+
+    def test_add(self):
+        self.family.add([3, 7])
+        assert self.family.distances == [3, 5, 7]
+        assert self.family[7].graph.number_of_nodes() == 2 * 7**2 - 1
+
+    def test_default_family(self):
+        family = CodeFamily(code=RepetitionCode, distances=[3, 5])
+        assert family[5].graph.number_of_nodes() == 9
@@ -0,0 +1,89 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+import pytest
+
+from qec import CodeSpec, RotatedSurfaceCode
+
+
+class TestCodeSpec:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.spec = CodeSpec(
+            code=RotatedSurfaceCode,
+            distance=3,
+            depolarize1_rate=0.01,
+            depolarize2_rate=0.02,
+            number_of_rounds=2,
+        )
+
+    def test_init(self):
+        assert self.spec.code is RotatedSurfaceCode
+        assert self.spec.distance == 3
+        assert self.spec.depolarize1_rate == 0.01
+        assert self.spec.depolarize2_rate == 0.02
+        assert self.spec.number_of_rounds == 2
+
+        with pytest.raises(AttributeError):
+            self.spec.distance = 5
+
+    def test_pickle(self):
+        data = pickle.dumps(self.spec)
+        assert len(data) < 200
+        assert pickle.loads(data) == self.spec
+        assert hash(pickle.loads(data)) == hash(self.spec)
+
+    def test_build(self):
+        code = self.spec.build()
+        assert isinstance(code, RotatedSurfaceCode)
+        assert code.spec == self.spec
+        assert (
+            code.memory_circuit
+            == pickle.loads(pickle.dumps(self.spec)).build().memory_circuit
+        )
+
+    def test_slots(self):
+        code = CodeSpec(code=RotatedSurfaceCode).build()
+        assert not hasattr(code, "__dict__")
+        assert code.number_of_rounds is None
+
+    def test_dict(self):
+        data = self.spec.to_dict()
+        assert data["code"] == ("qec.codes.rotated_surface_code:RotatedSurfaceCode")
+        assert CodeSpec.from_dict(data) == self.spec
+
+    def test_basis(self):
+        spec = self.spec.replace(basis="X")
+        assert spec.basis == "X" and self.spec.basis == "Z"
+        assert spec != self.spec and spec.key != self.spec.key
+        assert CodeSpec.from_dict(spec.to_dict()) == spec
+        assert spec.build().spec == spec
+
+        with pytest.raises(ValueError):
+            self.spec.replace(basis="Y")
+
+    def test_noise_rates(self):
+        spec = self.spec.replace(idle_rate=0.001, measurement_flip_rate=0.002)
+        assert (spec.idle_rate, spec.measurement_flip_rate, spec.reset_flip_rate) == (
+            0.001,
+            0.002,
+            0,
+        )
+        assert spec.key != self.spec.key
+        assert CodeSpec.from_dict(spec.to_dict()) == spec
+
+        code = spec.build()
+        assert code.spec == spec
+        assert code.noise_model.measurement_flip_rate == 0.002
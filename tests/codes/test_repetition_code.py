@@ -35,3 +35,10 @@ class TestRepetitionCode:
     def test_build_memory_circuit(self):
         self.code.build_memory_circuit(number_of_rounds=2)
         assert type(self.code.memory_circuit) == Circuit
+
+    def test_estimate_resources(self):
+        estimate = self.code.estimate_resources(number_of_rounds=3)
+        self.code.build_memory_circuit(number_of_rounds=3)
+        assert estimate["num_qubits"] == self.code.memory_circuit.num_qubits
+        assert estimate["num_detectors"] == self.code.memory_circuit.num_detectors
+        assert estimate["num_measurements"] == self.code.memory_circuit.num_measurements
@@ -14,7 +14,7 @@ import pytest
 
 import stim
 
-from qec import RotatedSurfaceCode, Measurement
+from qec import ArtifactCache, RotatedSurfaceCode, Measurement
 
 
 class TestRotatedSurfaceCode:
@@ -37,3 +37,117 @@ class TestRotatedSurfaceCode:
         self.code.add_outcome(outcome="0", qubit=0, round=0, type="check")
         assert isinstance(self.code.get_target_rec(qubit=0, round=0), int)
         assert self.code.get_target_rec(qubit=1000, round=0) == None
+
+    def test_estimate_resources(self):
+        estimate = self.code.estimate_resources(number_of_rounds=4)
+        self.code.build_memory_circuit(number_of_rounds=4)
+        circuit = self.code.memory_circuit
+        assert estimate["num_qubits"] == circuit.num_qubits
+        assert estimate["num_detectors"] == circuit.num_detectors
+        assert estimate["num_measurements"] == circuit.num_measurements
+
+        dem = circuit.detector_error_model(decompose_errors=False)
+        assert estimate["num_dem_errors"] >= dem.num_errors
+
+    def test_extend_memory_circuit(self):
+        self.code.build_memory_circuit(number_of_rounds=1)
+        for number_of_rounds in [2, 4, 4, 3]:
+            self.code.extend_memory_circuit(number_of_rounds=number_of_rounds)
+            assert self.code.number_of_rounds == number_of_rounds
+
+            code = RotatedSurfaceCode(
+                distance=3, depolarize1_rate=0.01, depolarize2_rate=0
+            )
+            code.build_memory_circuit(number_of_rounds=number_of_rounds)
+            assert self.code.memory_circuit == code.memory_circuit
+            assert self.code.measurement.data == code.measurement.data
+
+    def test_cache_hit(self):
+        cache = ArtifactCache()
+        self.code.build_memory_circuit(number_of_rounds=3, cache=cache)
+
+        # The record of a cached circuit is the one of a generated circuit
+        code = RotatedSurfaceCode(distance=3, depolarize1_rate=0.01, depolarize2_rate=0)
+        code.build_memory_circuit(number_of_rounds=3, cache=cache)
+        assert code.memory_circuit is cache.get(key=code.cache_key, kind="circuit")
+        assert code.measurement.data == self.code.measurement.data
+        assert code.register_count == code.memory_circuit.num_measurements
+
+        code.extend_memory_circuit(number_of_rounds=4)
+        self.code.extend_memory_circuit(number_of_rounds=4)
+        assert code.memory_circuit == self.code.memory_circuit
+        assert code.measurement.data == self.code.measurement.data
+
+    def test_build_memory_circuits(self):
+        circuits = self.code.build_memory_circuits(number_of_rounds=3)
+        assert list(circuits) == ["Z", "X"]
+        assert self.code.memory_circuit == circuits["Z"]
+
+        for basis, circuit in circuits.items():
+            code = RotatedSurfaceCode(
+                distance=3, depolarize1_rate=0.01, depolarize2_rate=0
+            )
+            code.build_memory_circuit(number_of_rounds=3, basis=basis)
+            assert code.basis == basis
+            assert code.memory_circuit == circuit
+
+            # The detectors and the observable are deterministic without noise
+            sampler = (
+                RotatedSurfaceCode(distance=3)
+                .build_memory_circuits(number_of_rounds=3, bases=[basis])[basis]
+                .compile_detector_sampler()
+            )
+            detection_events, flips = sampler.sample(100, separate_observables=True)
+            assert not detection_events.any() and not flips.any()
+
+        with pytest.raises(ValueError):
+            self.code.build_memory_circuit(number_of_rounds=3, basis="Y")
+
+    def test_noise_model(self):
+        code = RotatedSurfaceCode(
+            distance=3,
+            depolarize1_rate=0.01,
+            depolarize2_rate=0.01,
+            idle_rate=0.001,
+            measurement_flip_rate=0.001,
+            reset_flip_rate=0.001,
+        )
+        code.build_memory_circuit(number_of_rounds=3)
+
+        # One instruction per channel in each layer of a round
+        counts = {}
+        for instruction in code.memory_circuit.flattened():
+            counts[instruction.name] = counts.get(instruction.name, 0) + 1
+        assert counts["DEPOLARIZE2"] == 3 * 4
+        assert counts["MR"] == 3
+        assert code.memory_circuit.without_noise() == (
+            RotatedSurfaceCode(distance=3).build_memory_circuits(
+                number_of_rounds=3, bases=["Z"]
+            )["Z"]
+        )
+        assert code.cache_key != self.code.cache_key
+
+    def test_draw_graph(self, tmp_path, monkeypatch):
+        pytest.importorskip("matplotlib")
+
+        # Record the axes drawn on by the fast path
+        axes = []
+        draw_graph_fast = RotatedSurfaceCode._draw_graph_fast
+
+        def spy(self, ax, **kwargs):
+            axes.append(ax)
+            draw_graph_fast(self, ax=ax, **kwargs)
+
+        monkeypatch.setattr(RotatedSurfaceCode, "_draw_graph_fast", spy)
+
+        self.code.draw_graph(path=tmp_path / "small.png")
+        assert axes == []
+
+        large = RotatedSurfaceCode(distance=25)
+        assert large.graph.number_of_nodes() > large.DRAW_LABEL_MAX_NODES
+        large.draw_graph(path=tmp_path / "large.png")
+        assert len(axes) == 1
+        assert len(axes[0].texts) == 0
+
+        assert (tmp_path / "small.png").stat().st_size > 0
+        assert (tmp_path / "large.png").stat().st_size > 0
@@ -0,0 +1,78 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from qec import RotatedSurfaceCode, RotatedSurfaceLattice
+
+
+class TestRotatedSurfaceLattice:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.lattice = RotatedSurfaceLattice(distance=11)
+
+    def test_init(self):
+        assert self.lattice.distance == 11
+        assert len(self.lattice.data_coords) == 11**2
+        assert len(self.lattice.x_coords) + len(self.lattice.z_coords) == 11**2 - 1
+
+        # Bulk checks have four CNOTs and boundary checks two
+        for edges in [self.lattice.x_edges, self.lattice.z_edges]:
+            degrees = np.bincount(edges[:, 1])
+            assert set(degrees) == {2, 4}
+
+    def test_view(self):
+        for distance in [3, 5, 7, 9, 11]:
+            view = self.lattice.view(distance=distance)
+            lattice = RotatedSurfaceLattice(distance=distance)
+
+            assert view.distance == distance
+            for name in ["data_coords", "x_coords", "z_coords", "x_edges", "z_edges"]:
+                assert np.array_equal(getattr(view, name), getattr(lattice, name))
+
+        with pytest.raises(ValueError):
+            self.lattice.view(distance=13)
+
+        # Even distances would not match a lattice generated at that distance
+        for distance in [2, 4, 10]:
+            with pytest.raises(ValueError, match="odd"):
+                self.lattice.view(distance=distance)
+            with pytest.raises(ValueError, match="odd"):
+                RotatedSurfaceLattice(distance=distance)
+
+    def test_code(self):
+        code = RotatedSurfaceCode(distance=5, lattice=self.lattice.view(distance=5))
+        reference = RotatedSurfaceCode(distance=5)
+
+        assert list(code.graph.nodes(data=True)) == list(
+            reference.graph.nodes(data=True)
+        )
+        assert list(code.graph.edges(data=True)) == list(
+            reference.graph.edges(data=True)
+        )
+
+        with pytest.raises(ValueError):
+            RotatedSurfaceCode(distance=5, lattice=self.lattice)
+
+        with pytest.raises(ValueError, match="odd"):
+            RotatedSurfaceCode(distance=4)
+        with pytest.raises(ValueError, match="odd"):
+            RotatedSurfaceCode.family_kwargs([3, 4])
+        with pytest.raises(ValueError, match="odd"):
+            RotatedSurfaceCode.family_kwargs([4, 12])
+
+    def test_neighbor_qubits(self):
+        code = RotatedSurfaceCode(distance=3)
+        assert code.get_neighbor_qubits(coord=(1.5, 1.5)) == [0, 3, 1, 4]
+        assert code.get_neighbor_qubits(coord=(2.5, 0.5)) == [None, 1, None, 2]
@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from qec import ArtifactCache, SparseCSSCode, ThresholdLAB
+
+
+def repetition_checks(distance: int) -> sparse.csr_matrix:
+    return sparse.csr_matrix(
+        np.eye(distance - 1, distance, dtype=np.uint8)
+        + np.eye(distance - 1, distance, k=1, dtype=np.uint8)
+    )
+
+
+def hypergraph_product(distance: int) -> tuple[sparse.csr_matrix, sparse.csr_matrix]:
+    # The product of two repetition codes is the planar surface code
+    h = repetition_checks(distance)
+    m, n = h.shape
+    hx = sparse.hstack(
+        [sparse.kron(h, sparse.eye(n)), sparse.kron(sparse.eye(m), h.T)], format="csr"
+    )
+    hz = sparse.hstack(
+        [sparse.kron(sparse.eye(n), h), sparse.kron(h.T, sparse.eye(m))], format="csr"
+    )
+    return hx, hz
+
+
+class TestSparseCSSCode:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.hx, self.hz = hypergraph_product(3)
+        self.code = SparseCSSCode(
+            hx=self.hx,
+            hz=self.hz,
+            distance=3,
+            depolarize1_rate=0.001,
+            depolarize2_rate=0.001,
+        )
+
+    def test_init(self):
+        assert self.code.name == "Sparse CSS"
+        assert self.code.num_data_qubits == 13
+        assert self.code.hx.shape == (6, 13)
+        assert self.code.hz.shape == (6, 13)
+
+        # The logical operator found over GF(2) commutes with the X checks
+        support = np.zeros(13, dtype=np.int64)
+        support[self.code.logic_check] = 1
+        assert not (self.code.hx @ support % 2).any()
+
+    def test_schedule(self):
+        for matrix, colors in [
+            (self.code.hx, self.code.x_schedule),
+            (self.code.hz, self.code.z_schedule),
+        ]:
+            rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+            for color in np.unique(colors):
+                layer = colors == color
+                assert len(set(rows[layer])) == layer.sum()
+                assert len(set(matrix.indices[layer])) == layer.sum()
+
+        with pytest.raises(ValueError):
+            SparseCSSCode(hx=self.hx, hz=self.hz, z_schedule=np.zeros(self.code.hz.nnz))
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            SparseCSSCode(hx=self.hz[:, :-1], hz=self.hz)
+        with pytest.raises(ValueError):
+            SparseCSSCode(hx=self.hz, hz=self.hz, logical_z=[0])
+        with pytest.raises(ValueError):
+            SparseCSSCode(hx=self.hx, hz=self.hz, logical_z=[0, 1])
+
+    def test_spec(self):
+        with pytest.raises(ValueError, match="CodeSpec"):
+            self.code.spec
+        with pytest.raises(ValueError, match="CodeSpec"):
+            SparseCSSCode(hx=self.hx, hz=self.hz).spec
+
+    def test_build_memory(self):
+        self.code.build_memory_circuit(number_of_rounds=4)
+        circuit = self.code.memory_circuit
+
+        # Z detectors in every round, X detectors between rounds, final Z detectors
+        assert circuit.num_detectors == 6 + 3 * 12 + 6
+        assert circuit.num_observables == 1
+        assert circuit.num_qubits == 25
+
+        # The detectors and the observable are deterministic without noise
+        code = SparseCSSCode(hx=self.hx, hz=self.hz)
+        code.build_memory_circuit(number_of_rounds=3)
+        assert ThresholdLAB.compute_logical_errors(code=code, num_shots=100) == 0
+        detection_events = code.memory_circuit.compile_detector_sampler().sample(100)
+        assert not detection_events.any()
+
+    def test_repetition_code(self):
+        code = SparseCSSCode(
+            hx=np.zeros((0, 5)),
+            hz=repetition_checks(5),
+            logical_z=[0],
+            depolarize1_rate=0.01,
+        )
+        code.build_memory_circuit(number_of_rounds=5)
+        assert code.memory_circuit.num_detectors == 24
+        assert code.graph.number_of_nodes() == 9
+
+    def test_cache_key(self):
+        cache = ArtifactCache()
+        self.code.build_memory_circuit(number_of_rounds=2, cache=cache)
+
+        other = SparseCSSCode(hx=self.hz, hz=self.hx, distance=3)
+        other.build_memory_circuit(number_of_rounds=2, cache=cache)
+
+        assert self.code.cache_key != other.cache_key
+        assert len(cache) == 2
+
+        noisy = SparseCSSCode(hx=self.hx, hz=self.hz, distance=3, idle_rate=0.01)
+        noisy.build_memory_circuit(number_of_rounds=2, cache=cache)
+        assert noisy.cache_key != self.code.cache_key
+        assert len(cache) == 3
+
+    def test_large_code(self):
+        hx, hz = hypergraph_product(15)
+        code = SparseCSSCode(hx=hx, hz=hz, distance=15)
+        code.build_memory_circuit(number_of_rounds=15)
+
+        assert code.num_data_qubits == 15**2 + 14**2
+        assert len(code.logic_check) == 15
+
+    def test_x_basis(self):
+        circuits = SparseCSSCode(hx=self.hx, hz=self.hz).build_memory_circuits(
+            number_of_rounds=3
+        )
+        for circuit in circuits.values():
+            detection_events, flips = circuit.compile_detector_sampler().sample(
+                100, separate_observables=True
+            )
+            assert not detection_events.any() and not flips.any()
+        assert circuits["X"].num_detectors == circuits["Z"].num_detectors
+
+        with pytest.raises(ValueError):
+            SparseCSSCode(hx=self.hx, hz=self.hz, logical_x=[0])
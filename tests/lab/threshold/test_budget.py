@@ -0,0 +1,72 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from qec import allocate_shots
+
+
+class TestAllocateShots:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.kwargs = dict(precision=0.1, max_points=10, min_shots=100, max_shots=10**4)
+
+    def test_unsampled_first(self):
+        points = {(3, 0.1): (0, 0, 0.0), (3, 0.2): (1000, 10, 1.0)}
+        allocation = allocate_shots(points=points, **{**self.kwargs, "max_points": 1})
+        assert allocation == {(3, 0.1): 100}
+
+    def test_skip(self):
+        points = {
+            # Already precise
+            (3, 0.1): (10**4, 500, 1.0),
+            # Never sees errors
+            (3, 0.01): (10**4, 0, 1.0),
+            # Needs about 9 times more shots
+            (5, 0.1): (1000, 10, 1.0),
+        }
+        allocation = allocate_shots(points=points, **self.kwargs)
+        assert allocation == {(5, 0.1): 8900}
+
+    def test_cost_ranking(self):
+        # Same uncertainty, the cheaper point goes first
+        points = {(3, 0.1): (1000, 10, 10.0), (5, 0.1): (1000, 10, 1.0)}
+        allocation = allocate_shots(points=points, **{**self.kwargs, "max_points": 1})
+        assert list(allocation) == [(5, 0.1)]
+
+    def test_budgets(self):
+        points = {(3, 0.1): (1000, 10, 1.0), (5, 0.1): (1000, 10, 2.0)}
+
+        allocation = allocate_shots(points=points, shot_budget=5000, **self.kwargs)
+        assert allocation == {(3, 0.1): 5000}
+
+        # One second buys 1000 shots at the first point
+        allocation = allocate_shots(points=points, seconds_budget=1.0, **self.kwargs)
+        assert allocation == {(3, 0.1): 1000}
+
+    def test_task_costs(self):
+        points = {(3, 0.1): (0, 0, 0.0), (5, 0.1): (0, 0, 0.0)}
+        task_costs = {(3, 0.1): (0.5, 1e-3), (5, 0.1): (0.8, 1e-3)}
+
+        # The first task costs 0.6 seconds, the second does not fit in the rest
+        allocation = allocate_shots(
+            points=points, seconds_budget=1.0, task_costs=task_costs, **self.kwargs
+        )
+        assert allocation == {(3, 0.1): 100}
+
+        # The fixed seconds leave half a second to sample
+        points = {(3, 0.1): (1000, 10, 1.0)}
+        allocation = allocate_shots(
+            points=points, seconds_budget=1.0, task_costs=task_costs, **self.kwargs
+        )
+        assert allocation == {(3, 0.1): 500}
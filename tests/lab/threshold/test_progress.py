@@ -0,0 +1,112 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from qec import ProgressTracker
+from qec.lab.threshold import progress
+
+
+class TestProgressTracker:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.records = []
+        self.progress = ProgressTracker(
+            callback=self.records.append, total_tasks=2, total_shots=200, interval=60
+        )
+
+    def test_throttling(self):
+        self.progress.start_task(distance=3, error_rate=0.1)
+        self.progress.update(shots=50, errors=5)
+        self.progress.update(shots=50, errors=5)
+        self.progress.finish_task()
+        assert len(self.records) == 1
+
+        self.progress.start_task(distance=5, error_rate=0.1)
+        self.progress.update(shots=100, errors=1)
+        self.progress.finish_task()
+        assert len(self.records) == 2
+
+    def test_record(self):
+        self.progress.start_task(distance=3, error_rate=0.1)
+        self.progress.update(shots=50, errors=5)
+
+        record = self.records[-1]
+        assert record["completed_tasks"] == 0
+        assert record["total_tasks"] == 2
+        assert record["shots_done"] == 50
+        assert record["shots_to_go"] == 150
+        assert record["errors"] == 5
+        assert (record["distance"], record["error_rate"]) == (3, 0.1)
+        assert record["shots_per_second"] > 0
+        assert record["eta_seconds"] > 0
+
+    def test_early_stop(self):
+        # The first task stops on its error budget after 20 of its 100 shots
+        self.progress.start_task(distance=3, error_rate=0.1, num_shots=100)
+        self.progress.update(shots=20, errors=10, report=False)
+        assert self.records == []
+        self.progress.finish_task()
+
+        record = self.records[-1]
+        assert record["completed_tasks"] == 1
+        assert record["shots_to_go"] == 100
+
+        self.progress.start_task(distance=5, error_rate=0.1, num_shots=100)
+        self.progress.update(shots=30, errors=10)
+        self.progress.finish_task()
+
+        record = self.records[-1]
+        assert record["completed_tasks"] == 2
+        assert record["shots_to_go"] == 0
+        assert record["eta_seconds"] == 0
+
+    def test_current_rate(self, monkeypatch):
+        clock = [0.0]
+        monkeypatch.setattr(
+            progress, "time", type("Clock", (), {"monotonic": lambda: clock[0]})
+        )
+        tracker = ProgressTracker(
+            callback=self.records.append,
+            total_tasks=2,
+            total_shots=10**5,
+            interval=0,
+            rate_seconds=1,
+        )
+
+        # A slow first task, then a task of 1000 shots per second
+        tracker.start_task(distance=3, error_rate=0.1, num_shots=100)
+        clock[0] = 100
+        tracker.update(shots=100, errors=1)
+        tracker.finish_task()
+
+        tracker.start_task(distance=5, error_rate=0.1, num_shots=20000)
+        for _ in range(10):
+            clock[0] += 1
+            tracker.update(shots=1000, errors=1)
+
+        record = self.records[-1]
+        assert record["shots_per_second"] == pytest.approx(1000, rel=0.01)
+        assert record["eta_seconds"] == pytest.approx(89.9, rel=0.01)
+        assert record["tasks"] == [
+            {
+                "distance": 5,
+                "error_rate": 0.1,
+                "shots": 10000,
+                "errors": 10,
+                "remaining_shots": 10000,
+                "shots_per_second": record["tasks"][0]["shots_per_second"],
+                "eta_seconds": record["tasks"][0]["eta_seconds"],
+            }
+        ]
+        assert record["tasks"][0]["eta_seconds"] == pytest.approx(10, rel=0.01)
@@ -0,0 +1,83 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import pickle
+import signal
+
+import pytest
+
+from qec import (
+    CodeSpec,
+    RepetitionCode,
+    SyndromeRingBuffer,
+    ThresholdLAB,
+    compute_logical_errors_shared,
+)
+from qec.lab.threshold import shared_pipeline
+
+
+def _killed_decoder(*args) -> None:
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+class TestSharedPipeline:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.ring = SyndromeRingBuffer(
+            num_slots=2, slot_shots=10, num_detectors=20, num_observables=1
+        )
+        yield
+        self.ring.close()
+
+    def test_ring_buffer(self):
+        assert self.ring.detector_bytes == 3
+        assert self.ring.observable_bytes == 1
+        assert self.ring.nbytes == 2 * 10 * 4
+
+        # An attached buffer reads the same memory without copying
+        other = pickle.loads(pickle.dumps(self.ring))
+        detection_events, observable_flips = other.views(slot=1, shots=5)
+        detection_events[:] = 7
+        observable_flips[:] = 1
+        assert (self.ring.views(slot=1, shots=5)[0] == 7).all()
+        assert (self.ring.views(slot=1, shots=5)[1] == 1).all()
+        assert (self.ring.views(slot=0, shots=10)[0] == 0).all()
+        other.close()
+
+    def test_compute_logical_errors_shared(self):
+        spec = CodeSpec(code=RepetitionCode, distance=3, number_of_rounds=3)
+        num_errors = compute_logical_errors_shared(
+            spec=spec, num_shots=25, num_samplers=2, num_decoders=2, batch_size=10
+        )
+        assert num_errors == 0
+
+    def test_collect_stats_pipeline(self):
+        th = ThresholdLAB(distances=[3], code=RepetitionCode, error_rates=[0.0, 0.5])
+        th.collect_stats_pipeline(num_shots=100, batch_size=30)
+
+        assert th.tallies[(3, 0.0)] == (100, 0)
+        assert th.tallies[(3, 0.5)][1] > 0
+        assert len(th.collected_stats[3]) == 2
+
+    def test_killed_decoder(self, monkeypatch):
+        # The decoder is killed as by the OOM killer, the samplers fill every slot
+        monkeypatch.setattr(shared_pipeline, "_decoder_process", _killed_decoder)
+        spec = CodeSpec(code=RepetitionCode, distance=3, number_of_rounds=3)
+
+        with pytest.raises(RuntimeError, match="decoder"):
+            compute_logical_errors_shared(
+                spec=spec, num_shots=1000, num_decoders=2, batch_size=10
+            )
+        assert multiprocessing.active_children() == []
@@ -0,0 +1,96 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pymatching
+import pytest
+
+from qec import RotatedSurfaceCode, SyndromeDataset, ThresholdLAB
+
+
+class TestSyndromeDataset:
+
+    @pytest.fixture(autouse=True)
+    def init(self, tmp_path) -> None:
+        self.directory = str(tmp_path / "dataset")
+        self.th = ThresholdLAB(
+            distances=[3], code=RotatedSurfaceCode, error_rates=[0.01]
+        )
+        self.dataset = self.th.export_syndromes(
+            directory=self.directory,
+            distance=3,
+            error_rate=0.01,
+            num_shots=1000,
+            seed=0,
+        )
+
+    def test_metadata(self):
+        dataset = SyndromeDataset(self.directory)
+        assert dataset.num_shots == 1000
+        assert dataset.num_detectors == dataset.circuit.num_detectors
+        assert dataset.num_observables == 1
+        assert dataset.metadata["code"] == "Rotated Surface"
+        assert dataset.metadata["distance"] == 3
+
+    def test_memmap(self):
+        detection_events = self.dataset.detection_events
+        assert isinstance(detection_events, np.memmap)
+        assert detection_events.shape == (1000, (self.dataset.num_detectors + 7) // 8)
+        assert self.dataset.observable_flips.shape == (1000, 1)
+
+        # The same seed gives the same samples
+        other = self.th.export_syndromes(
+            directory=self.directory + "_other",
+            distance=3,
+            error_rate=0.01,
+            num_shots=1000,
+            seed=0,
+        )
+        assert (detection_events == other.detection_events).all()
+
+    def test_replay(self):
+        num_errors = self.dataset.replay(chunk_size=300)
+
+        detection_events = np.unpackbits(
+            self.dataset.detection_events,
+            axis=1,
+            count=self.dataset.num_detectors,
+            bitorder="little",
+        )
+        observable_flips = np.unpackbits(
+            self.dataset.observable_flips, axis=1, count=1, bitorder="little"
+        )
+        matcher = pymatching.Matching.from_detector_error_model(
+            self.dataset.circuit.detector_error_model()
+        )
+        predictions = matcher.decode_batch(detection_events)
+        assert num_errors == np.any(predictions != observable_flips, axis=1).sum()
+        assert self.dataset.replay(matcher=matcher) == num_errors
+
+    def test_layout_keys(self):
+        circuit = self.dataset.circuit
+        with pytest.raises(ValueError, match="num_shots"):
+            SyndromeDataset.record(
+                directory=self.directory + "_other",
+                circuit=circuit,
+                num_shots=10,
+                metadata={"num_shots": 1000, "distance": 3},
+            )
+
+        dataset = SyndromeDataset.record(
+            directory=self.directory + "_other",
+            circuit=circuit,
+            num_shots=10,
+            metadata={"distance": 3},
+        )
+        assert dataset.num_shots == 10
+        assert dataset.detection_events.shape[0] == 10
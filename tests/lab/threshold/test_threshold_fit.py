@@ -0,0 +1,55 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import numpy as np
+
+from qec import fit_threshold, fit_suppression_factor
+
+
+class TestThresholdFit:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.shots = 10**6
+        self.tallies = {}
+        for distance in [3, 5, 7]:
+            for error_rate in np.linspace(0.08, 0.12, 5):
+                x = (error_rate - 0.1) * distance ** (1 / 1.5)
+                rate = 0.2 + 2 * x + 5 * x**2
+                self.tallies[(distance, error_rate)] = (
+                    self.shots,
+                    int(rate * self.shots),
+                )
+
+    def test_fit_threshold(self):
+        fit = fit_threshold(self.tallies, threshold_guess=0.09)
+        assert fit["threshold"] == pytest.approx(0.1, abs=1e-3)
+        assert fit["nu"] == pytest.approx(1.5, rel=1e-1)
+        assert fit["interval"][0] < fit["threshold"] < fit["interval"][1]
+
+    def test_fit_threshold_not_enough_points(self):
+        with pytest.raises(ValueError):
+            fit_threshold({(3, 0.1): (10, 1), (5, 0.1): (10, 1)})
+
+    def test_fit_suppression_factor(self):
+        tallies = {
+            (d, 0.01): (self.shots, int(self.shots * 0.1 / 4 ** ((d + 1) / 2)))
+            for d in [3, 5, 7]
+        }
+        fit = fit_suppression_factor(tallies, error_rate=0.01)
+        assert fit["lambda"] == pytest.approx(4, rel=1e-2)
+        assert fit["interval"][0] < fit["lambda"] < fit["interval"][1]
+
+        with pytest.raises(ValueError):
+            fit_suppression_factor(tallies, error_rate=0.02)
@@ -10,6 +10,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import time
+
 import pytest
 
 import numpy as np
@@ -51,3 +56,362 @@ class TestRepetitionCode:
         assert isinstance(self.th.collected_stats[3], list)
         assert isinstance(self.th.collected_stats[3][0], float)
         assert len(self.th.collected_stats[3]) == 10
+
+    def test_find_crossing(self):
+
+        self.th._error_rates = [0.01, 0.02, 0.03]
+        self.th._tallies = {
+            (3, 0.01): (100, 10),
+            (3, 0.02): (100, 20),
+            (3, 0.03): (100, 30),
+            (5, 0.01): (100, 5),
+            (5, 0.02): (100, 15),
+            (5, 0.03): (100, 40),
+        }
+        self.th.update_stats()
+
+        estimate, low, high = self.th.find_crossing()
+        assert (low, high) == (0.02, 0.03)
+        assert low < estimate < high
+
+        self.th._tallies[(5, 0.03)] = (100, 25)
+        self.th.update_stats()
+        assert self.th.find_crossing() is None
+
+    def test_collect_stats_adaptive(self):
+
+        # The d=3 and d=5 curves cross at p = 0.061 for this noise model
+        th = ThresholdLAB(
+            distances=[3, 5],
+            code=RepetitionCode,
+            error_rates=[0, 0.02, 0.08, 0.14, 0.2],
+        )
+        threshold = th.collect_stats_adaptive(num_shots=10**4, precision=0.005, seed=1)
+
+        assert 0 not in th.error_rates
+        assert 0.055 < threshold < 0.067
+        _, low, high = th.find_crossing()
+        assert high - low <= 0.005
+
+        # The refined error rates are inside the first bracket, whose bounds are
+        # sampled again
+        new_error_rates = [
+            p for p in th.error_rates if p not in (0.02, 0.08, 0.14, 0.2)
+        ]
+        assert len(new_error_rates) >= 3
+        assert all(0.02 < p < 0.08 for p in new_error_rates)
+        assert th.tallies[(3, 0.08)][0] == 2 * 10**4
+        assert th.tallies[(3, 0.2)][0] == 10**4
+        assert len(th.collected_stats[3]) == len(th.error_rates)
+
+    def test_collected_timings(self):
+
+        records = []
+        th = ThresholdLAB(
+            distances=[3],
+            code=RepetitionCode,
+            error_rates=[0.05],
+            task_callback=records.append,
+        )
+        th.collect_stats(num_shots=10)
+
+        assert th.collected_timings == records
+        assert len(records) == 1
+        record = records[0]
+        assert (record["distance"], record["error_rate"], record["shots"]) == (
+            3,
+            0.05,
+            10,
+        )
+        for stage in ["graph", "circuit", "compile", "sample", "dem", "decode"]:
+            assert record[f"{stage}_seconds"] >= 0
+        assert record["shots_per_second"] > 0
+        assert record["detectors_per_shot"] == 20
+
+    def test_collect_stats_progress(self):
+
+        records = []
+        self.th.collect_stats(
+            num_shots=10,
+            batch_size=4,
+            progress_callback=records.append,
+            progress_interval=0,
+        )
+
+        # One report per batch and per completed task
+        assert len(records) == 2 * 10 * (3 + 1)
+        assert records[-1]["completed_tasks"] == 20
+        assert records[-1]["shots_done"] == 200
+        assert records[-1]["shots_to_go"] == 0
+        assert self.th.tallies[(5, self.th.error_rates[-1])][0] == 10
+
+    def test_collect_stats_progress_max_errors(self):
+
+        for num_workers in [1, 2]:
+            th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.2])
+            records = []
+            th.collect_stats(
+                num_shots=10**4,
+                batch_size=100,
+                num_workers=num_workers,
+                max_errors=10,
+                progress_callback=records.append,
+                progress_interval=0,
+            )
+
+            # The shots left by the error budget are not waited for
+            assert records[-1]["completed_tasks"] == 2
+            assert records[-1]["shots_to_go"] == 0
+            assert records[-1]["eta_seconds"] == 0
+            assert records[-1]["shots_done"] < 2 * 10**4
+
+            # Batches are reported before their task completes, also from workers
+            assert records[0]["completed_tasks"] == 0
+            assert records[0]["shots_done"] == 100
+            assert records[0]["tasks"][0]["remaining_shots"] == 10**4 - 100
+
+    def test_astream_stats_progress(self):
+
+        # A single large point reports its batches while it is sampled
+        th = ThresholdLAB(distances=[5], code=RepetitionCode, error_rates=[0.1])
+        records = []
+
+        async def stream():
+            async for _ in th.astream_stats(
+                num_shots=2 * 10**5,
+                progress_callback=records.append,
+                progress_interval=0,
+            ):
+                pass
+
+        asyncio.run(stream())
+
+        running = [record for record in records if record["completed_tasks"] == 0]
+        assert len(running) > 1
+        task = running[0]["tasks"][0]
+        assert (task["distance"], task["error_rate"]) == (5, 0.1)
+        assert 0 < task["remaining_shots"] < 2 * 10**5
+        assert task["eta_seconds"] > 0
+        assert records[-1]["tasks"] == []
+        assert records[-1]["shots_done"] == 2 * 10**5
+
+    def test_iter_stats(self):
+
+        records = list(self.th.iter_stats(num_shots=10))
+
+        assert len(records) == 20
+        assert records[0]["distance"] == 3
+        for key in ["distance", "error_rate", "shots", "errors", "seconds"]:
+            assert key in records[0]
+        assert len(self.th.collected_stats[5]) == 10
+
+    def test_iter_stats_parallel(self):
+
+        th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.1])
+
+        for record in th.iter_stats(num_shots=10, num_workers=2):
+            assert record["shots"] == 10
+            assert th.tallies[(record["distance"], 0.1)][0] == 10
+
+        assert sorted(th.collected_stats.keys()) == [3, 5]
+
+    def test_iter_stats_early_stop(self):
+
+        for record in self.th.iter_stats(num_shots=10, num_workers=2):
+            break
+
+        assert len(self.th.tallies) == 1
+
+    def test_astream_stats(self):
+
+        async def stream():
+            return [record async for record in self.th.astream_stats(num_shots=10)]
+
+        records = asyncio.run(stream())
+
+        assert len(records) == 20
+        assert all(shots == 10 for shots, _ in self.th.tallies.values())
+        assert len(self.th.collected_stats[5]) == 10
+
+    def test_acollect_stats_seed(self):
+
+        tallies = []
+        for _ in range(2):
+            th = ThresholdLAB(
+                distances=[3], code=RepetitionCode, error_rates=[0.1, 0.2]
+            )
+            asyncio.run(th.acollect_stats(num_shots=100, num_workers=2, seed=3))
+            tallies.append(th.tallies)
+
+        th = ThresholdLAB(distances=[3], code=RepetitionCode, error_rates=[0.1, 0.2])
+        th.collect_stats(num_shots=100, seed=3)
+
+        assert tallies[0] == tallies[1] == th.tallies
+
+    @pytest.mark.parametrize("own_executor", [True, False])
+    def test_astream_stats_cancel(self, own_executor):
+
+        th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.1])
+        executor = None if own_executor else ProcessPoolExecutor(max_workers=2)
+        records = []
+
+        async def consume():
+            async for record in th.astream_stats(
+                num_shots=10**6, batch_size=10**4, executor=executor, num_workers=2
+            ):
+                records.append(record)
+
+        async def cancel():
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        # Each task samples for many seconds, cancelling stops them after a batch
+        start = time.perf_counter()
+        asyncio.run(cancel())
+        if executor is not None:
+            executor.shutdown(wait=True)
+        assert time.perf_counter() - start < 5
+
+        assert multiprocessing.active_children() == []
+        assert records == []
+        assert th.tallies == {}
+
+    def test_astream_stats_cancel_loop(self):
+
+        # A single large task with the default batch size
+        th = ThresholdLAB(distances=[5], code=RepetitionCode, error_rates=[0.1])
+        ticks = []
+
+        async def consume():
+            async for _ in th.astream_stats(num_shots=10**8):
+                pass
+
+        async def tick():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def cancel():
+            ticker = asyncio.create_task(tick())
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            ticker.cancel()
+
+        start = time.perf_counter()
+        asyncio.run(cancel())
+        assert time.perf_counter() - start < 5
+
+        # The event loop kept serving the other coroutine while the stream stopped
+        assert max(np.diff(ticks)) < 0.5
+        assert multiprocessing.active_children() == []
+
+    def test_collect_stats_budget(self):
+
+        th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.1, 0.2])
+        th.collect_stats_budget(
+            shot_budget=5000, precision=0.01, initial_shots=200, max_shots=1000
+        )
+
+        shots = sum(shots for shots, _ in th.tallies.values())
+        assert shots == 5000
+        assert len(th.tallies) == 4
+        assert all(shots >= 200 for shots, _ in th.tallies.values())
+
+        with pytest.raises(ValueError):
+            th.collect_stats_budget()
+
+    def test_collect_stats_budget_bases(self):
+
+        # Each task samples its shots once per basis
+        th = ThresholdLAB(
+            distances=[3, 5],
+            code=RepetitionCode,
+            error_rates=[0.1, 0.2],
+            bases=["Z", "X"],
+        )
+        th.collect_stats_budget(
+            shot_budget=5000, precision=0.01, initial_shots=200, max_shots=1000
+        )
+
+        shots = sum(shots for shots, _ in th.tallies.values())
+        assert 4000 < shots <= 5000
+        assert len(th.tallies) == 4
+
+    def test_collect_stats_budget_seconds(self, monkeypatch):
+
+        # Tasks whose build takes far longer than estimated
+        def sample_task(spec, num_shots, **kwargs):
+            return {
+                "distance": spec.distance,
+                "error_rate": spec.depolarize1_rate,
+                "shots": num_shots,
+                "errors": num_shots // 10,
+                "sample_seconds": 1e-6 * num_shots,
+                "decode_seconds": 1e-6 * num_shots,
+                "seconds": 0.2 + 2e-6 * num_shots,
+            }
+
+        monkeypatch.setattr(ThresholdLAB, "sample_task", staticmethod(sample_task))
+        th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.1, 0.2])
+        th.collect_stats_budget(seconds_budget=1.0, precision=0.001, initial_shots=1000)
+
+        spent = sum(record["seconds"] for record in th.collected_timings)
+        assert 0.8 < spent <= 1.0
+        assert len(th.tallies) < 4
+
+    def test_plan_task(self):
+
+        th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.1])
+        estimate = th.estimate_task(distance=5, error_rate=0.1)
+        fixed = estimate["dem_bytes"] + estimate["matcher_bytes"]
+        per_shot = estimate["sample_bytes_per_shot"]
+
+        th = ThresholdLAB(
+            distances=[3, 5],
+            code=RepetitionCode,
+            error_rates=[0.1],
+            memory_limit=fixed + 100 * per_shot,
+        )
+        plan = th.plan_task(distance=5, error_rate=0.1, num_shots=1000)
+        assert plan["batch_size"] == 100
+        assert plan["memory_bytes"] <= th.memory_limit
+        assert (
+            th.plan_task(distance=5, error_rate=0.1, num_shots=10)["batch_size"] == 10
+        )
+
+        with pytest.raises(MemoryError):
+            th.plan_task(distance=5, error_rate=0.1, num_shots=1000, num_workers=2)
+
+        # A sweep refuses to start when a task does not fit on its own
+        th = ThresholdLAB(
+            distances=[3, 5], code=RepetitionCode, error_rates=[0.1], memory_limit=fixed
+        )
+        with pytest.raises(MemoryError):
+            th.collect_stats(num_shots=1000)
+        assert th.tallies == {}
+
+    def test_bases(self):
+
+        th = ThresholdLAB(
+            distances=[3], code=RepetitionCode, error_rates=[0.05], bases=["Z", "X"]
+        )
+        record = next(th.iter_stats(num_shots=100, seed=1))
+        assert record["basis"] == "ZX"
+        assert (record["Z_shots"], record["X_shots"], record["shots"]) == (
+            100,
+            100,
+            200,
+        )
+        assert record["errors"] == record["Z_errors"] + record["X_errors"]
+        assert th.tallies[(3, 0.05)] == (200, record["errors"])
+
+        with pytest.raises(ValueError):
+            ThresholdLAB(
+                distances=[3], code=RepetitionCode, error_rates=[0.05], bases=["Y"]
+            )
@@ -0,0 +1,152 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+
+from qec import RepetitionCode, ThresholdLAB, WorkQueue
+
+
+class TestWorkQueue:
+
+    @pytest.fixture(autouse=True)
+    def init(self, tmp_path) -> None:
+        self.directory = str(tmp_path)
+        self.queue = WorkQueue(directory=self.directory, lease_seconds=60)
+
+    def test_submit(self):
+        task_ids = self.queue.submit([{"a": 1}, {"a": 2}])
+        assert self.queue.submit([{"a": 1}]) == task_ids[:1]
+        assert self.queue.task_ids() == sorted(task_ids)
+        assert self.queue.task(task_ids[1]) == {"a": 2}
+
+    def test_claim_and_complete(self):
+        self.queue.submit([{"a": 1}, {"a": 2}])
+
+        first = self.queue.claim(worker="w1")
+        second = self.queue.claim(worker="w2")
+        assert first[0] != second[0]
+        assert self.queue.claim(worker="w3") is None
+
+        self.queue.complete(task_id=first[0], result={"errors": 1})
+        self.queue.complete(task_id=first[0], result={"errors": 2})
+        assert list(self.queue.results()) == [(first[1], {"errors": 1})]
+        assert self.queue.pending() == [second[0]]
+
+    def test_lease_expiry(self):
+        queue = WorkQueue(directory=self.directory, lease_seconds=-1)
+        queue.submit([{"a": 1}])
+
+        task_id, _ = queue.claim(worker="w1")
+        assert queue.claim(worker="w2")[0] == task_id
+
+        assert self.queue.renew(task_id=task_id, worker="w2")
+        assert queue.claim(worker="w3") is None
+
+    def test_renew_taken_over(self):
+        queue = WorkQueue(directory=self.directory, lease_seconds=-1)
+        queue.submit([{"a": 1}])
+
+        task_id, _ = queue.claim(worker="w1")
+        assert queue.claim(worker="w2")[0] == task_id
+
+        # The first worker does not get the lease back
+        assert not self.queue.renew(task_id=task_id, worker="w1")
+        assert self.queue.renew(task_id=task_id, worker="w2")
+        assert queue.claim(worker="w1") is None
+
+        self.queue.release(task_id=task_id)
+        assert not self.queue.renew(task_id=task_id, worker="w2")
+
+    def test_threshold_lab(self):
+        th = ThresholdLAB(distances=[3, 5], code=RepetitionCode, error_rates=[0.0, 0.1])
+        task_ids = th.submit_stats(queue=self.queue, num_shots=25, num_batches=2)
+        assert len(task_ids) == 8
+
+        # Two workers sharing the directory
+        assert th.run_worker(queue=WorkQueue(self.directory), max_tasks=3) == 3
+        assert th.run_worker(queue=WorkQueue(self.directory)) == 5
+        assert th.run_worker(queue=self.queue) == 0
+
+        th.merge_stats(queue=self.queue)
+        th.merge_stats(queue=self.queue)
+        assert th.tallies[(3, 0.0)] == (25, 0)
+        assert th.tallies[(5, 0.1)][0] == 25
+        assert len(th.collected_stats[5]) == 2
+
+    def test_merge_stats_other_experiment(self):
+        th = ThresholdLAB(distances=[3], code=RepetitionCode, error_rates=[0.1])
+        th.submit_stats(queue=self.queue, num_shots=50)
+
+        # Same code, distance and error rate, other bases or rounds
+        other = ThresholdLAB(
+            distances=[3], code=RepetitionCode, error_rates=[0.1], bases=["Z", "X"]
+        )
+        other.submit_stats(queue=self.queue, num_shots=30)
+        spec = th.task_spec(distance=3, error_rate=0.1).to_dict()
+        spec["number_of_rounds"] = 1
+        self.queue.submit([{"spec": spec, "num_shots": 20, "bases": ["Z"]}])
+
+        assert th.run_worker(queue=self.queue) == 3
+        th.merge_stats(queue=self.queue)
+        assert th.tallies[(3, 0.1)][0] == 50
+        other.merge_stats(queue=self.queue)
+        assert other.tallies[(3, 0.1)][0] == 2 * 30
+
+    def test_lost_lease(self, monkeypatch):
+        queue = WorkQueue(directory=self.directory, lease_seconds=0.3)
+        th = ThresholdLAB(distances=[3], code=RepetitionCode, error_rates=[0.1])
+        th.submit_stats(queue=queue, num_shots=100)
+
+        # The lease is taken over, and the task completed by another worker, while
+        # the task runs
+        sample_task = ThresholdLAB.sample_task
+
+        def slow_sample_task(**kwargs):
+            time.sleep(0.5)
+            return sample_task(**kwargs)
+
+        def take_over(self, task_id, worker=None):
+            self.complete(task_id=task_id, result={"worker": "w2"})
+            return False
+
+        monkeypatch.setattr(ThresholdLAB, "sample_task", staticmethod(slow_sample_task))
+        monkeypatch.setattr(WorkQueue, "renew", take_over)
+        assert th.run_worker(queue=queue, worker="w1") == 0
+        assert [record for _, record in queue.results()] == [{"worker": "w2"}]
+
+    def test_lease_renewal(self, monkeypatch):
+        queue = WorkQueue(directory=self.directory, lease_seconds=0.3)
+        th = ThresholdLAB(distances=[3], code=RepetitionCode, error_rates=[0.1])
+        th.submit_stats(queue=queue, num_shots=100)
+
+        # A task three times slower than the lease
+        sample_task = ThresholdLAB.sample_task
+
+        def slow_sample_task(**kwargs):
+            time.sleep(1)
+            return sample_task(**kwargs)
+
+        monkeypatch.setattr(ThresholdLAB, "sample_task", staticmethod(slow_sample_task))
+        worker = threading.Thread(
+            target=th.run_worker, kwargs={"queue": queue, "worker": "w1"}
+        )
+        worker.start()
+        time.sleep(0.6)
+        assert queue.claim(worker="w2") is None
+        worker.join()
+
+        assert queue.pending() == []
+        th.merge_stats(queue=queue)
+        assert th.tallies[(3, 0.1)][0] == 100
@@ -0,0 +1,89 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+
+import pytest
+
+from qec import ArtifactCache, RepetitionCode, ThresholdLAB
+
+
+class TestArtifactCache:
+
+    @pytest.fixture(autouse=True)
+    def init(self, tmp_path) -> None:
+        self.directory = str(tmp_path)
+        self.cache = ArtifactCache(directory=self.directory)
+        self.code = RepetitionCode(
+            distance=3, depolarize1_rate=0.01, depolarize2_rate=0.01
+        )
+
+    def test_key(self):
+        key = ArtifactCache.key(
+            code=RepetitionCode,
+            distance=3,
+            number_of_rounds=9,
+            depolarize1_rate=0.01,
+            depolarize2_rate=0.02,
+        )
+        assert key == "RepetitionCode_d3_r9_p0.01_p0.02"
+
+    def test_build_memory_circuit(self):
+        self.code.build_memory_circuit(number_of_rounds=2, cache=self.cache)
+        assert self.cache.misses == 1
+        assert os.path.exists(
+            os.path.join(self.directory, self.code.cache_key + ".stim")
+        )
+
+        # A fresh cache on the same directory loads the circuit from disk
+        code = RepetitionCode(distance=3, depolarize1_rate=0.01, depolarize2_rate=0.01)
+        cache = ArtifactCache(directory=self.directory)
+        code.build_memory_circuit(number_of_rounds=2, cache=cache)
+        assert cache.hits == 1
+        assert code.memory_circuit == self.code.memory_circuit
+        assert code.measurement.data == self.code.measurement.data
+
+    def test_detector_error_model(self):
+        self.code.build_memory_circuit(number_of_rounds=2)
+        dem = self.code.detector_error_model(cache=self.cache)
+        assert self.code.detector_error_model(cache=self.cache) is dem
+        assert self.cache.hits == 1
+
+    def test_eviction(self):
+        self.code.build_memory_circuit(number_of_rounds=2)
+        size = len(str(self.code.memory_circuit))
+        cache = ArtifactCache(max_bytes=size)
+
+        cache.put(key="a", kind="circuit", value=self.code.memory_circuit)
+        cache.put(key="b", kind="circuit", value=self.code.memory_circuit)
+        assert len(cache) == 1
+        assert cache.size == size
+        assert cache.get(key="a", kind="circuit") is None
+        assert cache.get(key="b", kind="circuit") is not None
+
+    def test_pickle(self):
+        self.code.build_memory_circuit(number_of_rounds=2, cache=self.cache)
+        cache = pickle.loads(pickle.dumps(self.cache))
+        assert cache.directory == self.directory
+        assert len(cache) == 0
+
+    def test_threshold_lab(self):
+        th = ThresholdLAB(
+            distances=[3], code=RepetitionCode, error_rates=[0.1], cache=self.cache
+        )
+        th.collect_stats(num_shots=10)
+        th.collect_stats(num_shots=10)
+
+        assert th.collected_timings[1]["graph_seconds"] == 0
+        assert self.cache.hits == 2
+        assert th.tallies[(3, 0.1)][0] == 20
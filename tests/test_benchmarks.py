@@ -0,0 +1,82 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+PATH = Path(__file__).parents[1] / "benchmarks" / "run_benchmarks.py"
+
+
+def result(stage: str, distance: int, seconds: float, rss: int) -> dict:
+    return {
+        "stage": stage,
+        "code": "RotatedSurfaceCode",
+        "distance": distance,
+        "rounds": 3 * distance,
+        "shots": 1000 if stage == "sample" else None,
+        "repeat": 3,
+        "best_seconds": seconds,
+        "mean_seconds": seconds,
+        "peak_rss_bytes": rss,
+        "peak_rss_increase_bytes": rss,
+    }
+
+
+class TestBenchmarks:
+
+    @pytest.fixture(autouse=True)
+    def init(self, tmp_path) -> None:
+        spec = importlib.util.spec_from_file_location("run_benchmarks", PATH)
+        self.benchmarks = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.benchmarks)
+
+        self.baseline_path = tmp_path / "baseline.json"
+        self.current_path = tmp_path / "current.json"
+        for path, results in [
+            (
+                self.baseline_path,
+                [
+                    result("circuit", 5, 0.10, 2**20),
+                    result("sample", 5, 0.02, 2**20),
+                    result("dem", 5, 1e-4, 2**20),
+                ],
+            ),
+            (
+                self.current_path,
+                [
+                    result("circuit", 5, 0.15, 2**20),
+                    result("sample", 5, 0.021, 2**22),
+                    result("dem", 5, 1e-3, 2**20),
+                    result("circuit", 7, 1.0, 2**20),
+                ],
+            ),
+        ]:
+            path.write_text(json.dumps({"metadata": {}, "results": results}))
+
+    def test_compare(self):
+        baseline = json.loads(self.baseline_path.read_text())["results"]
+        current = json.loads(self.current_path.read_text())["results"]
+
+        regressions = self.benchmarks.compare(current, baseline, tolerance=0.2)
+
+        # The slower circuit and the larger sample memory, not the noisy DEM
+        # timing below min_seconds nor the case missing from the baseline
+        assert [(r["stage"], r["metric"]) for r in regressions] == [
+            ("circuit", "best_seconds"),
+            ("sample", "peak_rss_increase_bytes"),
+        ]
+        assert regressions[0]["ratio"] == pytest.approx(1.5)
+        assert self.benchmarks.compare(current, baseline, tolerance=5) == []
+        assert self.benchmarks.compare(baseline, baseline, tolerance=0) == []
@@ -0,0 +1,145 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from qec.cli import MAX_ERRORS_BATCH_SIZE, _print_progress, main
+
+
+class TestCli:
+
+    @pytest.fixture(autouse=True)
+    def init(self, tmp_path) -> None:
+        self.directory = str(tmp_path)
+        self.args = [
+            "--code",
+            "repetition",
+            "--distances",
+            "3",
+            "5",
+            "--error-rate-range",
+            "0.05",
+            "0.1",
+            "2",
+            "--shots",
+            "200",
+            "--seed",
+            "7",
+        ]
+
+    def test_csv(self):
+        path = os.path.join(self.directory, "sweep.csv")
+        assert main(self.args + ["--output", path]) == 0
+
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 4
+        assert {(int(row["distance"]), float(row["error_rate"])) for row in rows} == {
+            (3, 0.05),
+            (3, 0.1),
+            (5, 0.05),
+            (5, 0.1),
+        }
+        for row in rows:
+            assert row["code"] == "Repetition"
+            assert int(row["shots"]) == 200
+            assert float(row["logical_error_rate"]) == int(row["errors"]) / 200
+
+    def test_jsonl_seed(self):
+        paths = [os.path.join(self.directory, f"sweep{i}.jsonl") for i in range(2)]
+        main(self.args + ["--output", paths[0]])
+        main(self.args + ["--output", paths[1], "--workers", "2"])
+
+        errors = []
+        for path in paths:
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+            errors.append(
+                {(r["distance"], r["error_rate"]): r["errors"] for r in records}
+            )
+        assert errors[0] == errors[1]
+
+    def test_max_errors(self):
+        path = os.path.join(self.directory, "sweep.jsonl")
+        main(
+            self.args[:-4]
+            + ["--shots", "100000", "--max-errors", "10", "--batch-size", "100"]
+            + ["--output", path]
+        )
+
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                assert 10 <= record["errors"]
+                assert record["shots"] < 100000
+
+    def test_max_errors_default_batch_size(self):
+        # Without --batch-size the budget still stops a point of at most 10^4 shots
+        path = os.path.join(self.directory, "sweep.jsonl")
+        main(
+            self.args[:-4]
+            + ["--shots", "10000", "--max-errors", "50", "--output", path]
+        )
+
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                assert 50 <= record["errors"]
+                assert record["shots"] < 10000
+                assert record["shots"] % MAX_ERRORS_BATCH_SIZE == 0
+
+    @pytest.mark.parametrize("shots", ["0", "-5"])
+    def test_non_positive_shots(self, shots):
+        with pytest.raises(SystemExit):
+            main(self.args[:-4] + ["--shots", shots])
+
+    def test_print_progress(self, capsys):
+        progress = {
+            "completed_tasks": 0,
+            "total_tasks": 4,
+            "distance": 3,
+            "error_rate": 0.05,
+            "shots_done": 0,
+            "errors": 0,
+            "eta_seconds": None,
+        }
+        _print_progress(progress)
+        _print_progress({**progress, "eta_seconds": 12.4})
+        lines = capsys.readouterr().err.splitlines()
+        assert [line.split()[-1] for line in lines] == ["eta=?", "eta=12s"]
+
+    def test_unknown_code(self):
+        with pytest.raises(SystemExit):
+            main(["--code", "unknown"] + self.args[2:])
+
+    def test_no_matplotlib(self):
+        # Neither importing the package nor running a sweep needs a plotting backend
+        script = (
+            "import sys, qec\n"
+            "assert not any('matplotlib' in m for m in sys.modules)\n"
+            "from qec.cli import main\n"
+            "main(sys.argv[1:])\n"
+            "assert 'matplotlib.pyplot' not in sys.modules\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script] + self.args,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert len(result.stdout.splitlines()) == 5
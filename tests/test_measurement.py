@@ -38,3 +38,13 @@ class TestMeasurement:
         self.measurement.add_outcome(outcome="0", qubit=0, round=1, type="check")
         assert self.measurement.get_register_id(qubit=0, round=1) == 0
         assert self.measurement.get_register_id(qubit=1, round=1) == None
+
+    def test_truncate(self):
+        self.measurement.add_outcome(outcome="0", qubit=0, round=1, type="check")
+        self.measurement.add_outcome(outcome="0", qubit=1, round=1, type="check")
+        self.measurement.add_outcome(outcome="1", qubit=0, round=2, type="data")
+        self.measurement.truncate(register_count=1)
+        assert self.measurement.register_count == 1
+        assert self.measurement.data == {
+            1: {0: {"outcome": "0", "type": "check", "register_id": 0}}
+        }
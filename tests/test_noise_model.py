@@ -0,0 +1,90 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from stim import Circuit
+
+from qec import NoiseModel
+
+
+class TestNoiseModel:
+
+    @pytest.fixture(autouse=True)
+    def init(self) -> None:
+        self.circuit = Circuit("""
+            R 0 1 2
+            RX 3
+            TICK
+            CX 0 1
+            H 2
+            TICK
+            MR 1
+            DETECTOR rec[-1]
+            """)
+
+    def test_depolarize(self):
+        noise_model = NoiseModel(depolarize1_rate=0.1, depolarize2_rate=0.2)
+        noisy = noise_model.apply(circuit=self.circuit)
+
+        # One merged instruction per channel and layer
+        assert noisy == Circuit("""
+            R 0 1 2
+            RX 3
+            DEPOLARIZE1(0.1) 0 1 2 3
+            TICK
+            CX 0 1
+            H 2
+            DEPOLARIZE1(0.1) 2
+            DEPOLARIZE2(0.2) 0 1
+            TICK
+            DEPOLARIZE1(0.1) 1
+            MR 1
+            DETECTOR rec[-1]
+            DEPOLARIZE1(0.1) 1
+            """)
+        assert noisy.without_noise() == self.circuit
+
+    def test_flips_and_idle(self):
+        noise_model = NoiseModel(
+            idle_rate=0.01, measurement_flip_rate=0.02, reset_flip_rate=0.03
+        )
+        noisy = noise_model.apply(circuit=self.circuit)
+
+        assert noisy == Circuit("""
+            R 0 1 2
+            RX 3
+            X_ERROR(0.03) 0 1 2
+            Z_ERROR(0.03) 3
+            TICK
+            CX 0 1
+            H 2
+            DEPOLARIZE1(0.01) 3
+            TICK
+            MR(0.02) 1
+            DETECTOR rec[-1]
+            X_ERROR(0.03) 1
+            DEPOLARIZE1(0.01) 0 2 3
+            """)
+
+    def test_repeat(self):
+        noise_model = NoiseModel(depolarize1_rate=0.1)
+        circuit = Circuit("R 0\nREPEAT 3 {\n    TICK\n    H 0\n}")
+
+        noisy = noise_model.apply(circuit=circuit)
+        assert noisy == Circuit(
+            "R 0\nDEPOLARIZE1(0.1) 0\nREPEAT 3 {\n    TICK\n    H 0\n"
+            "    DEPOLARIZE1(0.1) 0\n}"
+        )
+
+    def test_noiseless(self):
+        assert NoiseModel().apply(circuit=self.circuit) == self.circuit